@@ -0,0 +1,88 @@
+"""
+Command-line entry point for the bot.
+
+Run from the parent directory of `twitter_bot`:
+    python -m twitter_bot run      # Scheduler (SCHEDULER_MODE) until interrupted
+    python -m twitter_bot once     # Queue a tweet for the best new article and post it, then exit
+    python -m twitter_bot ingest   # Poll the feeds that are due and queue a tweet, without posting
+    python -m twitter_bot post     # Post tweets waiting in the outbound queue
+    python -m twitter_bot engagement  # Refresh the engagement metrics of recently posted tweets
+
+With X_ACCOUNTS set, every command works on all the configured accounts.
+Each command only imports what it uses: `ingest` never loads tweepy, `post`
+never loads feedparser or numpy, and `--help` loads neither.
+"""
+import argparse
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+def _check_credentials(config):
+    if not config.X_API_KEY and not config.X_ACCOUNTS:
+        logger.warning("Twitter API keys not found in config. Tweet posting will likely fail.")
+
+def _check_lease():
+    try:
+        from . import tweet_queue
+    except ImportError:
+        import tweet_queue
+    tweet_queue.check_lease()
+
+def main(argv=None) -> int:
+    """Parses the command line, runs the command and returns the exit status."""
+    parser = argparse.ArgumentParser(prog="python -m twitter_bot", description="RSS to X/Twitter bot.")
+    parser.add_argument("--log-level", help="Log level, e.g. DEBUG. Defaults to BOT_LOG_LEVEL.")
+    parser.add_argument("--log-format", choices=("text", "json"), help="Defaults to BOT_LOG_FORMAT.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="Run the scheduler until interrupted")
+    commands.add_parser("once", help="Queue a tweet for the best new article and post it, then exit")
+    commands.add_parser("ingest", help="Poll the feeds that are due and queue a tweet, without posting")
+    post = commands.add_parser("post", help="Post tweets waiting in the outbound queue")
+    post.add_argument("--max", type=int, help="Stop after handling this many tweets")
+    commands.add_parser("engagement", help="Refresh the engagement metrics of recently posted tweets")
+    args = parser.parse_args(argv)
+
+    try:
+        from . import config
+        from . import logs
+        from . import metrics
+    except ImportError:
+        import config
+        import logs
+        import metrics
+    logs.setup_logging(args.log_level, args.log_format)
+
+    if args.command == "run":
+        try:
+            from . import scheduler
+        except ImportError:
+            import scheduler
+        scheduler.run_scheduler()
+        return 0
+
+    try:
+        from . import accounts
+    except ImportError:
+        import accounts
+    # With X_ACCOUNTS set, feeds are fetched once and tweets queued and posted per account
+    bot = accounts.pipeline()
+    if args.command == "ingest":
+        bot.compose_latest_article()
+    elif args.command == "post":
+        _check_credentials(config)
+        _check_lease()
+        bot.post_queued_tweets(args.max)
+    elif args.command == "engagement":
+        _check_credentials(config)
+        bot.poll_engagement()
+    else:
+        _check_credentials(config)
+        _check_lease()
+        bot.post_latest_article()
+    if config.METRICS_PATH:
+        metrics.REGISTRY.write(config.METRICS_PATH)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""
+Multi-account posting: one shared ingest pipeline fanned out to per-account posting workers.
+
+Accounts are listed in X_ACCOUNTS. Feeds are fetched, parsed and deduplicated
+once per tick for all of them; each candidate is then routed to the accounts
+whose topics (and feeds, if restricted) it matches. Every account has its own
+credentials, tweepy client and connection pool, rate limiter, outbound queue
+and posted index, so one account hitting its rate limit or failing to post
+never holds up another.
+
+For an account NAME these variables are read (NAME uppercased, with
+non-alphanumeric characters replaced by underscores):
+
+    X_NAME_API_KEY, X_NAME_API_SECRET_KEY, X_NAME_ACCESS_TOKEN, X_NAME_ACCESS_TOKEN_SECRET
+    X_NAME_TOPICS    # Comma-separated keywords or phrases; empty takes every article
+    X_NAME_FEEDS     # Comma-separated feed URLs the account takes articles from; empty for all
+    X_NAME_TEMPLATE  # Tweet template; defaults to TWEET_TEMPLATE
+
+This module mirrors the pipeline functions of main.py (ingest_articles,
+compose_article, post_queued_tweets, ...) so the scheduler and the command
+line can use either; see pipeline().
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    from . import config
+    from . import engagement
+    from . import main
+    from . import metrics
+    from . import twitter_client
+    from .engagement import EngagementStore
+    from .feed_cache import FeedCache
+    from .feed_state import FeedStateStore
+    from .posted_index import PostedIndex
+    from .rate_limiter import RateLimiter
+    from .tweet_queue import TweetQueue, PostingWorker
+except ImportError:
+    import config
+    import engagement
+    import main
+    import metrics
+    import twitter_client
+    from engagement import EngagementStore
+    from feed_cache import FeedCache
+    from feed_state import FeedStateStore
+    from posted_index import PostedIndex
+    from rate_limiter import RateLimiter
+    from tweet_queue import TweetQueue, PostingWorker
+
+logger = logging.getLogger(__name__)
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+_WORD_RE = re.compile(r"\w+")
+
+def _words(text: Optional[str]) -> str:
+    """Casefolded words of text joined by single spaces, padded so phrases match on word boundaries."""
+    return " " + " ".join(_WORD_RE.findall((text or "").casefold())) + " "
+
+def _split(value: Optional[str]) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in (value or "").split(",") if item.strip())
+
+class Account(NamedTuple):
+    """A posting account: its credentials and the articles routed to it."""
+    name: str
+    api_key: Optional[str]
+    api_secret_key: Optional[str]
+    access_token: Optional[str]
+    access_token_secret: Optional[str]
+    topics: Tuple[str, ...] = ()   # Keywords or phrases; an article matches if its title or summary has one
+    feeds: Tuple[str, ...] = ()    # Feed URLs the account takes articles from; empty for all
+    template: Optional[str] = None  # Tweet template; None for config.TWEET_TEMPLATE
+
+    @property
+    def has_credentials(self) -> bool:
+        return all([self.api_key, self.api_secret_key, self.access_token, self.access_token_secret])
+
+    @property
+    def queue_path(self) -> str:
+        return os.path.join(config.ACCOUNTS_DIR, self.name, "tweet_queue.sqlite3")
+
+    @property
+    def posted_index_path(self) -> str:
+        return os.path.join(config.ACCOUNTS_DIR, self.name, "posted.sqlite3")
+
+    def matches(self, article) -> bool:
+        """Whether the article should be routed to this account."""
+        if self.feeds and article.source not in self.feeds:
+            return False
+        if not self.topics:
+            return True
+        text = _words(article.title) + _words(article.summary)
+        return any(_words(topic) in text for topic in self.topics)
+
+def load_account(name: str, environ=None) -> Account:
+    """
+    Reads one account's settings from the X_<NAME>_* environment variables.
+
+    Raises:
+        ValueError: If the name has characters other than letters, digits, "_" and "-".
+    """
+    if not _NAME_RE.match(name):
+        raise ValueError(f"Invalid account name {name!r}: use letters, digits, '_' and '-'.")
+    environ = os.environ if environ is None else environ
+    prefix = "X_" + name.upper().replace("-", "_") + "_"
+    return Account(
+        name,
+        environ.get(prefix + "API_KEY"),
+        environ.get(prefix + "API_SECRET_KEY"),
+        environ.get(prefix + "ACCESS_TOKEN"),
+        environ.get(prefix + "ACCESS_TOKEN_SECRET"),
+        topics=_split(environ.get(prefix + "TOPICS")),
+        feeds=_split(environ.get(prefix + "FEEDS")),
+        template=environ.get(prefix + "TEMPLATE") or None,
+    )
+
+def load_accounts(names: Optional[Iterable[str]] = None, environ=None) -> List[Account]:
+    """Reads the accounts listed in config.X_ACCOUNTS (or names) from the environment."""
+    accounts = [load_account(name, environ) for name in (config.X_ACCOUNTS if names is None else names)]
+    for account in accounts:
+        if not account.has_credentials:
+            logger.warning("Account %s has incomplete API credentials; its tweets stay queued.", account.name)
+    return accounts
+
+class AccountPool:
+    """
+    Routes articles to accounts and posts each account's queue with its own client.
+
+    Clients are created on first use, one per account, each with its own
+    HTTP connection pool and RateLimiter; posting runs on a thread pool with
+    one worker per account (up to config.X_ACCOUNT_WORKERS at a time).
+    """
+
+    def __init__(self, accounts: Optional[Iterable[Account]] = None, max_workers: Optional[int] = None):
+        self.accounts = list(load_accounts() if accounts is None else accounts)
+        names = [account.name for account in self.accounts]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate account names in {names}.")
+        self.max_workers = config.X_ACCOUNT_WORKERS if max_workers is None else max_workers
+        self.rate_limiters = {name: RateLimiter() for name in names}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def account(self, name: str) -> Account:
+        for account in self.accounts:
+            if account.name == name:
+                return account
+        raise KeyError(name)
+
+    def client(self, name: str):
+        """Returns the account's Tweepy client, creating it on first use."""
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                account = self.account(name)
+                client = twitter_client.build_client(account.api_key, account.api_secret_key, account.access_token,
+                                                     account.access_token_secret, self.rate_limiters[name])
+                self._clients[name] = client
+            return client
+
+    def refresh(self, reload_config: bool = True):
+        """
+        Re-reads the accounts' settings, e.g. after credentials were rotated.
+
+        Clients are rebuilt on next use; calls holding an old one finish with it.
+        Rate limiters are kept, since the API's windows don't reset with new tokens.
+        """
+        if reload_config:
+            config.reload_credentials()
+        accounts = load_accounts([account.name for account in self.accounts])
+        with self._lock:
+            self.accounts = accounts
+            self._clients.clear()
+
+    def send_tweet(self, name: str, text: str):
+        """Posts a tweet from the named account, raising on failure (see twitter_client.send_tweet)."""
+        return twitter_client.send_tweet(text, client=self.client(name), limiter=self.rate_limiters[name])
+
+    def route(self, article) -> List[Account]:
+        """Returns the accounts the article is routed to."""
+        return [account for account in self.accounts if account.matches(article)]
+
+    def compose(self, candidates) -> Dict[str, bool]:
+        """
+        Queues, for every account, a tweet for its best-ranked routed candidate.
+
+        Each account ranks only the candidates routed to it, against its own
+        posted index, so the same story can go out once from every account
+        it is routed to.
+
+        Returns:
+            dict: Maps each account name to True if a tweet was queued for it.
+        """
+        routed = {account.name: [] for account in self.accounts}
+        for article in candidates:
+            for account in self.route(article):
+                routed[account.name].append(article)
+        queued = {}
+        for account in self.accounts:
+            articles = routed[account.name]
+            metrics.inc("articles_routed_total", len(articles), account=account.name)
+            if not articles:
+                queued[account.name] = False
+                continue
+            with PostedIndex(account.posted_index_path) as posted_index, \
+                 TweetQueue(account.queue_path) as tweet_queue, \
+                 metrics.timer("compose_seconds", account=account.name):
+                queued[account.name] = main.queue_best_article(
+                    articles, posted_index, tweet_queue, account.template,
+                    engagement.source_weights(account=account.name))
+                metrics.set_gauge("tweet_queue_depth", tweet_queue.depth(), account=account.name)
+        logger.info("Queued tweets for %d of %d accounts.", sum(queued.values()), len(queued))
+        return queued
+
+    def _post_account(self, account: Account, max_items: Optional[int]) -> int:
+        with PostedIndex(account.posted_index_path) as posted_index, TweetQueue(account.queue_path) as tweet_queue:
+            send = lambda text: self.send_tweet(account.name, text)
+            worker = PostingWorker(tweet_queue, send, posted_index, labels={"account": account.name})
+            handled = worker.drain(max_items)
+            metrics.set_gauge("tweet_queue_depth", tweet_queue.depth(), account=account.name)
+            logger.info("Account %s: handled %d tweets, queue now %s", account.name, handled, tweet_queue.stats())
+            return handled
+
+    def post(self, max_items: Optional[int] = None) -> Dict[str, int]:
+        """
+        Drains every account's queue concurrently, one worker per account.
+
+        Accounts without complete credentials are skipped and keep their tweets queued.
+
+        Args:
+            max_items (int, optional): Stop each account after handling this many tweets.
+
+        Returns:
+            dict: Maps each account name to the number of tweets handled.
+        """
+        accounts = [account for account in self.accounts if account.has_credentials]
+        handled = {account.name: 0 for account in self.accounts}
+        if not accounts:
+            return handled
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(accounts))),
+                                thread_name_prefix="account-poster") as pool:
+            futures = {account.name: pool.submit(self._post_account, account, max_items) for account in accounts}
+        for name, future in futures.items():
+            try:
+                handled[name] = future.result()
+            except Exception as e:
+                logger.exception("Posting for account %s failed: %s", name, e)
+        return handled
+
+    def poll_engagement(self) -> Dict[str, int]:
+        """
+        Refreshes the engagement metrics of every account's recent tweets, each with its own client.
+
+        Returns:
+            dict: Maps each account name to the number of tweets polled.
+        """
+        since = time.time() - config.ENGAGEMENT_TRACK_DAYS * 86400
+        polled = {account.name: 0 for account in self.accounts}
+        with EngagementStore() as store:
+            for account in self.accounts:
+                with TweetQueue(account.queue_path) as tweet_queue:
+                    store.track(tweet_queue.sent_since(since), account.name)
+                if not account.has_credentials:
+                    continue
+                try:
+                    polled[account.name] = engagement.poll(store, self.client(account.name),
+                                                           self.rate_limiters[account.name], account.name)
+                except Exception as e:
+                    logger.error("Engagement poll for account %s failed: %s", account.name, e)
+            store.compact()
+        return polled
+
+# Process-wide pool, created on first use so every account keeps its client across calls
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> AccountPool:
+    """Returns the shared AccountPool for config.X_ACCOUNTS, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AccountPool()
+        return _pool
+
+def ingest_articles(max_candidates=main.MAX_CANDIDATES):
+    """
+    Fetches the latest articles from RSS feeds once, for all accounts.
+
+    Unlike main.ingest_articles, candidates are not checked against a posted
+    index or queue here: each account checks its own when composing.
+
+    Returns:
+        list: Up to max_candidates new Article records.
+    """
+    with FeedCache() as feed_cache, FeedStateStore() as feed_state:
+        candidates = main.collect_candidates(feed_cache, None, None, max_candidates, feed_state,
+                                             main.near_duplicates)
+    logger.info("Ingested %d candidate articles for %d accounts.", len(candidates), len(config.X_ACCOUNTS))
+    return candidates
+
+def compose_article(candidates) -> bool:
+    """Queues a tweet per account from candidates (see AccountPool.compose); True if any was queued."""
+    return any(get_pool().compose(candidates).values())
+
+def compose_latest_article() -> bool:
+    """Fetches the latest articles once and queues a tweet per account."""
+    candidates = ingest_articles()
+    queued = compose_article(candidates)
+    main.release_articles(candidates)
+    return queued
+
+def post_queued_tweets(max_items=None) -> int:
+    """Posts every account's queued tweets (see AccountPool.post); returns the total handled."""
+    return sum(get_pool().post(max_items).values())
+
+def poll_engagement() -> int:
+    """Refreshes every account's recent tweet metrics (see AccountPool.poll_engagement); returns the total polled."""
+    return sum(get_pool().poll_engagement().values())
+
+def post_latest_article():
+    """Fetches the latest articles once, queues a tweet per account and posts them."""
+    compose_latest_article()
+    post_queued_tweets()
+
+def pipeline():
+    """Returns the module running the bot's pipeline: this one if X_ACCOUNTS is set, else main."""
+    return sys.modules[__name__] if config.X_ACCOUNTS else main
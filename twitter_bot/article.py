@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any
+
+try:
+    from .posted_index import normalize_url, title_hash
+except ImportError:
+    from posted_index import normalize_url, title_hash
+
+@dataclass(slots=True)
+class Article:
+    """
+    A candidate article taken from a feed entry.
+
+    Uses __slots__, so each retained article is a small fixed-size record
+    rather than a dict. The dedup keys are computed once on creation.
+
+    Attributes:
+        title (str): Article title, stripped of surrounding whitespace.
+        link (str): Article URL, stripped of surrounding whitespace.
+        published (Optional[float]): Publication time (epoch seconds, UTC), if the feed gives one.
+        source (Optional[str]): URL of the feed the article came from.
+        summary (Optional[str]): Plain-text summary from the feed, if any.
+        url_key (str): Normalized URL used for deduplication.
+        title_key (str): Title hash used for deduplication.
+    """
+    title: str
+    link: str
+    published: Optional[float] = None
+    source: Optional[str] = None
+    summary: Optional[str] = None
+    url_key: str = field(init=False, repr=False)
+    title_key: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.title = self.title.strip()
+        self.link = self.link.strip()
+        self.url_key = normalize_url(self.link)
+        self.title_key = title_hash(self.title)
+
+    @property
+    def key(self) -> str:
+        """Dedup key for the article: its normalized URL."""
+        return self.url_key
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the article's input fields as a JSON-serializable dict."""
+        data = asdict(self)
+        del data["url_key"], data["title_key"]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Article":
+        """Builds an article from to_dict() output."""
+        return cls(data["title"], data["link"], data.get("published"), data.get("source"), data.get("summary"))
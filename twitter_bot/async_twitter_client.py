@@ -0,0 +1,259 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import tweepy
+from tweepy.asynchronous import AsyncClient
+
+try:
+    from . import config
+    from . import composer
+    from . import twitter_client
+    from .rate_limiter import RateLimitExceeded, endpoint_for
+except ImportError:
+    import config
+    import composer
+    import twitter_client
+    from rate_limiter import RateLimitExceeded, endpoint_for
+
+logger = logging.getLogger(__name__)
+
+class AsyncTwitterClient:
+    """
+    asyncio counterpart of twitter_client's posting and user lookup functions.
+
+    Every request goes through one aiohttp session, so they share a single
+    keep-alive connection pool (X_CONNECTION_POOL_SIZE connections). They
+    also share the process-wide rate limiter and the user caches with the
+    synchronous client. A bounded semaphore caps requests in flight at
+    max_concurrency.
+
+    Each call accepts a timeout for every HTTP request it sends, defaulting
+    to the client's timeout (X_API_TIMEOUT_SECONDS). Waits for a
+    concurrency slot or a rate-limit window don't count against it; the
+    rate limiter bounds those by X_API_MAX_WAIT_SECONDS. Cancelling the
+    calling task aborts its request and frees its slot.
+
+    Usage:
+        async with AsyncTwitterClient() as client:
+            await client.post_tweet("Hello")
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None, rate_limiter=None):
+        self.max_concurrency = config.X_ASYNC_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.timeout = config.X_API_TIMEOUT_SECONDS if timeout is None else timeout
+        self.pool_size = config.X_CONNECTION_POOL_SIZE if pool_size is None else pool_size
+        self.rate_limiter = twitter_client.rate_limiter if rate_limiter is None else rate_limiter
+        self._semaphore = asyncio.BoundedSemaphore(self.max_concurrency)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.client: Optional[AsyncClient] = None
+
+    async def start(self) -> "AsyncTwitterClient":
+        """Opens the shared session. Called by `async with`."""
+        if not all([config.X_API_KEY, config.X_API_SECRET_KEY, config.X_ACCESS_TOKEN, config.X_ACCESS_TOKEN_SECRET]):
+            raise ValueError("Twitter API credentials are not fully configured. "
+                             "Please check your .env file or environment variables.")
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(self._on_request_end)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[trace]
+        )
+        self.client = AsyncClient(
+            consumer_key=config.X_API_KEY,
+            consumer_secret=config.X_API_SECRET_KEY,
+            access_token=config.X_ACCESS_TOKEN,
+            access_token_secret=config.X_ACCESS_TOKEN_SECRET
+        )
+        self.client.session = self.session
+        return self
+
+    async def close(self):
+        """Closes the shared session and its connections."""
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+        self.client = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _on_request_end(self, session, context, params):
+        # aiohttp trace hook: the async equivalent of RateLimiter.on_response
+        endpoint = endpoint_for(params.method, str(params.url))
+        if endpoint is not None:
+            self.rate_limiter.update(endpoint, params.response.headers)
+
+    async def _call(self, endpoint: str, method: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Runs one AsyncClient call within the rate limit, the concurrency limit and timeout.
+
+        Rate-limit waits and retry backoff happen before a concurrency slot is
+        taken, so a throttled endpoint doesn't hold slots other calls could use;
+        the timeout (default: the client's) applies to each HTTP request, not
+        to those waits.
+        """
+        if self.client is None:
+            raise RuntimeError("AsyncTwitterClient is not started; use 'async with AsyncTwitterClient()'.")
+        func = getattr(self.client, method)
+        timeout = self.timeout if timeout is None else timeout
+
+        async def limited_call(**kwargs):
+            async with self._semaphore:
+                return await asyncio.wait_for(func(**kwargs), timeout)
+
+        return await self.rate_limiter.call_async(endpoint, limited_call, **kwargs)
+
+    async def send_tweet(self, text: str, timeout: Optional[float] = None):
+        """
+        Posts a tweet, raising on failure.
+
+        Args:
+            text (str): The text content of the tweet. Max 280 weighted characters.
+            timeout (float, optional): Seconds before the request is abandoned.
+                                       Defaults to the client's timeout.
+        Returns:
+            The response from the Twitter API.
+        Raises:
+            InvalidTweetText: If the text is empty or too long.
+            asyncio.TimeoutError: If the request took longer than timeout.
+            RateLimitExceeded: If the create_tweet window won't reopen in time.
+            tweepy.TweepyException: If the API call fails.
+        """
+        composer.validate(text)
+        response = await self._call("create_tweet", "create_tweet", timeout, text=text)
+        logger.info("Tweet posted successfully! Tweet ID: %s", response.data['id'])
+        return response
+
+    async def post_tweet(self, text: str, timeout: Optional[float] = None):
+        """
+        Posts a tweet.
+
+        Returns:
+            The response from the Twitter API, or None if an error occurs.
+            Cancellation is not an error and propagates.
+        """
+        try:
+            return await self.send_tweet(text, timeout)
+        except ValueError as e:
+            logger.error("Error: %s", e)
+        except asyncio.TimeoutError:
+            logger.warning("Tweet not posted: no response within %ss.", timeout)
+        except RateLimitExceeded as e:
+            logger.warning("Tweet not posted: %s", e)
+        except tweepy.TweepyException as e:
+            logger.error("Error posting tweet: %s", e)
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+        return None
+
+    async def _recent_tweets(self, user_id, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        recent_tweets = twitter_client.tweets_cache.get(user_id)
+        if recent_tweets is None:
+            response = await self._call(
+                "get_users_tweets", "get_users_tweets", timeout,
+                id=user_id, max_results=5, tweet_fields=twitter_client.TWEET_FIELDS,
+                expansions=['attachments.media_keys']
+            )
+            recent_tweets = twitter_client._tweets_to_info(response)
+            twitter_client.tweets_cache.set(user_id, recent_tweets)
+        return [dict(tweet) for tweet in recent_tweets]
+
+    async def get_twitter_user_info(self, username: str, timeout: Optional[float] = None,
+                                    prefetch_media: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fetches public information for a given X/Twitter username.
+
+        Returns the same dictionary as twitter_client.get_twitter_user_info,
+        or None if the user is not found or the lookup failed or timed out.
+        With prefetch_media, the recent tweets' images are downloaded into
+        the image cache on a worker thread.
+        """
+        try:
+            profile = twitter_client.profile_cache.get(username.lower())
+            if profile is None:
+                response = await self._call("get_user", "get_user", timeout,
+                                            username=username, user_fields=twitter_client.USER_FIELDS)
+                if not response.data:
+                    logger.info("User %s not found.", username)
+                    return None
+                profile = twitter_client._user_to_info(response.data)
+                twitter_client.profile_cache.set(username.lower(), profile)
+            user_info = dict(profile, recent_tweets=await self._recent_tweets(profile["id"], timeout))
+            if prefetch_media:
+                await asyncio.to_thread(twitter_client.prefetch_user_media, [user_info])
+            return user_info
+        except asyncio.TimeoutError:
+            logger.warning("Timed out fetching data for user %s.", username)
+            return None
+        except tweepy.TweepyException as e:
+            logger.error("Tweepy API error fetching data for user %s: %s", username, e)
+            return None
+        except Exception as e:
+            logger.exception("Unexpected error fetching data for user %s: %s", username, e)
+            return None
+
+    async def get_twitter_users_info(self, usernames: List[str], timeout: Optional[float] = None,
+                                     prefetch_media: bool = False) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetches public information for many usernames concurrently.
+
+        Profiles are resolved with one get_users call per 100 usernames, then
+        all timelines are fetched at once, limited only by max_concurrency.
+        With prefetch_media, all their images are then downloaded into the
+        image cache on a worker thread.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Maps each requested username
+            to its user info dictionary, or None.
+        """
+        requested: Dict[str, List[str]] = {}
+        for username in usernames:
+            requested.setdefault(username.lower(), []).append(username)
+        results: Dict[str, Optional[Dict[str, Any]]] = {username: None for username in usernames}
+
+        profiles = {}
+        handles = []
+        for handle in requested:
+            cached = twitter_client.profile_cache.get(handle)
+            if cached:
+                profiles[handle] = cached
+            else:
+                handles.append(handle)
+
+        chunks = [handles[i:i + twitter_client.MAX_USERS_PER_LOOKUP]
+                  for i in range(0, len(handles), twitter_client.MAX_USERS_PER_LOOKUP)]
+        responses = await asyncio.gather(
+            *(self._call("get_users", "get_users", timeout, usernames=chunk, user_fields=twitter_client.USER_FIELDS)
+              for chunk in chunks),
+            return_exceptions=True
+        )
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                logger.error("Error looking up %d users: %r", len(chunk), response)
+                continue
+            for user in response.data or []:
+                profile = twitter_client._user_to_info(user)
+                twitter_client.profile_cache.set(profile["username"].lower(), profile)
+                profiles[profile["username"].lower()] = profile
+
+        handles = list(profiles)
+        timelines = await asyncio.gather(
+            *(self._recent_tweets(profiles[handle]["id"], timeout) for handle in handles),
+            return_exceptions=True
+        )
+        for handle, recent_tweets in zip(handles, timelines):
+            if isinstance(recent_tweets, BaseException):
+                logger.error("Error fetching recent tweets of %s: %r", handle, recent_tweets)
+                continue
+            for username in requested.get(handle, []):
+                results[username] = dict(profiles[handle], recent_tweets=recent_tweets)
+        if prefetch_media:
+            await asyncio.to_thread(twitter_client.prefetch_user_media, results.values())
+        return results
@@ -0,0 +1,59 @@
+"""
+Benchmark: TCP connections opened when posting N tweets.
+
+Compares building a new tweepy.Client per call (the old behaviour) against
+the shared client returned by twitter_client.get_twitter_client(). Requests
+go to the local stand-in server, which counts accepted connections.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_client_reuse
+"""
+import argparse
+import time
+from unittest.mock import patch
+
+from twitter_bot import config, twitter_client
+from twitter_bot.benchmarks.standin import StandInServer, route_api_to
+
+_DUMMY_CREDENTIALS = {
+    "X_API_KEY": "bench-key",
+    "X_API_SECRET_KEY": "bench-secret",
+    "X_ACCESS_TOKEN": "bench-token",
+    "X_ACCESS_TOKEN_SECRET": "bench-token-secret",
+}
+
+
+def _routed(client, server):
+    route_api_to(client.session, server.base_url)
+    return client
+
+
+def run(num_posts=50):
+    results = {}
+    with patch.multiple(config, **_DUMMY_CREDENTIALS):
+        for label in ("client per call", "shared client"):
+            with StandInServer() as server:
+                if label == "client per call":
+                    factory = lambda: _routed(twitter_client._build_twitter_client(), server)
+                else:
+                    shared = _routed(twitter_client.refresh_twitter_client(reload_config=False), server)
+                    factory = lambda: shared
+                with patch.object(twitter_client, "get_twitter_client", factory):
+                    start = time.perf_counter()
+                    for i in range(num_posts):
+                        twitter_client.post_tweet(f"Benchmark tweet {i}")
+                    elapsed = time.perf_counter() - start
+                results[label] = (server.connection_count, elapsed)
+
+    print()
+    print(f"posts={num_posts}")
+    for label, (connections, elapsed) in results.items():
+        print(f"{label:>16}: {connections} connections opened, {elapsed:.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=50)
+    args = parser.parse_args()
+    run(num_posts=args.posts)
@@ -0,0 +1,255 @@
+"""
+Benchmark: full ingest -> compose -> post cycles against the local stand-in.
+
+Every cycle the stand-in publishes new entries in each feed (RSS and Atom),
+then the bot runs its real pipeline: main.ingest_articles (conditional GETs,
+high-water marks, near-duplicate filtering), main.compose_article (ranking,
+templating, queueing) and main.post_queued_tweets (rate-limited create_tweet
+through the shared client). An analytics stage looks up users and their
+timelines. All state lives in a temporary directory and all traffic goes to
+127.0.0.1, so no network or API keys are needed.
+
+Reports throughput, p50/p99 latency per stage and peak memory. API latency,
+5xx errors and 429 rate limits can be injected. With --json the results are
+saved, and with --baseline a run fails (exit status 1) when a stage's p99 or
+the peak memory regressed by more than --tolerance.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_cycle
+    python -m twitter_bot.benchmarks.bench_cycle --api-latency 0.02 --error-rate 0.05 --rate-limit 20
+    python -m twitter_bot.benchmarks.bench_cycle --json new.json --baseline old.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from twitter_bot import config, content_manager, main, metrics, twitter_client
+from twitter_bot.benchmarks.standin import StandInServer, make_atom, make_rss, route_api_to
+from twitter_bot.user_cache import TTLCache
+
+STAGES = ("ingest", "compose", "post", "analytics", "cycle")
+TOPICS = ("AI chip", "data platform", "LLM release", "cloud outage", "privacy policy", "robotics startup",
+          "open source model", "analytics tool", "security flaw", "deep learning paper")
+_DUMMY_CREDENTIALS = {
+    "X_API_KEY": "bench-key",
+    "X_API_SECRET_KEY": "bench-secret",
+    "X_ACCESS_TOKEN": "bench-token",
+    "X_ACCESS_TOKEN_SECRET": "bench-token-secret",
+}
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class _Bench:
+    """The stand-in feeds and the bot's stages, run against a temporary data directory."""
+
+    def __init__(self, server, feeds, entries, new_per_cycle, users):
+        self.server = server
+        self.feeds = feeds
+        self.entries = entries
+        self.new_per_cycle = new_per_cycle
+        self.usernames = [f"bench_user_{i}" for i in range(users)]
+        self.published = 0
+        self.feed_urls = [server.base_url + self._path(i) for i in range(feeds)]
+
+    @staticmethod
+    def _path(i):
+        return f"/feeds/{i}.atom" if i % 2 else f"/feeds/{i}.rss"
+
+    def publish(self):
+        """Publishes new_per_cycle new entries in every feed (the first call publishes `entries`)."""
+        count = self.entries if self.published == 0 else self.new_per_cycle
+        self.published += count
+        start = max(0, self.published - self.entries)
+        for i in range(self.feeds):
+            prefix = f"{TOPICS[i % len(TOPICS)]} news from source {i}"
+            link = f"https://source{i}.example/articles"
+            make = make_atom if i % 2 else make_rss
+            self.server.add_feed(self._path(i), make(self.published - start, prefix, link, start=start, distinct=True))
+
+    def cycle(self):
+        """Runs one cycle and returns the seconds spent in each stage."""
+        timings = {}
+        start = time.perf_counter()
+        self.publish()
+        candidates = main.ingest_articles()
+        timings["ingest"] = time.perf_counter() - start
+
+        mark = time.perf_counter()
+        main.compose_article(candidates)
+        timings["compose"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        main.post_queued_tweets()
+        timings["post"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        if self.usernames:
+            twitter_client.clear_user_cache()
+            twitter_client.get_twitter_users_info(self.usernames)
+        timings["analytics"] = time.perf_counter() - mark
+        timings["cycle"] = time.perf_counter() - start
+        return timings
+
+
+def run(cycles=20, feeds=10, entries=200, new_per_cycle=5, users=10, api_latency=0.0, feed_latency=0.0,
+        error_rate=0.0, rate_limit=None, rate_window=2.0, memory=True, quiet=True):
+    """Runs the benchmark and returns its results as a dict."""
+    with contextlib.ExitStack() as stack:
+        tmp = stack.enter_context(tempfile.TemporaryDirectory())
+        server = stack.enter_context(StandInServer(api_latency=api_latency, error_rate=error_rate))
+        for endpoint in ("create_tweet", "get_user", "get_users", "get_users_tweets"):
+            if rate_limit:
+                server.set_rate_limit(endpoint, rate_limit, rate_window)
+        bench = _Bench(server, feeds, entries, new_per_cycle, users)
+        if feed_latency:
+            server.feeds = _LatencyFeeds(feed_latency)
+
+        stack.enter_context(patch.multiple(
+            config,
+            FEED_CACHE_PATH=os.path.join(tmp, "feed_cache.sqlite3"),
+            FEED_STATE_PATH=os.path.join(tmp, "feed_state.sqlite3"),
+            POSTED_INDEX_PATH=os.path.join(tmp, "posted.sqlite3"),
+            TWEET_QUEUE_PATH=os.path.join(tmp, "tweet_queue.sqlite3"),
+            # Every feed is due on every cycle
+            FEED_MIN_POLL_MINUTES=0, FEED_MAX_POLL_HOURS=0,
+            **_DUMMY_CREDENTIALS
+        ))
+        stack.enter_context(patch.object(content_manager, "DEFAULT_RSS_FEEDS", bench.feed_urls))
+        stack.enter_context(patch.object(main, "near_duplicates", content_manager.NearDuplicateIndex()))
+        # In-memory user caches and a client of our own, so the run leaves no trace
+        stack.enter_context(patch.multiple(
+            twitter_client,
+            _client=None,
+            profile_cache=TTLCache("profile", ttl=config.USER_PROFILE_TTL_SECONDS),
+            tweets_cache=TTLCache("tweets", ttl=config.USER_TWEETS_TTL_SECONDS),
+        ))
+        route_api_to(twitter_client.refresh_twitter_client(reload_config=False).session, server.base_url)
+        if quiet:
+            logging.disable(logging.WARNING)
+            stack.callback(logging.disable, logging.NOTSET)
+        metrics.REGISTRY.reset()
+
+        samples = {stage: [] for stage in STAGES}
+        start = time.perf_counter()
+        for _ in range(cycles):
+            for stage, seconds in bench.cycle().items():
+                samples[stage].append(seconds)
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            # One more cycle under tracemalloc, which slows allocation-heavy code down
+            tracemalloc.start()
+            bench.cycle()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        snapshot = metrics.REGISTRY.snapshot()
+        articles = sum(snapshot.get("articles_parsed_total", {}).values())
+        retries = sum(snapshot.get("api_retries_total", {}).values())
+        results = {
+            "config": {"cycles": cycles, "feeds": feeds, "entries": entries, "new_per_cycle": new_per_cycle,
+                       "users": users, "api_latency": api_latency, "feed_latency": feed_latency,
+                       "error_rate": error_rate, "rate_limit": rate_limit},
+            "throughput": {"cycles_per_s": cycles / elapsed, "tweets_posted": len(server.tweets),
+                           "articles_per_s": articles / elapsed},
+            "latency_ms": {stage: {"p50": percentile(s, 50) * 1000, "p99": percentile(s, 99) * 1000}
+                           for stage, s in samples.items()},
+            "memory_mb": {"tracemalloc_peak": peak / 1e6 if peak is not None else None,
+                          "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024},
+            "api": {"requests": dict(server.api_counts),
+                    "responses": {str(k): v for k, v in sorted(server.status_counts.items())},
+                    "retries": retries},
+        }
+    return results
+
+
+class _LatencyFeeds(dict):
+    """Feed registry that applies the same latency to every feed added to it."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def __setitem__(self, path, value):
+        super().__setitem__(path, (value[0], self.latency))
+
+
+def report(results):
+    cfg, throughput = results["config"], results["throughput"]
+    print(f"cycles={cfg['cycles']} feeds={cfg['feeds']} users={cfg['users']} api_latency={cfg['api_latency']}s "
+          f"error_rate={cfg['error_rate']} rate_limit={cfg['rate_limit']}")
+    print(f"throughput: {throughput['cycles_per_s']:.2f} cycles/s, {throughput['articles_per_s']:.0f} articles/s, "
+          f"{throughput['tweets_posted']} tweets posted")
+    print(f"{'stage':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage, latency in results["latency_ms"].items():
+        print(f"{stage:>10} {latency['p50']:9.1f} {latency['p99']:9.1f}")
+    memory = results["memory_mb"]
+    if memory["tracemalloc_peak"] is not None:
+        print(f"peak memory: {memory['tracemalloc_peak']:.1f} MB traced in one cycle, {memory['max_rss']:.0f} MB max RSS")
+    api = results["api"]
+    print(f"api: requests {api['requests']}, responses {api['responses']}, retries {api['retries']:.0f}")
+
+
+def compare(results, baseline, tolerance):
+    """Returns the regressions of results against a baseline, as messages."""
+    regressions = []
+    for stage, latency in results["latency_ms"].items():
+        old = baseline.get("latency_ms", {}).get(stage, {}).get("p99")
+        if old and latency["p99"] > old * (1 + tolerance):
+            regressions.append(f"{stage} p99 {latency['p99']:.1f} ms > {old:.1f} ms baseline")
+    new_peak = results["memory_mb"]["tracemalloc_peak"]
+    old_peak = baseline.get("memory_mb", {}).get("tracemalloc_peak")
+    if new_peak and old_peak and new_peak > old_peak * (1 + tolerance):
+        regressions.append(f"peak memory {new_peak:.1f} MB > {old_peak:.1f} MB baseline")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--entries", type=int, default=200, help="Entries per feed")
+    parser.add_argument("--new", type=int, default=5, help="New entries per feed per cycle")
+    parser.add_argument("--users", type=int, default=10, help="Accounts looked up by the analytics stage")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds added to every X API request")
+    parser.add_argument("--feed-latency", type=float, default=0.0, help="Seconds added to every feed request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of X API requests answered with 503")
+    parser.add_argument("--rate-limit", type=int, help="Requests per window allowed on each X endpoint")
+    parser.add_argument("--rate-window", type=float, default=2.0, help="Rate-limit window in seconds")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc cycle")
+    parser.add_argument("--json", help="Save the results to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression, as a fraction")
+    args = parser.parse_args()
+
+    results = run(cycles=args.cycles, feeds=args.feeds, entries=args.entries, new_per_cycle=args.new,
+                  users=args.users, api_latency=args.api_latency, feed_latency=args.feed_latency,
+                  error_rate=args.error_rate, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                  memory=not args.no_memory)
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,47 @@
+"""
+Benchmark: sequential vs concurrent feed fetching.
+
+Serves feeds with random fake latency from a local stand-in server and
+compares wall-clock time of fetch_rss_feeds with max_workers=1 against the
+default concurrent mode. Concurrent time should track the slowest feed.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_feed_fetch
+"""
+import argparse
+import random
+import time
+
+from twitter_bot import content_manager
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+
+
+def run(num_feeds=30, entries_per_feed=20, min_latency=0.05, max_latency=0.5, seed=1):
+    rng = random.Random(seed)
+    with StandInServer() as server:
+        latencies = []
+        urls = []
+        for i in range(num_feeds):
+            latency = rng.uniform(min_latency, max_latency)
+            latencies.append(latency)
+            urls.append(server.add_feed(f"/feed{i}.xml", make_rss(entries_per_feed, f"Feed {i}"), latency))
+
+        timings = {}
+        for label, workers in (("sequential", 1), ("concurrent", content_manager.DEFAULT_MAX_WORKERS)):
+            start = time.perf_counter()
+            articles = content_manager.fetch_rss_feeds(urls, max_workers=workers)
+            timings[label] = (time.perf_counter() - start, len(articles))
+
+    print()
+    print(f"feeds={num_feeds} sum(latency)={sum(latencies):.2f}s max(latency)={max(latencies):.2f}s")
+    for label, (elapsed, count) in timings.items():
+        print(f"{label:>10}: {elapsed:.2f}s wall, {count} articles")
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=30)
+    parser.add_argument("--entries", type=int, default=20)
+    args = parser.parse_args()
+    run(num_feeds=args.feeds, entries_per_feed=args.entries)
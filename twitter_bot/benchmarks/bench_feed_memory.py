@@ -0,0 +1,62 @@
+"""
+Benchmark: peak memory of list vs streaming feed ingestion.
+
+Serves large synthetic feeds from the local stand-in server and measures the
+tracemalloc peak of building the full article list with fetch_rss_feeds
+against streaming with iter_rss_feeds and stopping after enough candidates.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_feed_memory
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from twitter_bot import content_manager
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        count = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak, elapsed
+
+
+def run(num_feeds=12, entries_per_feed=1000, candidates=50, workers=4):
+    with StandInServer() as server:
+        urls = [server.add_feed(f"/big{i}.xml", make_rss(entries_per_feed, f"Feed {i}")) for i in range(num_feeds)]
+
+        def full_list():
+            return len(content_manager.fetch_rss_feeds(urls, max_workers=workers))
+
+        def streaming():
+            with contextlib.closing(content_manager.iter_rss_feeds(urls, max_workers=workers)) as articles:
+                taken = 0
+                for _ in articles:
+                    taken += 1
+                    if taken >= candidates:
+                        break
+            return taken
+
+        results = {"fetch_rss_feeds (full list)": _measure(full_list),
+                   f"iter_rss_feeds (first {candidates})": _measure(streaming)}
+
+    print(f"feeds={num_feeds} entries/feed={entries_per_feed} workers={workers}")
+    for label, (count, peak, elapsed) in results.items():
+        print(f"{label:>30}: {count:>7} articles, peak {peak / 1e6:7.1f} MB, {elapsed:.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=12)
+    parser.add_argument("--entries", type=int, default=1000)
+    args = parser.parse_args()
+    run(num_feeds=args.feeds, entries_per_feed=args.entries)
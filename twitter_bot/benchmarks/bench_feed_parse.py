@@ -0,0 +1,59 @@
+"""
+Benchmark: entries parsed per second, lean parser vs feedparser.
+
+Parses large synthetic RSS 2.0 and Atom documents (with HTML summaries, as
+real feeds carry) with feed_parser.parse_lean and with feedparser, checks
+that both produce the same entries, and reports entries per second.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_feed_parse
+"""
+import argparse
+import time
+import warnings
+
+from twitter_bot import feed_parser
+from twitter_bot.benchmarks.standin import make_atom, make_rss
+
+
+def _with_html_summaries(document):
+    # The stand-in summaries are one short sentence; real ones are a few escaped HTML paragraphs
+    paragraph = "&lt;p&gt;Lorem ipsum &lt;a href=&quot;https://example.com&quot;&gt;dolor&lt;/a&gt; sit amet.&lt;/p&gt;"
+    return document.replace(b"</description>", paragraph.encode() * 8 + b"</description>").replace(
+        b"</summary>", paragraph.encode() * 8 + b"</summary>")
+
+
+def _best(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(entries=2000, repeat=3):
+    documents = {
+        "RSS 2.0": _with_html_summaries(make_rss(entries, "Synthetic article", distinct=True)),
+        "Atom 1.0": _with_html_summaries(make_atom(entries, "Synthetic article", distinct=True)),
+    }
+    for name, body in documents.items():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # feedparser's updated_parsed deprecation warning
+            reference = feed_parser.parse_feedparser(body).entries
+            lean = feed_parser.parse_lean(body)
+            assert lean == reference, "lean parser and feedparser disagree"
+            slow = _best(lambda: feed_parser.parse_feedparser(body), repeat)
+        fast = _best(lambda: feed_parser.parse_lean(body), repeat)
+        print(f"{name}: {entries} entries, {len(body) / 1e6:.1f} MB")
+        print(f"  feedparser:  {entries / slow:10,.0f} entries/s")
+        print(f"        lean:  {entries / fast:10,.0f} entries/s")
+        print(f"     speedup:  {slow / fast:10.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.entries, args.repeat)
@@ -0,0 +1,96 @@
+"""
+Benchmark: vectorized ranking vs a per-article Python loop.
+
+Scores a synthetic candidate set with ranking.default_ranker() and with a
+naive loop computing the same features one article at a time, checks that
+both agree, and reports the time per ranking.
+
+Run from the project root:
+    python -m twitter_bot.benchmarks.bench_ranking
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from twitter_bot import ranking
+from twitter_bot.article import Article
+
+WORDS = ("ai model data science learning deep machine neural network startup funding market cloud chip "
+         "robot research paper open source release benchmark policy regulation security privacy llm "
+         "analytics big python tool platform launch update study report growth").split()
+SOURCES = [f"https://feeds.test/{i}" for i in range(20)]
+
+
+def _naive_tokens(title):
+    words = title.casefold().translate(ranking._PUNCTUATION).split()
+    stopwords = set(ranking.STOPWORDS)
+    return {w for w in words if len(w) >= ranking.MIN_TOKEN_LENGTH and w not in stopwords}
+
+
+def naive_scores(articles, recent_titles, keywords, source_weights, half_life, now):
+    """Same scores as the default ranker, computed one article at a time."""
+    terms = [_naive_tokens(term) for term in keywords]
+    recent = [_naive_tokens(title) for title in recent_titles]
+    weights = ranking.DEFAULT_WEIGHTS
+    scores = []
+    for article in articles:
+        tokens = _naive_tokens(article.title)
+        age = 24.0 if article.published is None else max(now - article.published, 0) / 3600
+        recency = 0.5 ** (age / half_life)
+        hits = sum(1 for term in terms if term and term <= tokens)
+        keyword = 1 - math.exp(-hits)
+        source = math.log(max(source_weights.get(article.source, 1.0), 1e-3))
+        novelty = max((len(tokens & r) / max(math.sqrt(len(tokens) * len(r)), 1.0) for r in recent), default=0.0)
+        scores.append(weights["recency"] * recency + weights["keywords"] * keyword
+                      + weights["source"] * source + weights["novelty"] * novelty)
+    return np.array(scores)
+
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+
+
+def run(candidates=5000, recent=100, repeat=5, seed=1):
+    rng = random.Random(seed)
+    now = time.time()
+    articles = [Article(_title(rng), f"https://example.com/{i}", published=now - rng.uniform(0, 72 * 3600),
+                        source=rng.choice(SOURCES)) for i in range(candidates)]
+    recent_titles = [_title(rng) for _ in range(recent)]
+    source_weights = {url: rng.uniform(0.5, 2.0) for url in SOURCES[:10]}
+    keywords = ranking.config.RANKING_KEYWORDS
+    ranker = ranking.Ranker({
+        "recency": ranking.Recency(12),
+        "keywords": ranking.KeywordMatch(keywords),
+        "source": ranking.SourceWeight(source_weights),
+        "novelty": ranking.Novelty(recent_titles),
+    })
+
+    results = {}
+    for label, func in (("vectorized (NumPy)", lambda: ranker.scores(articles, now)),
+                        ("naive Python loop", lambda: naive_scores(articles, recent_titles, keywords,
+                                                                   source_weights, 12, now))):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scores = func()
+            timings.append(time.perf_counter() - start)
+        results[label] = (min(timings), scores)
+
+    (fast, vectorized), (slow, naive) = results.values()
+    np.testing.assert_allclose(vectorized, naive, rtol=1e-5, atol=1e-6)
+    print(f"candidates={candidates} recent posts={recent} (best of {repeat})")
+    for label, (elapsed, _) in results.items():
+        print(f"{label:>20}: {elapsed * 1000:8.1f} ms")
+    print(f"{'speedup':>20}: {slow / fast:8.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--recent", type=int, default=100)
+    args = parser.parse_args()
+    run(candidates=args.candidates, recent=args.recent)
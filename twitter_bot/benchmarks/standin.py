@@ -0,0 +1,427 @@
+"""
+Local HTTP stand-in used by the benchmarks.
+
+Serves synthetic RSS and Atom feeds from 127.0.0.1 with an injectable
+per-feed latency, so benchmarks can run on a machine with no network access.
+Feeds carry an ETag and answer conditional GETs with 304 Not Modified.
+
+The server also emulates the X v2 endpoints the bot uses (create_tweet,
+get_user, get_users, paginated get_users_tweets with photo media served under
+/media/, and get_tweets with settable public_metrics) over keep-alive
+HTTP/1.1, and counts accepted TCP connections.
+API latency, 5xx errors and 429s with x-rate-limit-* headers can be injected.
+route_api_to() points a Tweepy client's session at it.
+"""
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+from requests.adapters import HTTPAdapter
+
+from twitter_bot.rate_limiter import endpoint_for
+
+X_API_HOST = "https://api.twitter.com"
+_VOCABULARY = ("quantum", "startup", "funding", "model", "benchmark", "privacy", "chip", "regulation", "browser",
+               "dataset", "outage", "robot", "security", "cloud", "open", "source", "agent", "battery", "satellite",
+               "compiler", "search", "vision", "speech", "market", "launch", "research", "patent", "network",
+               "storage", "energy", "hiring", "merger")
+
+
+def _title(prefix, i, distinct):
+    if not distinct:
+        return f"{prefix} {i}"
+    # Words drawn per entry, so titles don't all look like near-duplicates of each other
+    rng = random.Random(f"{prefix}/{i}")
+    return f"{prefix} {i}: " + " ".join(rng.sample(_VOCABULARY, 6))
+
+
+def make_rss(num_entries, title_prefix="Synthetic article", base_link="https://example.com/articles", start=0,
+             distinct=False):
+    """
+    Builds an RSS 2.0 document with a number of synthetic entries.
+
+    Args:
+        num_entries (int): Number of <item> elements to generate.
+        title_prefix (str): Prefix for each item title.
+        base_link (str): Base URL for each item link.
+        start (int): Number of the first item, to publish new items in later versions.
+        distinct (bool): Add random words to each title, so items aren't near-duplicates.
+
+    Returns:
+        bytes: The UTF-8 encoded RSS document.
+    """
+    items = []
+    for i in range(start, start + num_entries):
+        items.append(
+            "<item>"
+            f"<title>{escape(_title(title_prefix, i, distinct))}</title>"
+            f"<link>{escape(base_link)}/{i}</link>"
+            f"<guid>{escape(base_link)}/{i}</guid>"
+            f"<pubDate>{formatdate(1736121600 + 3600 * i, usegmt=True)}</pubDate>"
+            f"<description>Summary of {escape(title_prefix)} {i}.</description>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f"<title>{escape(title_prefix)}</title><link>{escape(base_link)}</link>"
+        "<description>Synthetic feed</description>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_atom(num_entries, title_prefix="Synthetic article", base_link="https://example.com/articles", start=0,
+              distinct=False):
+    """
+    Builds an Atom 1.0 document with a number of synthetic entries.
+
+    Args:
+        num_entries (int): Number of <entry> elements to generate.
+        title_prefix (str): Prefix for each entry title.
+        base_link (str): Base URL for each entry link.
+        start (int): Number of the first entry, to publish new entries in later versions.
+        distinct (bool): Add random words to each title, so entries aren't near-duplicates.
+
+    Returns:
+        bytes: The UTF-8 encoded Atom document.
+    """
+    entries = []
+    for i in range(start, start + num_entries):
+        entries.append(
+            "<entry>"
+            f"<title>{escape(_title(title_prefix, i, distinct))}</title>"
+            f'<link href="{escape(base_link)}/{i}"/>'
+            f"<id>{escape(base_link)}/{i}</id>"
+            f"<updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1736121600 + 3600 * i))}</updated>"
+            f"<summary>Summary of {escape(title_prefix)} {i}.</summary>"
+            "</entry>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{escape(title_prefix)}</title><id>{escape(base_link)}</id>"
+        "<updated>2025-01-06T00:00:00Z</updated>"
+        + "".join(entries)
+        + "</feed>"
+    ).encode("utf-8")
+
+
+def _user_id(username):
+    return str(zlib.crc32(username.lower().encode("utf-8")) + 1)
+
+
+def _user_payload(username):
+    return {
+        "id": _user_id(username), "username": username, "name": username.title(),
+        "created_at": "2020-01-01T00:00:00.000Z", "description": f"Stand-in account {username}",
+        "verified": False, "profile_image_url": None, "location": None, "url": None,
+        "public_metrics": {"followers_count": 100, "following_count": 10, "tweet_count": 1000, "listed_count": 1},
+    }
+
+
+class _CountingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_count = 0
+
+    def process_request(self, request, client_address):
+        self.connection_count += 1  # Only the serve_forever thread accepts connections
+        super().process_request(request, client_address)
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Transport adapter that sends X API requests to a local base URL instead."""
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = request.url.replace(X_API_HOST, self.base_url, 1)
+        return super().send(request, **kwargs)
+
+
+def route_api_to(session, base_url, pool_maxsize=10):
+    """Mounts an adapter on a requests session so X API calls go to base_url."""
+    session.mount(X_API_HOST, _RedirectAdapter(base_url, pool_connections=1, pool_maxsize=pool_maxsize))
+
+
+class StandInServer:
+    """
+    Threaded HTTP server serving registered feeds and the X v2 endpoints with fake latency.
+
+    API behaviour is configured with attributes and methods:
+        api_latency     Seconds added to every X API request.
+        error_rate      Fraction of X API requests answered with 503.
+        inject()        Queue specific error statuses for an endpoint.
+        set_rate_limit() Enforce a per-endpoint request window, answering 429 when exhausted.
+
+    Usage:
+        with StandInServer() as server:
+            url = server.add_feed("/a.xml", make_rss(10), latency=0.2)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, api_latency=0.0, error_rate=0.0,
+                 timeline_length=200, seed=0):
+        self.feeds = {}  # path -> (body, latency seconds)
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.tweets = []  # Texts received on POST /2/tweets
+        self.tweet_metrics = {}  # Tweet ID -> public_metrics returned by GET /2/tweets; set them to simulate engagement
+        self.api_latency = api_latency
+        self.error_rate = error_rate
+        self.timeline_length = timeline_length  # Tweets in each user's synthetic timeline
+        self.missing_users = set()  # Lowercased usernames that don't exist
+        self.api_counts = {}  # endpoint -> requests received
+        self.status_counts = {}  # HTTP status -> X API responses sent
+        self._faults = {}  # endpoint -> statuses to answer the next requests with
+        self._rate_limits = {}  # endpoint -> [limit, window seconds, remaining, reset_at]
+        self._random = random.Random(seed)
+        self._tweet_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._httpd = _CountingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    def inject(self, endpoint, status, times=1):
+        """Answers the next `times` requests to endpoint with an error status (e.g. 429 or 503)."""
+        with self._lock:
+            self._faults.setdefault(endpoint, []).extend([status] * times)
+
+    def set_rate_limit(self, endpoint, limit, window=900.0):
+        """Allows `limit` requests to endpoint per window seconds; further requests get 429."""
+        with self._lock:
+            self._rate_limits[endpoint] = [limit, window, limit, time.time() + window]
+
+    def _admit(self, endpoint):
+        """Counts an API request and decides its fate: (error status or None, rate-limit headers)."""
+        with self._lock:
+            self.api_counts[endpoint] = self.api_counts.get(endpoint, 0) + 1
+            headers = {}
+            limited = False
+            window = self._rate_limits.get(endpoint)
+            if window is not None:
+                now = time.time()
+                if now >= window[3]:
+                    window[2], window[3] = window[0], now + window[1]
+                limited = window[2] <= 0
+                window[2] = max(window[2] - 1, 0)
+                headers = {"x-rate-limit-limit": str(window[0]), "x-rate-limit-remaining": str(window[2]),
+                           "x-rate-limit-reset": str(int(window[3]) + 1)}
+            faults = self._faults.get(endpoint)
+            if faults:
+                return faults.pop(0), headers
+            if limited:
+                return 429, headers
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 503, headers
+            return None, headers
+
+    def _timeline(self, user_id, query):
+        """One page of a user's synthetic timeline, newest first; every third tweet has a photo."""
+        max_results = min(int(query.get("max_results", ["10"])[0]), 100)
+        start = int(query.get("pagination_token", ["0"])[0])
+        end = min(start + max_results, self.timeline_length)
+        tweets, media = [], []
+        for n in range(start, end):
+            tweet_id = f"{user_id}{self.timeline_length - n:06d}"
+            tweet = {
+                "id": tweet_id, "text": f"Stand-in tweet {n} of {user_id}", "edit_history_tweet_ids": [tweet_id],
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(1736121600 - 3600 * n)),
+                "public_metrics": {"like_count": n % 50, "retweet_count": n % 7, "reply_count": n % 3,
+                                   "quote_count": 0, "impression_count": 100 + n},
+            }
+            if n % 3 == 0:
+                media_key = f"3_{tweet_id}"
+                tweet["attachments"] = {"media_keys": [media_key]}
+                media.append({"media_key": media_key, "type": "photo", "url": f"{self.base_url}/media/{media_key}.jpg"})
+            tweets.append(tweet)
+        payload = {"data": tweets, "meta": {"result_count": len(tweets)}}
+        if media:
+            payload["includes"] = {"media": media}
+        if end < self.timeline_length:
+            payload["meta"]["next_token"] = str(end)
+        return payload
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+            disable_nagle_algorithm = True  # Avoid 40ms delayed-ACK stalls on reused connections
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _api(self, endpoint, respond):
+                status, headers = server._admit(endpoint)
+                if server.api_latency:
+                    time.sleep(server.api_latency)
+                if status is None:
+                    status, payload = respond()
+                else:
+                    payload = {"title": "Too Many Requests" if status == 429 else "Service Unavailable",
+                               "detail": "Injected by the stand-in server", "status": status}
+                with server._lock:
+                    server.status_counts[status] = server.status_counts.get(status, 0) + 1
+                self._send_json(status, payload, headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.request_count += 1
+                if endpoint_for("POST", self.path) != "create_tweet":
+                    self._send_json(404, {"title": "Not Found"})
+                    return
+
+                def create_tweet():
+                    with server._lock:
+                        tweet_id = str(next(server._tweet_ids))
+                        server.tweets.append(payload.get("text"))
+                        server.tweet_metrics[tweet_id] = {"retweet_count": 0, "reply_count": 0, "like_count": 0,
+                                                          "quote_count": 0, "impression_count": 0}
+                    return 201, {"data": {"id": tweet_id, "text": payload.get("text"),
+                                          "edit_history_tweet_ids": [tweet_id]}}
+                self._api("create_tweet", create_tweet)
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                url = urlsplit(self.path)
+                endpoint = endpoint_for("GET", url.path)
+                if self.path in server.feeds:
+                    self._send_feed()
+                elif endpoint is not None:
+                    self._get_api(endpoint, url.path, parse_qs(url.query))
+                elif url.path.startswith("/media/3_"):
+                    self._send_media(url.path)  # Photos referenced by synthetic timelines
+                else:
+                    self.send_error(404)
+
+            def _get_api(self, endpoint, path, query):
+                def get_user():
+                    username = path.rsplit("/", 1)[1]
+                    if username.lower() in server.missing_users:
+                        return 200, {"errors": [{"value": username, "detail": f"Could not find user: {username}",
+                                                 "title": "Not Found Error"}]}
+                    return 200, {"data": _user_payload(username)}
+
+                def get_users():
+                    names = query.get("usernames", [""])[0].split(",")
+                    found = [_user_payload(n) for n in names if n and n.lower() not in server.missing_users]
+                    payload = {"data": found} if found else {}
+                    missing = [n for n in names if n.lower() in server.missing_users]
+                    if missing:
+                        payload["errors"] = [{"value": n, "detail": f"Could not find user: {n}"} for n in missing]
+                    return 200, payload
+
+                def get_users_tweets():
+                    return 200, server._timeline(path.split("/")[3], query)
+
+                def get_tweets():
+                    ids = query.get("ids", [""])[0].split(",")
+                    if len(ids) > 100:
+                        return 400, {"title": "Invalid Request", "detail": "At most 100 ids", "status": 400}
+                    with server._lock:
+                        found = [{"id": i, "text": f"Stand-in tweet {i}", "edit_history_tweet_ids": [i],
+                                  "public_metrics": dict(server.tweet_metrics[i])}
+                                 for i in ids if i in server.tweet_metrics]
+                    payload = {"data": found} if found else {}
+                    missing = [i for i in ids if i not in server.tweet_metrics]
+                    if missing:
+                        payload["errors"] = [{"value": i, "detail": f"Could not find tweet with ids: [{i}].",
+                                              "title": "Not Found Error", "resource_type": "tweet",
+                                              "parameter": "ids", "resource_id": i,
+                                              "type": "https://api.twitter.com/2/problems/resource-not-found"}
+                                             for i in missing]
+                    return 200, payload
+
+                self._api(endpoint, {"get_user": get_user, "get_users": get_users,
+                                     "get_users_tweets": get_users_tweets, "get_tweets": get_tweets}[endpoint])
+
+            def _send_media(self, path):
+                body = hashlib.sha256(path.encode("utf-8")).digest() * 64  # 2 KB of stable bytes per image
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_feed(self):
+                feed = server.feeds.get(self.path)
+                if feed is None:
+                    self.send_error(404)
+                    return
+                body, latency = feed
+                if latency:
+                    time.sleep(latency)
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                content_type = "application/atom+xml" if b"<feed" in body[:200] else "application/rss+xml"
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    @property
+    def connection_count(self):
+        """Number of TCP connections accepted so far."""
+        return self._httpd.connection_count
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_feed(self, path, body, latency=0.0):
+        """Registers a feed document at path and returns its full URL."""
+        self.feeds[path] = (body, latency)
+        return self.base_url + path
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,173 @@
+import re
+import string
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+MAX_TWEET_LENGTH = 280
+URL_LENGTH = 23  # Every URL is wrapped by t.co and counts as this many characters, whatever its real length
+ELLIPSIS = "\u2026"
+
+# Code points that count once; everything else (CJK, most symbols) counts twice,
+# as in X's twitter-text v3 configuration.
+_LIGHT_RE = re.compile(r"[\u0000-\u10ff\u2000-\u200d\u2010-\u201f\u2032-\u2037]+")
+_URL = r"https?://[^\s<>\"]+"
+_EMOJI_CHAR = r"[\u2300-\u23ff\u2600-\u27bf\u2b00-\u2bff\U0001F000-\U0001FAFF]"
+_EMOJI_MOD = r"[\ufe0f\U0001F3FB-\U0001F3FF\U000E0020-\U000E007F]"
+# A whole emoji sequence (flags, keycaps, skin tones, ZWJ families) counts as 2
+_EMOJI = (rf"[\U0001F1E6-\U0001F1FF]{{2}}|[0-9#*]\ufe0f?\u20e3"
+          rf"|{_EMOJI_CHAR}{_EMOJI_MOD}*(?:\u200d{_EMOJI_CHAR}{_EMOJI_MOD}*)*")
+_COMBINING = (r"[\u0300-\u036f\u0483-\u0489\u0591-\u05bd\u0610-\u061a\u064b-\u065f\u0900-\u0903\u093a-\u094f"
+              r"\u0e31\u0e34-\u0e3a\u0e47-\u0e4e\u1ab0-\u1aff\u1dc0-\u1dff\u200c\u20d0-\u20ff\ufe00-\ufe0f"
+              r"\ufe20-\ufe2f\U000E0100-\U000E01EF]")
+_TOKEN_RE = re.compile(rf"(?P<url>{_URL})|(?P<emoji>{_EMOJI})")
+# User-perceived characters: URLs and emoji sequences are kept whole, marks stay with their base
+_GRAPHEME_RE = re.compile(rf"(?P<url>{_URL})|(?P<emoji>{_EMOJI})|\r\n|.{_COMBINING}*", re.DOTALL)
+
+class InvalidTweetText(ValueError):
+    """Raised for tweet text X would reject: empty, or longer than MAX_TWEET_LENGTH."""
+
+def _plain_length(text: str) -> int:
+    light = sum(map(len, _LIGHT_RE.findall(text)))
+    return light + 2 * (len(text) - light)
+
+def weighted_length(text: str) -> int:
+    """
+    Returns the length X counts for a tweet.
+
+    Text is NFC-normalized first. CJK and other wide characters count as 2,
+    an emoji sequence as 2, and every http(s) URL as 23 (its t.co length).
+
+    Args:
+        text (str): The tweet text.
+
+    Returns:
+        int: The weighted length; a tweet may be up to MAX_TWEET_LENGTH.
+    """
+    text = unicodedata.normalize("NFC", text)
+    length = 0
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        length += _plain_length(text[position:match.start()])
+        length += URL_LENGTH if match.lastgroup == "url" else 2
+        position = match.end()
+    return length + _plain_length(text[position:])
+
+def validate(text: str):
+    """
+    Checks that text can be posted as a tweet.
+
+    Raises:
+        InvalidTweetText: If the text is empty or too long.
+    """
+    if not text:
+        raise InvalidTweetText("Tweet text cannot be empty.")
+    length = weighted_length(text)
+    if length > MAX_TWEET_LENGTH:
+        raise InvalidTweetText(f"Tweet text is too long ({length} weighted characters). "
+                               f"Maximum is {MAX_TWEET_LENGTH}.")
+
+def truncate(text: str, max_length: int, ellipsis: str = ELLIPSIS) -> str:
+    """
+    Shortens text to at most max_length weighted characters.
+
+    Cuts only between graphemes, so accents, emoji sequences and URLs are
+    never split, and appends ellipsis when something was cut.
+
+    Args:
+        text (str): The text to shorten.
+        max_length (int): Weighted length budget, ellipsis included.
+        ellipsis (str): Marker appended to shortened text.
+
+    Returns:
+        str: The NFC-normalized text, shortened if needed.
+    """
+    text = unicodedata.normalize("NFC", text)
+    if weighted_length(text) <= max_length:
+        return text
+    budget = max_length - weighted_length(ellipsis)
+    used = 0
+    end = 0
+    for match in _GRAPHEME_RE.finditer(text):
+        if match.lastgroup == "url":
+            weight = URL_LENGTH
+        elif match.lastgroup == "emoji":
+            weight = 2
+        else:
+            weight = _plain_length(match.group())
+        if used + weight > budget:
+            break
+        used += weight
+        end = match.end()
+    if budget < 0:
+        return ""
+    return text[:end].rstrip() + ellipsis
+
+class Template:
+    """
+    A compiled tweet template such as "News: {title} {link}".
+
+    The literal text is measured once at compile time. Rendering measures the
+    field values, and the truncate field (normally the title) gets whatever
+    budget is left. Only plain {name} fields are supported.
+    """
+
+    def __init__(self, source: str, truncate_field: str = "title"):
+        self.source = source
+        self.truncate_field = truncate_field
+        parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"Template fields take no format spec or conversion: {source!r}")
+            if literal:
+                parts.append((literal, None))
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"Invalid template field {field!r} in {source!r}")
+                parts.append((None, field))
+        self._parts: Tuple[Tuple[Optional[str], Optional[str]], ...] = tuple(parts)
+        self.fields = tuple(dict.fromkeys(field for _, field in parts if field))
+        self.literal_length = weighted_length("".join(literal for literal, _ in parts if literal))
+
+    def render(self, values: Dict[str, str], max_length: int = MAX_TWEET_LENGTH) -> str:
+        """
+        Fills in the template, truncating the truncate field to fit max_length.
+
+        Raises:
+            ValueError: If the text doesn't fit even with the truncate field empty.
+        """
+        values = {field: unicodedata.normalize("NFC", str(values[field] or "")) for field in self.fields}
+        fixed = self.literal_length + sum(
+            weighted_length(value) for field, value in values.items() if field != self.truncate_field
+        )
+        if self.truncate_field in values:
+            values[self.truncate_field] = truncate(values[self.truncate_field], max_length - fixed)
+        text = "".join(literal if field is None else values[field] for literal, field in self._parts)
+        if weighted_length(text) > max_length:
+            raise ValueError(f"Tweet does not fit in {max_length} characters with template {self.source!r}.")
+        return text
+
+@lru_cache(maxsize=128)
+def compile_template(source: str, truncate_field: str = "title") -> Template:
+    """Returns the compiled Template for source, cached so batches don't recompile it."""
+    return Template(source, truncate_field)
+
+def compose(article, template: Optional[str] = None, max_length: int = MAX_TWEET_LENGTH) -> str:
+    """
+    Builds the tweet text for an article from a template.
+
+    Args:
+        article (Article): The article; template fields are read from its attributes.
+        template (str, optional): Template text. Defaults to config.TWEET_TEMPLATE.
+        max_length (int, optional): Weighted length limit.
+
+    Returns:
+        str: The tweet text, with the title truncated if needed.
+    """
+    compiled = compile_template(template or config.TWEET_TEMPLATE)
+    return compiled.render({field: getattr(article, field, None) for field in compiled.fields}, max_length)
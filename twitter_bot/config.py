@@ -10,6 +10,110 @@ X_API_SECRET_KEY = os.getenv("X_API_SECRET_KEY")
 X_ACCESS_TOKEN = os.getenv("X_ACCESS_TOKEN")
 X_ACCESS_TOKEN_SECRET = os.getenv("X_ACCESS_TOKEN_SECRET")
 
+def reload_credentials():
+    """Re-reads the X/Twitter API keys from the .env file and environment, e.g. after rotation."""
+    global X_API_KEY, X_API_SECRET_KEY, X_ACCESS_TOKEN, X_ACCESS_TOKEN_SECRET
+    load_dotenv(override=True)
+    X_API_KEY = os.getenv("X_API_KEY")
+    X_API_SECRET_KEY = os.getenv("X_API_SECRET_KEY")
+    X_ACCESS_TOKEN = os.getenv("X_ACCESS_TOKEN")
+    X_ACCESS_TOKEN_SECRET = os.getenv("X_ACCESS_TOKEN_SECRET")
+
 # Other potential configurations
 BOT_LOG_LEVEL = os.getenv("BOT_LOG_LEVEL", "INFO")
+BOT_LOG_FORMAT = os.getenv("BOT_LOG_FORMAT", "text")  # "text", or "json" for one JSON object per line
+
+# Local storage for caches and bot state
+BOT_DATA_DIR = os.getenv("BOT_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+FEED_CACHE_PATH = os.getenv("FEED_CACHE_PATH", os.path.join(BOT_DATA_DIR, "feed_cache.sqlite3"))
+POSTED_INDEX_PATH = os.getenv("POSTED_INDEX_PATH", os.path.join(BOT_DATA_DIR, "posted.sqlite3"))
+POSTED_TTL_DAYS = float(os.getenv("POSTED_TTL_DAYS", "365")) # Forget posted articles after this long
+TWEET_QUEUE_PATH = os.getenv("TWEET_QUEUE_PATH", os.path.join(BOT_DATA_DIR, "tweet_queue.sqlite3"))
+FEED_STATE_PATH = os.getenv("FEED_STATE_PATH", os.path.join(BOT_DATA_DIR, "feed_state.sqlite3"))
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(BOT_DATA_DIR, "media"))
+ENGAGEMENT_PATH = os.getenv("ENGAGEMENT_PATH", os.path.join(BOT_DATA_DIR, "engagement.sqlite3"))
+ACCOUNTS_DIR = os.getenv("ACCOUNTS_DIR", os.path.join(BOT_DATA_DIR, "accounts"))  # Per-account queues and posted indexes
+
+# Outbound tweet queue
+TWEET_QUEUE_MAX_ATTEMPTS = int(os.getenv("TWEET_QUEUE_MAX_ATTEMPTS", "5"))
+TWEET_QUEUE_RETRY_SECONDS = float(os.getenv("TWEET_QUEUE_RETRY_SECONDS", "60"))    # First retry delay, doubled per attempt
+# Claimed tweets are re-delivered after this; must exceed X_API_MAX_WAIT_SECONDS + X_API_TIMEOUT_SECONDS
+TWEET_QUEUE_LEASE_SECONDS = float(os.getenv("TWEET_QUEUE_LEASE_SECONDS", "1200"))
+
+# Size of the keep-alive connection pool of the shared X API client
+X_CONNECTION_POOL_SIZE = int(os.getenv("X_CONNECTION_POOL_SIZE", "10"))
+
+# Multi-account posting (accounts.py): comma-separated account names, each configured by X_<NAME>_* variables.
+# Empty posts from the single account above.
+X_ACCOUNTS = [a.strip() for a in os.getenv("X_ACCOUNTS", "").split(",") if a.strip()]
+X_ACCOUNT_WORKERS = int(os.getenv("X_ACCOUNT_WORKERS", "8"))  # Accounts posting concurrently
+
+# asyncio client (async_twitter_client.py): requests in flight, and per-request timeout
+X_ASYNC_MAX_CONCURRENCY = int(os.getenv("X_ASYNC_MAX_CONCURRENCY", "100"))
+X_API_TIMEOUT_SECONDS = float(os.getenv("X_API_TIMEOUT_SECONDS", "30"))
+
+# Rate limiting of X API calls
+X_API_MAX_RETRIES = int(os.getenv("X_API_MAX_RETRIES", "3"))                # Retries after a 429 or 5xx
+X_API_MAX_WAIT_SECONDS = float(os.getenv("X_API_MAX_WAIT_SECONDS", "900"))  # Longest wait for a window to reset
+
+# Cache for user profile and timeline lookups
+USER_PROFILE_TTL_SECONDS = float(os.getenv("USER_PROFILE_TTL_SECONDS", "3600"))
+USER_TWEETS_TTL_SECONDS = float(os.getenv("USER_TWEETS_TTL_SECONDS", "300"))
+USER_CACHE_STALE_SECONDS = float(os.getenv("USER_CACHE_STALE_SECONDS", "600"))  # Serve stale entries while refreshing
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+USER_CACHE_PATH = os.getenv("USER_CACHE_PATH") # Set to a file path to keep the cache across restarts
+
+# Scheduler: "lanes" runs ingest/compose/post/analytics as separate non-blocking jobs,
+# "single" runs the original one-job BlockingScheduler
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "lanes")
+# Comma-separated handles polled by the analytics lane
+ANALYTICS_USERNAMES = [u.strip() for u in os.getenv("ANALYTICS_USERNAMES", "").split(",") if u.strip()]
+
+# Adaptive feed polling: each feed's interval follows its publish rate within these bounds
+FEED_MIN_POLL_MINUTES = float(os.getenv("FEED_MIN_POLL_MINUTES", "15"))
+FEED_MAX_POLL_HOURS = float(os.getenv("FEED_MAX_POLL_HOURS", "24"))
+FEED_DEFAULT_POLL_HOURS = float(os.getenv("FEED_DEFAULT_POLL_HOURS", "4"))  # Before a feed's rate is known
+# Feed parsing: "lean" streams RSS/Atom with expat and falls back to feedparser; "feedparser" always uses it
+FEED_PARSER = os.getenv("FEED_PARSER", "lean")
+
+# Article ranking: topic vocabulary, per-feed weights ("url=weight,url=weight") and recency decay
+RANKING_KEYWORDS = [k.strip() for k in os.getenv(
+    "RANKING_KEYWORDS",
+    "ai,artificial intelligence,machine learning,deep learning,data science,llm,neural network,big data,analytics"
+).split(",") if k.strip()]
+RANKING_SOURCE_WEIGHTS = {
+    url.strip(): float(weight)
+    for url, _, weight in (item.rpartition("=") for item in os.getenv("RANKING_SOURCE_WEIGHTS", "").split(","))
+    if url.strip()
+}
+RANKING_HALF_LIFE_HOURS = float(os.getenv("RANKING_HALF_LIFE_HOURS", "12"))
+RANKING_NOVELTY_WINDOW = int(os.getenv("RANKING_NOVELTY_WINDOW", "100"))  # Recent posts compared for novelty
+
+# Near-duplicate story detection across feeds (MinHash/LSH over titles and summaries)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.5"))  # Estimated Jaccard similarity of shingle sets
+NEAR_DUP_WINDOW = int(os.getenv("NEAR_DUP_WINDOW", "5000"))         # Most recent articles kept in the index
+
+# Engagement of our own tweets (engagement.py), polled by the analytics lane
+ENGAGEMENT_TRACK_DAYS = float(os.getenv("ENGAGEMENT_TRACK_DAYS", "7"))          # Tweets are polled for this long after posting
+ENGAGEMENT_POLL_MINUTES = float(os.getenv("ENGAGEMENT_POLL_MINUTES", "60"))     # Shortest interval between polls of a tweet
+ENGAGEMENT_DOWNSAMPLE_HOURS = float(os.getenv("ENGAGEMENT_DOWNSAMPLE_HOURS", "48"))  # Older samples are merged per hour
+ENGAGEMENT_RETENTION_DAYS = float(os.getenv("ENGAGEMENT_RETENTION_DAYS", "180"))
+# Feed weights learned from engagement over this many days multiply RANKING_SOURCE_WEIGHTS; 0 to disable
+ENGAGEMENT_RANKING_DAYS = float(os.getenv("ENGAGEMENT_RANKING_DAYS", "30"))
+ENGAGEMENT_MAX_WEIGHT = float(os.getenv("ENGAGEMENT_MAX_WEIGHT", "2"))          # Learned weights stay within [1/max, max]
+
+# Tweet text template; the {title} field is truncated to fit the weighted 280-character limit
+TWEET_TEMPLATE = os.getenv("TWEET_TEMPLATE", "News: {title} {link}")
+
+# Image prefetch cache for user timelines (media_cache.py)
+MEDIA_CACHE_MAX_MB = float(os.getenv("MEDIA_CACHE_MAX_MB", "512"))          # Least recently used images are evicted past this
+MEDIA_MAX_IMAGE_MB = float(os.getenv("MEDIA_MAX_IMAGE_MB", "20"))           # Larger downloads are abandoned
+MEDIA_MAX_PER_HOST = int(os.getenv("MEDIA_MAX_PER_HOST", "4"))              # Concurrent downloads per image host
+MEDIA_PREFETCH_WORKERS = int(os.getenv("MEDIA_PREFETCH_WORKERS", "16"))
+MEDIA_TIMEOUT_SECONDS = float(os.getenv("MEDIA_TIMEOUT_SECONDS", "30"))
+
+# Metrics (metrics.py): port of the local /metrics endpoint and/or a Prometheus text file, 0/empty to disable
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+
 # Add more configurations as needed
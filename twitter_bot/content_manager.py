@@ -1,4 +1,32 @@
-import feedparser
+import html
+import logging
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import OrderedDict
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, TimeoutError as FuturesTimeoutError
+
+try:
+    from . import config
+    from . import feed_parser
+    from . import metrics
+    from .article import Article
+    from .lazy import LazyModule
+except ImportError:
+    import config
+    import feed_parser
+    import metrics
+    from article import Article
+    from lazy import LazyModule
+
+asyncio = LazyModule("asyncio")
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
 
 # Placeholder RSS feeds - these should be related to data, AI, etc.
 # The user should replace these with relevant sources.
@@ -9,59 +37,568 @@ DEFAULT_RSS_FEEDS = [
     # Add more relevant feeds here
 ]
 
-def fetch_rss_feeds(feed_urls=None):
+# Fetch settings for fetch_rss_feeds
+DEFAULT_MAX_WORKERS = 16        # Feeds fetched concurrently
+DEFAULT_FEED_TIMEOUT = 15       # Seconds before a single slow feed is abandoned
+DEFAULT_FETCH_DEADLINE = 120    # Seconds for the whole cycle (None = no limit)
+USER_AGENT = "gwaihir-twitter-bot/1.0 (+feed fetcher)"
+SUMMARY_MAX_CHARS = 500         # Longer feed summaries are cut, keeping retained articles small
+
+# Near-duplicate detection settings for NearDuplicateIndex
+DEFAULT_NUM_PERM = 64           # MinHash signature length
+DEFAULT_SHINGLE_WORDS = 2       # Words per shingle
+SUMMARY_SHINGLE_WORDS = 40      # Leading summary words included in the shingle set
+BUCKET_SIZE = 16                # Most recent articles kept per LSH bucket, bounding the work per lookup
+_MERSENNE_PRIME = (1 << 31) - 1
+_TAG_RE = re.compile(r"<[^>]+>")
+_SCRIPT_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_WORD_RE = re.compile(r"\w+")
+
+def _request_headers(etag=None, modified=None):
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    return headers
+
+def _download_feed(url, timeout, etag=None, modified=None):
+    """
+    Downloads the raw feed document for a URL, using a conditional GET when
+    validators from a previous response are given.
+
+    Args:
+        url (str): The feed URL.
+        timeout (float): Socket timeout in seconds for this feed.
+        etag (str, optional): ETag from the previous response.
+        modified (str, optional): Last-Modified from the previous response.
+
+    Returns:
+        tuple: The HTTP status, the response body (bytes, None on 304) and a
+               dict of response headers with lowercased names.
+    """
+    request = urllib.request.Request(url, headers=_request_headers(etag, modified))
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            return response.status, body, {k.lower(): v for k, v in response.headers.items()}
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, {k.lower(): v for k, v in e.headers.items()}
+        raise
+
+def _plain_text(summary, max_chars=SUMMARY_MAX_CHARS):
+    """Strips HTML tags and entities from a feed summary and collapses whitespace."""
+    if not summary:
+        return None
+    text = " ".join(html.unescape(_TAG_RE.sub(" ", _SCRIPT_RE.sub(" ", summary))).split())
+    return text[:max_chars] or None
+
+def _read_feed(url, timeout, cache=None, state=None):
+    """
+    Downloads and parses a single feed.
+
+    Args:
+        url (str): The feed URL.
+        timeout (float): Socket timeout in seconds for this feed.
+        cache (FeedCache, optional): Validator cache. When given, the feed is
+                                     polled with a conditional GET and a 304
+                                     reuses the cached articles unparsed.
+        state (FeedStateStore, optional): Holds the feed's high-water mark.
+                                          When given, only entries newer than
+                                          the mark or still pending are turned
+                                          into articles, and a 304 yields only
+                                          the pending ones. The poll's outcome
+                                          is staged; the reader commits it.
+
+    Returns:
+        tuple: (articles, entry_times) - the Article records found in the
+               feed, and the publication times of all its entries.
+    """
+    logger.debug("Fetching feed: %s", url)
+    cached = cache.get(url) if cache is not None else None
+    status, body, headers = _download_feed(
+        url, timeout,
+        etag=cached.etag if cached else None,
+        modified=cached.modified if cached else None
+    )
+    return _process_feed(url, status, body, headers, cached, cache, state)
+
+def _process_feed(url, status, body, headers, cached=None, cache=None, state=None):
+    """Turns a downloaded feed into (articles, entry_times); see _read_feed."""
+    if status == 304 and cached is not None:
+        cache.record_hit(url)
+        metrics.inc("feed_fetches_total", feed=url, outcome="not_modified")
+        if state is not None:
+            pending = state.pending(url)
+            logger.debug("Feed not modified: %s, %d pending entries.", url, len(pending))
+            state.stage(url, *state.high_water_mark(url), [])
+            return list(pending.values()), []
+        logger.debug("Feed not modified: %s, reusing %d cached articles.", url, len(cached.articles))
+        return cached.articles, [article.published for article in cached.articles]
+    if cache is not None:
+        cache.record_miss(url)
+
+    metrics.inc("feed_fetches_total", feed=url, outcome="ok")
+    with metrics.timer("feed_parse_seconds", feed=url):
+        # The lean parser handles well-formed RSS/Atom; anything else goes to feedparser
+        feed = feed_parser.parse(body, headers)
+
+    # Check for errors in parsing
+    if feed.error is not None:
+        # Set if the feed is not well-formed XML (feedparser's bozo bit)
+        logger.warning("Feed at %s might be ill-formed. Error: %s", url, feed.error)
+        # For now, we'll try to process entries even if it is ill-formed
+
+    if not feed.entries:
+        logger.info("No entries found in feed: %s", url)
+
+    mark, seen_ids = state.high_water_mark(url) if state is not None else (None, frozenset())
+    pending = state.pending(url) if state is not None else frozenset()
+    newest = mark
+    entry_ids = []
+    entry_times = []
+    articles = []
+    skipped = 0
+    for entry in feed.entries:
+        link = entry.link
+        published = entry.published
+        entry_id = entry.id or link
+        entry_times.append(published)
+        if entry_id:
+            entry_ids.append(entry_id)
+        if published is not None and (newest is None or published > newest):
+            newest = published
+        # Entries at or below the high-water mark were handled on an earlier poll
+        if (entry_id in seen_ids or (published is not None and mark is not None and published < mark)) \
+                and not (link and link.strip() in pending):
+            continue
+        title = entry.title
+        if title and link:
+            articles.append(Article(title, link, published=published, source=url,
+                                    summary=_plain_text(entry.summary)))
+        else:
+            skipped += 1
+
+    logger.info("Found %d entries in %s, successfully processed %d %sarticles from this feed%s",
+                len(feed.entries), url, len(articles), "new " if state is not None else "",
+                f" (skipped {skipped} missing a title or link)." if skipped else ".",
+                extra={"feed": url, "entries": len(feed.entries), "articles": len(articles)})
+    metrics.inc("articles_parsed_total", len(articles))
+
+    if state is not None:
+        state.stage(url, newest, entry_ids, entry_times)
+    if cache is not None and (headers.get("etag") or headers.get("last-modified")):
+        cache.store(url, headers.get("etag"), headers.get("last-modified"), articles, len(body))
+    return articles, entry_times
+
+def _fetch_feed(url, timeout, cache=None, state=None):
+    """
+    Fetches and parses a single feed, recording a failure in state.
+
+    Args:
+        url (str): The feed URL.
+        timeout (float): Socket timeout in seconds for this feed.
+        cache (FeedCache, optional): Validator cache for conditional GETs.
+        state (FeedStateStore, optional): Polling state. Only entries past the
+                                          feed's high-water mark are returned;
+                                          a successful poll is staged, and the
+                                          next one scheduled when the reader
+                                          commits it.
+
+    Returns:
+        list: Article records found in the feed.
+    """
+    try:
+        with metrics.timer("feed_fetch_seconds", feed=url):
+            articles, _ = _read_feed(url, timeout, cache, state)
+    except Exception:
+        metrics.inc("feed_fetches_total", feed=url, outcome="error")
+        if state is not None:
+            state.record_failure(url)
+        raise
+    return articles
+
+async def _download_feed_async(session, url, timeout, etag=None, modified=None):
+    """Like _download_feed, on an aiohttp session."""
+    async def download():
+        async with session.get(url, headers=_request_headers(etag, modified)) as response:
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            if response.status == 304:
+                return 304, None, headers
+            response.raise_for_status()
+            return response.status, await response.read(), headers
+    return await asyncio.wait_for(download(), timeout)
+
+async def _fetch_feed_async(session, url, timeout, cache=None, state=None):
+    """Like _fetch_feed, downloading on an aiohttp session. Parsing runs on the event loop."""
+    logger.debug("Fetching feed: %s", url)
+    start = time.perf_counter()
+    try:
+        cached = cache.get(url) if cache is not None else None
+        status, body, headers = await _download_feed_async(
+            session, url, timeout,
+            etag=cached.etag if cached else None,
+            modified=cached.modified if cached else None
+        )
+        articles, _ = _process_feed(url, status, body, headers, cached, cache, state)
+    except Exception:
+        metrics.inc("feed_fetches_total", feed=url, outcome="error")
+        if state is not None:
+            state.record_failure(url)
+        raise
+    finally:
+        metrics.observe("feed_fetch_seconds", time.perf_counter() - start, feed=url)
+    return articles
+
+def _due_feeds(feed_urls, state):
+    """Drops the feeds that state says are not due for a poll yet."""
+    if state is None:
+        return list(feed_urls)
+    due = state.due_feeds(feed_urls)
+    if len(due) < len(feed_urls):
+        logger.info("Skipping %d feeds not due for polling yet.", len(feed_urls) - len(due))
+    return due
+
+def _lsh_bands(num_perm, threshold):
+    """Picks the (bands, rows) split of a signature whose LSH threshold is closest to threshold."""
+    splits = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(splits, key=lambda split: abs((1 / split[0]) ** (1 / split[1]) - threshold))
+
+class NearDuplicateIndex:
+    """
+    Rolling MinHash/LSH index that clusters near-duplicate stories.
+
+    Each article's title and the start of its summary are shingled into word
+    n-grams and reduced to a MinHash signature, whose agreement between two
+    articles estimates the Jaccard similarity of their shingle sets. The
+    signature is split into bands; articles sharing any band bucket are
+    candidate duplicates, so a lookup only compares against a handful of
+    articles instead of the whole window. Candidates at or above threshold
+    join the earlier article's cluster.
+
+    The index is incremental and keeps at most max_size articles; the oldest
+    are evicted first. Buckets keep only their BUCKET_SIZE newest articles,
+    so a story syndicated many times doesn't make lookups linear. It is safe
+    to share between threads.
+    """
+
+    def __init__(self, threshold=None, max_size=None, num_perm=DEFAULT_NUM_PERM,
+                 shingle_words=DEFAULT_SHINGLE_WORDS, seed=1):
+        self.threshold = config.NEAR_DUP_THRESHOLD if threshold is None else threshold
+        self.max_size = config.NEAR_DUP_WINDOW if max_size is None else max_size
+        self.shingle_words = shingle_words
+        self.bands, self.rows = _lsh_bands(num_perm, self.threshold)
+        self.num_perm = num_perm
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (signature, cluster key)
+        self._buckets = [{} for _ in range(self.bands)]  # per band: band bytes -> keys, oldest first
+
+    @cached_property
+    def _permutations(self):
+        # Drawn on first use, so building the index doesn't import numpy
+        rng = np.random.default_rng(self.seed)
+        a = rng.integers(1, _MERSENNE_PRIME, size=(self.num_perm, 1), dtype=np.uint64)
+        b = rng.integers(0, _MERSENNE_PRIME, size=(self.num_perm, 1), dtype=np.uint64)
+        return a, b
+
+    def _shingles(self, article):
+        shingles = set()
+        texts = [article.title]
+        if article.summary:
+            texts.append(" ".join(article.summary.split()[:SUMMARY_SHINGLE_WORDS]))
+        for text in texts:
+            words = _WORD_RE.findall(text.casefold())
+            n = min(self.shingle_words, len(words))
+            shingles.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1) if n)
+        return shingles
+
+    def signature(self, article):
+        """Returns the article's MinHash signature, or None if it has no words to shingle."""
+        shingles = self._shingles(article)
+        if not shingles:
+            return None
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)[None, :]
+        a, b = self._permutations
+        return ((a * (hashes % _MERSENNE_PRIME) + b) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, article):
+        """
+        Adds an article to the index.
+
+        Args:
+            article (Article): The article; its key identifies it in the index.
+
+        Returns:
+            Optional[str]: The cluster key (the first article seen of the
+                           story) if the article is a near-duplicate of a
+                           different, earlier article, otherwise None.
+        """
+        signature = self.signature(article)
+        if signature is None:
+            return None
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            if article.key in self._entries:
+                # Same URL seen again: exact dedup is the posted index's job
+                self._entries.move_to_end(article.key)
+                return None
+            candidates = set()
+            for bucket, band_key in zip(self._buckets, band_keys):
+                candidates.update(bucket.get(band_key, ()))
+            cluster = None
+            if candidates:
+                keys = list(candidates)
+                others = np.stack([self._entries[key][0] for key in keys])
+                similarity = np.count_nonzero(others == signature, axis=1) / len(signature)
+                best = int(similarity.argmax())
+                if similarity[best] >= self.threshold:
+                    cluster = self._entries[keys[best]][1]
+
+            self._entries[article.key] = (signature, cluster or article.key)
+            for bucket, band_key in zip(self._buckets, band_keys):
+                keys = bucket.setdefault(band_key, OrderedDict())
+                keys[article.key] = None
+                if len(keys) > BUCKET_SIZE:
+                    # A crowded bucket holds copies of one story; the newest few are enough to match it
+                    keys.popitem(last=False)
+            self._evict_overflow()
+        return cluster
+
+    def _evict_overflow(self):
+        while len(self._entries) > self.max_size:
+            key, (signature, _) = self._entries.popitem(last=False)
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                keys = bucket.get(band_key)
+                if keys is not None:
+                    keys.pop(key, None)
+                    if not keys:
+                        del bucket[band_key]
+
+    def filter(self, articles):
+        """Yields only the articles that don't duplicate a story already in the index."""
+        for article in articles:
+            cluster = self.add(article)
+            if cluster is None:
+                yield article
+            else:
+                metrics.inc("dedup_hits_total", kind="near_duplicate")
+                logger.debug("Skipping near-duplicate story: %r (same story as %s).", article.title, cluster)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+def fetch_rss_feeds(feed_urls=None, max_workers=DEFAULT_MAX_WORKERS,
+                    timeout=DEFAULT_FEED_TIMEOUT, deadline=DEFAULT_FETCH_DEADLINE,
+                    cache=None, state=None, dedup=None):
     """
     Fetches and parses articles from a list of RSS feed URLs.
 
+    Feeds are fetched concurrently on a bounded thread pool, so a cycle takes
+    about as long as the slowest feed rather than the sum of all of them.
+    Articles are returned in feed_urls order regardless of completion order.
+
     Args:
         feed_urls (list, optional): A list of RSS feed URLs to fetch.
                                     Defaults to DEFAULT_RSS_FEEDS.
+        max_workers (int, optional): Maximum number of feeds fetched at once.
+                                     Use 1 to fetch sequentially.
+        timeout (float, optional): Socket timeout in seconds for each feed.
+        deadline (float, optional): Overall time budget in seconds for the
+                                    whole cycle. Feeds still pending when it
+                                    expires are skipped. None waits for all.
+        cache (FeedCache, optional): Validator cache for conditional GETs.
+                                     Unchanged feeds (304) are not re-parsed.
+        state (FeedStateStore, optional): Per-feed polling state. When given,
+                                          only feeds that are due are fetched
+                                          and only their new entries returned.
+        dedup (NearDuplicateIndex, optional): Rolling near-duplicate index.
+                                              When given, only the first
+                                              article of each story is kept.
 
     Returns:
-        list: A list of dictionaries, where each dictionary contains
-              'title' and 'link' of an article. Returns empty if error.
+        list: A list of Article records. Returns empty if error.
     """
     if feed_urls is None:
         feed_urls = DEFAULT_RSS_FEEDS
 
     articles = []
     if not feed_urls:
-        print("No RSS feed URLs provided.")
+        logger.warning("No RSS feed URLs provided.")
+        return articles
+    feed_urls = _due_feeds(feed_urls, state)
+    if not feed_urls:
         return articles
 
-    for url in feed_urls:
-        try:
-            print(f"Fetching feed: {url}")
-            feed = feedparser.parse(url)
-
-            # Check for errors in parsing
-            if feed.bozo:
-                # Bozo bit is set if the feed is not well-formed XML
-                # feed.bozo_exception often contains more details
-                print(f"Warning: Feed at {url} might be ill-formed. Error: {feed.bozo_exception}")
-                # Continue to try and extract entries if possible, or skip
-                # For now, we'll try to process entries even if bozo is set
-
-            if not feed.entries:
-                print(f"No entries found in feed: {url}")
-                continue
-
-            for entry in feed.entries:
-                title = entry.get("title")
-                link = entry.get("link")
-                if title and link:
-                    articles.append({"title": title, "link": link})
-                else:
-                    # Log if an entry is missing title or link
-                    print(f"Skipping entry in {url} due to missing title or link: {entry}")
-
-            print(f"Found {len(feed.entries)} entries in {url}, successfully processed {len(articles)} articles from this feed so far.")
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feed_urls))))
+    try:
+        futures = [executor.submit(_fetch_feed, url, timeout, cache, state) for url in feed_urls]
+        _, not_done = wait(futures, timeout=deadline)
+    finally:
+        # Don't block on stragglers past the deadline; their sockets time out on their own.
+        executor.shutdown(wait=False, cancel_futures=True)
 
+    for url, future in zip(feed_urls, futures):
+        if future in not_done:
+            metrics.inc("feed_fetches_total", feed=url, outcome="deadline")
+            logger.warning("Skipping feed %s: fetch deadline of %ss exceeded.", url, deadline)
+            continue
+        try:
+            feed_articles = future.result()
         except Exception as e:
-            print(f"Error fetching or parsing RSS feed {url}: {e}")
-            # Optionally, decide if one failing feed should stop all, or just skip
+            logger.error("Error fetching or parsing RSS feed %s: %s", url, e)
+            # One failing feed is skipped; the others are still returned
             continue
+        articles.extend(dedup.filter(feed_articles) if dedup is not None else feed_articles)
+        if state is not None:
+            state.commit(url)
+
+    return articles
 
+def iter_rss_feeds(feed_urls=None, max_workers=DEFAULT_MAX_WORKERS,
+                   timeout=DEFAULT_FEED_TIMEOUT, deadline=DEFAULT_FETCH_DEADLINE,
+                   cache=None, limit=None, state=None, dedup=None):
+    """
+    Yields articles from a list of RSS feed URLs as each feed finishes.
+
+    Unlike fetch_rss_feeds, nothing is accumulated: the articles of a feed are
+    yielded as soon as that feed has been fetched, in completion order. When
+    the caller stops iterating (or limit is reached) feeds not yet started are
+    cancelled, so callers that only need a few candidates don't pay for the
+    whole corpus. With a state store, a feed's high-water mark only moves
+    past the articles actually yielded, and the rest are offered again on its
+    next poll. Feeds fetched but not read yet stay due, as if never polled. Close the generator (e.g. with contextlib.closing) if the
+    cache passed in is closed right after.
+
+    Args:
+        feed_urls (list, optional): A list of RSS feed URLs to fetch.
+                                    Defaults to DEFAULT_RSS_FEEDS.
+        max_workers (int, optional): Maximum number of feeds fetched at once.
+        timeout (float, optional): Socket timeout in seconds for each feed.
+        deadline (float, optional): Overall time budget in seconds. Feeds not
+                                    finished when it expires are skipped.
+        cache (FeedCache, optional): Validator cache for conditional GETs.
+        limit (int, optional): Stop after yielding this many articles.
+        state (FeedStateStore, optional): Per-feed polling state. When given,
+                                          only feeds that are due are fetched
+                                          and only their new entries returned.
+        dedup (NearDuplicateIndex, optional): Rolling near-duplicate index.
+                                              When given, only the first
+                                              article of each story is kept.
+
+    Yields:
+        Article: The next article.
+    """
+    if feed_urls is None:
+        feed_urls = DEFAULT_RSS_FEEDS
+    if not feed_urls:
+        logger.warning("No RSS feed URLs provided.")
+        return
+    feed_urls = _due_feeds(feed_urls, state)
+    if not feed_urls:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feed_urls))))
+    try:
+        futures = {executor.submit(_fetch_feed, url, timeout, cache, state): url for url in feed_urls}
+        yielded = 0
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                url = futures.pop(future)
+                try:
+                    articles = future.result()
+                except Exception as e:
+                    logger.error("Error fetching or parsing RSS feed %s: %s", url, e)
+                    continue
+                remaining = iter(articles)
+                try:
+                    for article in (dedup.filter(remaining) if dedup is not None else remaining):
+                        yield article
+                        yielded += 1
+                        if limit is not None and yielded >= limit:
+                            return
+                finally:
+                    # The feed's mark moves past what was yielded; the rest stays pending
+                    if state is not None:
+                        state.commit(url, list(remaining))
+        except FuturesTimeoutError:
+            for url in futures.values():
+                metrics.inc("feed_fetches_total", feed=url, outcome="deadline")
+            logger.warning("Skipping %d feeds: fetch deadline of %ss exceeded.", len(futures), deadline)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def fetch_rss_feeds_async(feed_urls=None, session=None, max_concurrency=DEFAULT_MAX_WORKERS,
+                                timeout=DEFAULT_FEED_TIMEOUT, deadline=DEFAULT_FETCH_DEADLINE,
+                                cache=None, state=None, dedup=None):
+    """
+    asyncio version of fetch_rss_feeds.
+
+    Feeds are downloaded on one aiohttp session without a thread per feed,
+    so ingestion can share an event loop (and a connection pool) with
+    AsyncTwitterClient calls.
+
+    Args:
+        feed_urls (list, optional): A list of RSS feed URLs to fetch.
+                                    Defaults to DEFAULT_RSS_FEEDS.
+        session (aiohttp.ClientSession, optional): Session to download on.
+                                                   A temporary one is used
+                                                   if not given.
+        max_concurrency (int, optional): Maximum number of feeds fetched at once.
+        timeout (float, optional): Seconds before a single feed is abandoned.
+        deadline (float, optional): Overall time budget in seconds. Feeds not
+                                    finished when it expires are cancelled.
+        cache, state, dedup: As for fetch_rss_feeds.
+
+    Returns:
+        list: A list of Article records, in feed_urls order.
+    """
+    if feed_urls is None:
+        feed_urls = DEFAULT_RSS_FEEDS
+    if not feed_urls:
+        logger.warning("No RSS feed URLs provided.")
+        return []
+    feed_urls = _due_feeds(feed_urls, state)
+    if not feed_urls:
+        return []
+    if session is None:
+        import aiohttp
+        async with aiohttp.ClientSession() as own_session:
+            return await fetch_rss_feeds_async(feed_urls, own_session, max_concurrency, timeout, deadline,
+                                               cache, state, dedup)
+
+    semaphore = asyncio.BoundedSemaphore(max_concurrency)
+
+    async def fetch(url):
+        async with semaphore:
+            return await _fetch_feed_async(session, url, timeout, cache, state)
+
+    tasks = [asyncio.ensure_future(fetch(url)) for url in feed_urls]
+    try:
+        _, not_done = await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        # Also reached when the caller is cancelled
+        for task in tasks:
+            task.cancel()
+
+    articles = []
+    for url, task in zip(feed_urls, tasks):
+        if task in not_done:
+            metrics.inc("feed_fetches_total", feed=url, outcome="deadline")
+            logger.warning("Skipping feed %s: fetch deadline of %ss exceeded.", url, deadline)
+            continue
+        if task.exception() is not None:
+            logger.error("Error fetching or parsing RSS feed %s: %r", url, task.exception())
+            continue
+        feed_articles = task.result()
+        articles.extend(dedup.filter(feed_articles) if dedup is not None else feed_articles)
+        if state is not None:
+            state.commit(url)
     return articles
 
 if __name__ == '__main__':
@@ -72,7 +609,7 @@ if __name__ == '__main__':
     if fetched_articles:
         print(f"Successfully fetched {len(fetched_articles)} articles:")
         for i, article in enumerate(fetched_articles[:5]): # Print first 5
-            print(f"{i+1}. {article['title']} - {article['link']}")
+            print(f"{i+1}. {article.title} - {article.link}")
     else:
         print("No articles fetched.")
 
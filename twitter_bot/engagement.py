@@ -0,0 +1,328 @@
+"""
+Engagement of the bot's own tweets: an incremental poller and a local time-series store.
+
+Tweets the outbound queue has delivered are tracked for ENGAGEMENT_TRACK_DAYS.
+Each poll looks their public_metrics up with get_tweets, 100 IDs per request,
+and appends only what changed since the previous poll, as one delta row per
+tweet and timestamp. Older rows are merged into hourly buckets, so the history
+stays small while sums over any time range stay exact.
+
+Range queries over the history give each feed an engagement-based weight,
+which ranking.SourceWeight uses when choosing the next article.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    from . import config
+    from . import metrics
+    from . import storage
+except ImportError:
+    import config
+    import metrics
+    import storage
+
+logger = logging.getLogger(__name__)
+
+MAX_IDS_PER_LOOKUP = 100  # Maximum tweet IDs accepted by one get_tweets call
+# public_metrics fields kept, and the store column each maps to
+METRIC_FIELDS = (("like_count", "likes"), ("retweet_count", "retweets"), ("reply_count", "replies"),
+                 ("quote_count", "quotes"), ("impression_count", "impressions"))
+COLUMNS = tuple(column for _, column in METRIC_FIELDS)
+# Interactions counted as engagement for feed weights (impressions are reach, not engagement)
+ENGAGEMENT_COLUMNS = ("likes", "retweets", "replies", "quotes")
+# Tweets whose source has few posts are pulled toward the average as if it had this many more average ones
+PRIOR_TWEETS = 5
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    account TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    article_link TEXT,
+    posted_at REAL NOT NULL,
+    polled_at REAL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS tweets_posted_at ON tweets (posted_at);
+CREATE TABLE IF NOT EXISTS samples (
+    ts INTEGER NOT NULL,
+    tweet_id TEXT NOT NULL,
+    {", ".join(f"{column} INTEGER NOT NULL" for column in COLUMNS)},
+    PRIMARY KEY (ts, tweet_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_tweet ON samples (tweet_id, ts);
+"""
+
+# Adds a delta row, or merges it into the row already at that timestamp
+_UPSERT_SAMPLE = (
+    f"INSERT INTO samples (ts, tweet_id, {', '.join(COLUMNS)}) VALUES (?, ?, {', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT (ts, tweet_id) DO UPDATE SET {', '.join(f'{c} = {c} + excluded.{c}' for c in COLUMNS)}"
+)
+
+class Sample(NamedTuple):
+    """Metric changes of one tweet between two polls, recorded at ts (epoch seconds)."""
+    ts: int
+    likes: int
+    retweets: int
+    replies: int
+    quotes: int
+    impressions: int
+
+class EngagementStore:
+    """
+    Append-only time series of tweet metrics, stored in SQLite (WAL mode).
+
+    The tweets table holds each tracked tweet and its latest totals; the
+    samples table holds the deltas, clustered by time (a WITHOUT ROWID table
+    keyed by timestamp), so a range query reads one contiguous slice.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.ENGAGEMENT_PATH
+        self._lock = threading.Lock()
+        self._conn = storage.connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def track(self, sent_tweets: Iterable, account: str = "") -> int:
+        """
+        Starts tracking delivered tweets; tweets already tracked are left as they are.
+
+        Args:
+            sent_tweets (Iterable[SentTweet]): E.g. from TweetQueue.sent_since().
+            account (str): Name of the account that posted them, if several are served.
+
+        Returns:
+            int: The number of newly tracked tweets.
+        """
+        rows = [(t.tweet_id, account, t.source, t.article_link, t.sent_at) for t in sent_tweets]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tweets (tweet_id, account, source, article_link, posted_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+            return self._conn.total_changes - before
+
+    def due(self, now: Optional[float] = None, account: Optional[str] = None) -> List[str]:
+        """
+        Returns the IDs of tracked tweets due for a poll: never polled ones first, oldest first.
+
+        A tweet is polled at most every ENGAGEMENT_POLL_MINUTES, and less often
+        as it ages (every twelfth of its age), since old tweets change slowly.
+        Tweets older than ENGAGEMENT_TRACK_DAYS or deleted are not polled.
+        """
+        now = time.time() if now is None else now
+        query = ("SELECT tweet_id FROM tweets WHERE deleted = 0 AND posted_at >= ? "
+                 "AND (polled_at IS NULL OR polled_at <= ? - MAX(?, (? - posted_at) / 12.0))")
+        params = [now - config.ENGAGEMENT_TRACK_DAYS * 86400, now, config.ENGAGEMENT_POLL_MINUTES * 60, now]
+        if account is not None:
+            query += " AND account = ?"
+            params.append(account)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY polled_at IS NOT NULL, polled_at, posted_at", params).fetchall()
+        return [row[0] for row in rows]
+
+    def record(self, public_metrics: Dict[str, Dict[str, int]], now: Optional[float] = None,
+               deleted: Iterable[str] = ()) -> int:
+        """
+        Stores polled metrics, appending a sample for each tweet whose totals changed.
+
+        Args:
+            public_metrics (dict): Maps tweet IDs to their public_metrics.
+            now (float, optional): Poll time (epoch seconds).
+            deleted (Iterable[str]): IDs the API no longer returns; they stop being polled.
+
+        Returns:
+            int: The number of samples appended.
+        """
+        now = time.time() if now is None else now
+        ts = int(now)
+        appended = 0
+        with self._lock, self._conn:
+            for tweet_id, values in public_metrics.items():
+                row = self._conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM tweets WHERE tweet_id = ?", (str(tweet_id),)
+                ).fetchone()
+                if row is None:
+                    continue
+                totals = [int(values.get(field) or 0) for field, _ in METRIC_FIELDS]
+                deltas = [total - previous for total, previous in zip(totals, row)]
+                if any(deltas):
+                    self._conn.execute(_UPSERT_SAMPLE, (ts, str(tweet_id), *deltas))
+                    appended += 1
+                self._conn.execute(
+                    f"UPDATE tweets SET polled_at = ?, {', '.join(f'{c} = ?' for c in COLUMNS)} WHERE tweet_id = ?",
+                    (now, *totals, str(tweet_id))
+                )
+            self._conn.executemany("UPDATE tweets SET deleted = 1, polled_at = ? WHERE tweet_id = ?",
+                                   [(now, str(tweet_id)) for tweet_id in deleted])
+        return appended
+
+    def series(self, tweet_id: str, start: float = 0, end: float = float("inf")) -> List[Sample]:
+        """Returns a tweet's samples with start <= ts < end, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {', '.join(COLUMNS)} FROM samples WHERE tweet_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (str(tweet_id), int(start), end)
+            ).fetchall()
+        return [Sample(*row) for row in rows]
+
+    def totals(self, tweet_id: str) -> Optional[Dict[str, int]]:
+        """Returns a tweet's latest metric totals, or None if it isn't tracked."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM tweets WHERE tweet_id = ?",
+                                     (str(tweet_id),)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def engagement_by_source(self, start: float, end: float = float("inf"),
+                             account: Optional[str] = None) -> Dict[str, Tuple[int, int]]:
+        """
+        Sums the engagement gained by tweets posted since start, per feed.
+
+        Args:
+            start (float): Only tweets posted at or after this time count, and
+                           only engagement gained from then on.
+            end (float): Engagement gained from this time on is left out.
+            account (str, optional): Only count this account's tweets.
+
+        Returns:
+            dict: Maps feed URLs to (tweets posted, engagement gained).
+        """
+        query = (f"SELECT t.source, COUNT(*), COALESCE(SUM(s.engagement), 0) FROM tweets t LEFT JOIN "
+                 f"(SELECT tweet_id, SUM({' + '.join(ENGAGEMENT_COLUMNS)}) AS engagement FROM samples "
+                 f"WHERE ts >= ? AND ts < ? GROUP BY tweet_id) s USING (tweet_id) "
+                 f"WHERE t.posted_at >= ? AND t.posted_at < ? AND t.source IS NOT NULL")
+        params = [int(start), end, start, end]
+        if account is not None:
+            query += " AND t.account = ?"
+            params.append(account)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY t.source", params).fetchall()
+        return {source: (count, engagement) for source, count, engagement in rows}
+
+    def source_weights(self, start: float, end: float = float("inf"), account: Optional[str] = None,
+                       max_weight: Optional[float] = None) -> Dict[str, float]:
+        """
+        Returns a weight per feed: its engagement per tweet relative to the average.
+
+        Feeds with few tweets are shrunk toward 1.0 (see PRIOR_TWEETS) and
+        weights are clamped to [1/max_weight, max_weight], so a single viral or
+        ignored tweet can't dominate article selection.
+        """
+        max_weight = config.ENGAGEMENT_MAX_WEIGHT if max_weight is None else max_weight
+        by_source = self.engagement_by_source(start, end, account)
+        tweets = sum(count for count, _ in by_source.values())
+        engagement = sum(total for _, total in by_source.values())
+        if not tweets or not engagement:
+            return {}
+        mean = engagement / tweets
+        weights = {}
+        for source, (count, total) in by_source.items():
+            weight = (total + PRIOR_TWEETS * mean) / ((count + PRIOR_TWEETS) * mean)
+            weights[source] = min(max(weight, 1 / max_weight), max_weight)
+        return weights
+
+    def downsample(self, older_than: float, bucket_seconds: int = 3600) -> int:
+        """
+        Merges the samples before older_than into one row per tweet and bucket.
+
+        Deltas add up, so sums over bucket-aligned ranges are unchanged; only
+        the timing within a bucket is lost. Running it again is a no-op.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        cutoff = int(older_than) // bucket_seconds * bucket_seconds
+        sums = ", ".join(f"SUM({column})" for column in COLUMNS)
+        with self._lock, self._conn:
+            before = self._conn.execute("SELECT COUNT(*) FROM samples WHERE ts < ?", (cutoff,)).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT ts / ? * ? AS bucket, tweet_id, {sums} FROM samples WHERE ts < ? GROUP BY bucket, tweet_id",
+                (bucket_seconds, bucket_seconds, cutoff)
+            ).fetchall()
+            self._conn.execute("DELETE FROM samples WHERE ts < ?", (cutoff,))
+            self._conn.executemany(_UPSERT_SAMPLE, rows)
+        return before - len(rows)
+
+    def evict_expired(self, older_than: float) -> int:
+        """Deletes samples, and tweets posted, before older_than. Returns the number of samples deleted."""
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM samples WHERE ts < ?", (int(older_than),)).rowcount
+            self._conn.execute("DELETE FROM tweets WHERE posted_at < ?", (older_than,))
+        return deleted
+
+    def compact(self, now: Optional[float] = None):
+        """Downsamples and evicts per ENGAGEMENT_DOWNSAMPLE_HOURS and ENGAGEMENT_RETENTION_DAYS."""
+        now = time.time() if now is None else now
+        self.evict_expired(now - config.ENGAGEMENT_RETENTION_DAYS * 86400)
+        self.downsample(now - config.ENGAGEMENT_DOWNSAMPLE_HOURS * 3600)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _not_found(errors) -> Set[str]:
+    """Returns the IDs a lookup's partial errors report as not found, i.e. deleted."""
+    return {str(error.get("resource_id") or error.get("value")) for error in errors or []
+            if str(error.get("type", "")).endswith("/resource-not-found")}
+
+def poll(store: EngagementStore, client, limiter, account: Optional[str] = None,
+         now: Optional[float] = None) -> int:
+    """
+    Refreshes the metrics of the store's tweets that are due, 100 IDs per get_tweets call.
+
+    Only tweets the API reports as not found are marked deleted; tweets missing
+    for other reasons (e.g. an author who went protected) stay due.
+
+    Args:
+        store (EngagementStore): The store to read due tweets from and record into.
+        client (tweepy.Client): Client to look the tweets up with.
+        limiter (RateLimiter): Rate limiter pacing the get_tweets calls.
+        account (str, optional): Only poll this account's tweets.
+
+    Returns:
+        int: The number of tweets polled.
+
+    Raises:
+        tweepy.TweepyException: If a lookup fails; earlier batches stay recorded.
+    """
+    now = time.time() if now is None else now
+    tweet_ids = store.due(now, account)
+    for i in range(0, len(tweet_ids), MAX_IDS_PER_LOOKUP):
+        chunk = tweet_ids[i:i + MAX_IDS_PER_LOOKUP]
+        # The clients only carry user credentials (OAuth 1.0a), not an app bearer token
+        response = limiter.call("get_tweets", client.get_tweets, ids=chunk, tweet_fields=["public_metrics"],
+                                user_auth=True)
+        found = {str(tweet.id): tweet.public_metrics or {} for tweet in response.data or []}
+        not_found = _not_found(response.errors)
+        deleted = [tweet_id for tweet_id in chunk if tweet_id not in found and tweet_id in not_found]
+        store.record(found, now, deleted)
+        metrics.inc("engagement_polls_total", len(chunk))
+    if tweet_ids:
+        logger.info("Polled engagement of %d tweets.", len(tweet_ids))
+    return len(tweet_ids)
+
+def source_weights(account: Optional[str] = None, path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Returns the feed weights learned from the last ENGAGEMENT_RANKING_DAYS of engagement.
+
+    Returns an empty dict (every feed weighs 1.0) if learning is disabled or
+    nothing has been polled yet.
+    """
+    path = path or config.ENGAGEMENT_PATH
+    if not config.ENGAGEMENT_RANKING_DAYS or not os.path.exists(path):
+        return {}
+    with EngagementStore(path) as store:
+        return store.source_weights(time.time() - config.ENGAGEMENT_RANKING_DAYS * 86400, account=account)
@@ -0,0 +1,113 @@
+import json
+import threading
+from typing import Optional, Dict, Any, List, NamedTuple
+
+try:
+    from . import config
+    from . import storage
+    from .article import Article
+except ImportError:
+    import config
+    import storage
+    from article import Article
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    modified TEXT,
+    articles TEXT NOT NULL,
+    body_size INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS feed_cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    bytes_saved INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO feed_cache_stats (id) VALUES (1);
+"""
+
+class CachedFeed(NamedTuple):
+    """Validators and parsed articles stored for one feed URL."""
+    etag: Optional[str]
+    modified: Optional[str]
+    articles: List[Article]
+    body_size: int
+
+class FeedCache:
+    """
+    Persistent per-feed validator cache for conditional GET polling.
+
+    Stores the ETag / Last-Modified validators of each feed together with the
+    articles parsed from it. When the server answers 304 Not Modified the
+    stored articles are reused and the feed is not downloaded or parsed again.
+    Hit/miss counts and the bytes saved by hits are kept in the same database.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.FEED_CACHE_PATH
+        self._lock = threading.Lock()
+        self._conn = storage.connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, url: str) -> Optional[CachedFeed]:
+        """Returns the cached validators and articles for url, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, modified, articles, body_size FROM feed_cache WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, modified, articles, body_size = row
+        return CachedFeed(etag, modified, [Article.from_dict(a) for a in json.loads(articles)], body_size)
+
+    def store(self, url: str, etag: Optional[str], modified: Optional[str],
+              articles: List[Article], body_size: int):
+        """Saves the validators and parsed articles from a full (200) response."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_cache (url, etag, modified, articles, body_size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, etag, modified, json.dumps([a.to_dict() for a in articles]), body_size)
+            )
+
+    def record_hit(self, url: str):
+        """Counts a 304 response for url and the bytes it saved."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE feed_cache_stats SET hits = hits + 1, bytes_saved = bytes_saved + "
+                "COALESCE((SELECT body_size FROM feed_cache WHERE url = ?), 0) WHERE id = 1",
+                (url,)
+            )
+
+    def record_miss(self, url: str):
+        """Counts a full download of url."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE feed_cache_stats SET misses = misses + 1 WHERE id = 1")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hits, misses, bytes_saved and hit_rate since the cache was created."""
+        with self._lock:
+            hits, misses, bytes_saved = self._conn.execute(
+                "SELECT hits, misses, bytes_saved FROM feed_cache_stats WHERE id = 1"
+            ).fetchone()
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "bytes_saved": bytes_saved,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
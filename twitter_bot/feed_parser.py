@@ -0,0 +1,192 @@
+import calendar
+import datetime
+import io
+import logging
+import re
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_tz
+from typing import Dict, List, NamedTuple, Optional
+
+try:
+    from . import config
+    from . import metrics
+    from .lazy import LazyModule
+except ImportError:
+    import config
+    import metrics
+    from lazy import LazyModule
+
+feedparser = LazyModule("feedparser")
+
+logger = logging.getLogger(__name__)
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_RSS1 = "{http://purl.org/rss/1.0/}"
+_RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+_DC = "{http://purl.org/dc/elements/1.1/}"
+_CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+# Markup left in a title after XML decoding; feedparser sanitizes it, so such feeds are left to it
+_MARKUP_RE = re.compile(r"<[a-zA-Z/!][^>]*>|&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]\w*);")
+
+class FeedEntry(NamedTuple):
+    """The fields of a feed entry the bot uses."""
+    title: Optional[str]
+    link: Optional[str]
+    id: Optional[str]
+    published: Optional[int]  # Unix time of publication, or of the last update
+    summary: Optional[str]    # As in the feed; may contain HTML
+
+class ParsedFeed(NamedTuple):
+    """Entries of a feed, and how they were parsed."""
+    entries: List[FeedEntry]
+    backend: str                     # "lean" or "feedparser"
+    error: Optional[Exception] = None  # Why the document is ill-formed (feedparser's bozo_exception)
+
+class UnsupportedFeed(Exception):
+    """The lean parser can't read this document exactly; feedparser should be used instead."""
+
+def _text(elem) -> Optional[str]:
+    if elem is None:
+        return None
+    return "".join(elem.itertext()).strip() or None
+
+def _title(elem) -> Optional[str]:
+    if elem is not None and len(elem):
+        raise UnsupportedFeed("XHTML title")
+    title = _text(elem)
+    if title and _MARKUP_RE.search(title):
+        raise UnsupportedFeed(f"markup in title {title!r}")
+    return title
+
+def _absolute(link: Optional[str]) -> Optional[str]:
+    if link and "://" not in link:
+        # Relative links need xml:base or the feed URL to resolve; leave those to feedparser
+        raise UnsupportedFeed(f"relative link {link!r}")
+    return link
+
+def _rfc822(value: str) -> int:
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return _iso8601(value)
+    # A missing zone is taken as UTC (mktime_tz would assume local time)
+    return calendar.timegm(parsed[:6] + (0, 0, 0)) - (parsed[9] or 0)
+
+def _iso8601(value: str) -> int:
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise UnsupportedFeed(f"unrecognized date {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+def _date(elem, parse) -> Optional[int]:
+    value = _text(elem)
+    return parse(value) if value else None
+
+def _rss_item(item, ns: str = "") -> FeedEntry:
+    """Reads an RSS 2.0/0.9x item, or an RSS 1.0 item with ns=_RSS1."""
+    link = _text(item.find(ns + "link"))
+    guid = item.find(ns + "guid")
+    entry_id = _text(guid) or (item.get(_RDF + "about") if ns else None)
+    if link is None:
+        for atom_link in item.iterfind(_ATOM + "link"):
+            if atom_link.get("rel", "alternate") == "alternate":
+                link = atom_link.get("href")
+                break
+    if link is None and guid is not None and guid.get("isPermaLink", "true").lower() != "false":
+        link = entry_id  # A permalink guid doubles as the link
+    published = _date(item.find(ns + "pubDate"), _rfc822)
+    if published is None:
+        published = _date(item.find(_DC + "date"), _iso8601)
+    summary = _text(item.find(ns + "description")) or _text(item.find(_CONTENT + "encoded"))
+    return FeedEntry(_title(item.find(ns + "title")), _absolute(link), entry_id, published, summary)
+
+def _atom_entry(entry) -> FeedEntry:
+    link = None
+    for candidate in entry.iterfind(_ATOM + "link"):
+        if candidate.get("rel", "alternate") == "alternate":
+            link = candidate.get("href")
+            break
+    published = _date(entry.find(_ATOM + "published"), _iso8601)
+    if published is None:
+        published = _date(entry.find(_ATOM + "updated"), _iso8601)
+    summary = _text(entry.find(_ATOM + "summary")) or _text(entry.find(_ATOM + "content"))
+    return FeedEntry(_title(entry.find(_ATOM + "title")), _absolute(link), _text(entry.find(_ATOM + "id")),
+                     published, summary)
+
+# Root element -> (entry element, reader)
+_FORMATS = {
+    "rss": ("item", _rss_item),
+    _RDF + "RDF": (_RSS1 + "item", lambda item: _rss_item(item, _RSS1)),
+    _ATOM + "feed": (_ATOM + "entry", _atom_entry),
+}
+
+def parse_lean(body: bytes) -> List[FeedEntry]:
+    """
+    Extracts entries from an RSS 2.0, RSS 1.0 or Atom 1.0 document.
+
+    The document is streamed through expat (ElementTree.iterparse) and each
+    entry is read and discarded as soon as it ends, so no full tree is built
+    and nothing but the fields in FeedEntry is normalized.
+
+    Raises:
+        UnsupportedFeed: If the document is not well-formed, is in another
+                         format, or has something (a relative link, an
+                         unusual date) only feedparser handles exactly.
+    """
+    entries = []
+    try:
+        events = ET.iterparse(io.BytesIO(body), events=("start", "end"))
+        _, root = next(events)
+        if root.tag not in _FORMATS:
+            raise UnsupportedFeed(f"root element {root.tag!r}")
+        entry_tag, read = _FORMATS[root.tag]
+        for event, elem in events:
+            if event == "end" and elem.tag == entry_tag:
+                entries.append(read(elem))
+                elem.clear()
+    except (ET.ParseError, StopIteration) as e:
+        raise UnsupportedFeed(f"not well-formed: {e}") from e
+    return entries
+
+def _from_feedparser(entry) -> FeedEntry:
+    published = entry.get("published_parsed") or entry.get("updated_parsed")
+    return FeedEntry(entry.get("title"), entry.get("link"), entry.get("id"),
+                     calendar.timegm(published) if published else None, entry.get("summary"))
+
+def parse_feedparser(body: bytes, headers: Optional[Dict[str, str]] = None) -> ParsedFeed:
+    """Parses a feed with feedparser, which copes with any format and with ill-formed documents."""
+    feed = feedparser.parse(body, response_headers=headers or {})
+    return ParsedFeed([_from_feedparser(entry) for entry in feed.entries], "feedparser",
+                      feed.get("bozo_exception") if feed.bozo else None)
+
+def parse(body: bytes, headers: Optional[Dict[str, str]] = None, backend: Optional[str] = None) -> ParsedFeed:
+    """
+    Parses a downloaded feed into FeedEntry records.
+
+    Args:
+        body (bytes): The feed document.
+        headers (dict, optional): Response headers with lowercased names,
+                                  used by feedparser for the encoding.
+        backend (str, optional): "lean" tries parse_lean first and falls
+                                 back to feedparser for documents it can't
+                                 handle; "feedparser" always uses feedparser.
+                                 Defaults to config.FEED_PARSER.
+
+    Returns:
+        ParsedFeed: The entries, the backend that produced them, and the
+                    parse error if the document is ill-formed.
+    """
+    backend = backend or config.FEED_PARSER
+    if backend == "lean":
+        try:
+            parsed = ParsedFeed(parse_lean(body), "lean")
+            metrics.inc("feed_parses_total", backend="lean")
+            return parsed
+        except UnsupportedFeed as e:
+            logger.debug("Lean parser can't handle the feed (%s); falling back to feedparser.", e)
+            metrics.inc("feed_parses_total", backend="fallback")
+    else:
+        metrics.inc("feed_parses_total", backend="feedparser")
+    return parse_feedparser(body, headers)
@@ -0,0 +1,237 @@
+import json
+import random
+import threading
+import time
+from typing import Optional, Iterable, List, Dict, Any, Tuple, FrozenSet
+
+try:
+    from . import config
+    from . import storage
+    from .article import Article
+except ImportError:
+    import config
+    import storage
+    from article import Article
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_poll (
+    url TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    next_poll_at REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_entry_at REAL,
+    last_polled_at REAL
+);
+CREATE INDEX IF NOT EXISTS feed_poll_next ON feed_poll (next_poll_at);
+CREATE TABLE IF NOT EXISTS feed_marks (
+    url TEXT PRIMARY KEY,
+    published REAL,
+    entry_ids TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feed_pending (
+    url TEXT NOT NULL,
+    link TEXT NOT NULL,
+    article TEXT NOT NULL,
+    PRIMARY KEY (url, link)
+) WITHOUT ROWID;
+"""
+
+# How many of the newest entry timestamps are used to estimate a feed's publish rate
+RATE_WINDOW = 10
+# Poll this many times per expected new entry, so items are picked up soon after publishing
+POLLS_PER_ENTRY = 2
+# Interval growth for a feed that had nothing new since the last poll
+QUIET_BACKOFF = 1.5
+# +/- fraction of random jitter applied to every interval, spreading polls over time
+JITTER = 0.1
+# Cap on the entry IDs remembered per feed for the high-water mark
+MAX_SEEN_IDS = 1000
+
+class FeedStateStore:
+    """
+    Per-feed polling state, so each feed is polled at its own cadence.
+
+    A feed's interval follows its observed publish rate: the mean gap between
+    its newest entry timestamps, divided by POLLS_PER_ENTRY. A feed with
+    nothing new backs off by QUIET_BACKOFF, and a failing feed backs off
+    exponentially. Intervals are clamped to the configured bounds and
+    jittered so polls don't all land in one burst.
+
+    A poll's outcome (the new high-water mark and the publish times the
+    interval is estimated from) is staged when the feed is parsed and only
+    written by commit(), once its articles have been handed on. A feed that
+    was fetched but never read stays due, with its mark where it was.
+    Articles fetched but not consumed (e.g. when the reader stopped early)
+    are kept pending and offered again on the next poll.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, default_interval: Optional[float] = None):
+        self.path = path or config.FEED_STATE_PATH
+        self.min_interval = config.FEED_MIN_POLL_MINUTES * 60 if min_interval is None else min_interval
+        self.max_interval = config.FEED_MAX_POLL_HOURS * 3600 if max_interval is None else max_interval
+        self.default_interval = config.FEED_DEFAULT_POLL_HOURS * 3600 if default_interval is None else default_interval
+        self._lock = threading.Lock()
+        self._staged = {}  # url -> (published, entry_ids, entry_times) waiting for commit()
+        self._conn = storage.connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _write(self, url: str, interval: float, retry_in: float, failures: int,
+               last_entry_at: Optional[float], now: float):
+        next_poll_at = now + retry_in * random.uniform(1 - JITTER, 1 + JITTER)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_poll (url, interval, next_poll_at, failures, last_entry_at, last_polled_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, interval, next_poll_at, failures, last_entry_at, now)
+            )
+
+    def _get(self, url: str):
+        """Returns (interval, failures, last_entry_at) for a feed, with defaults if never polled."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT interval, failures, last_entry_at FROM feed_poll WHERE url = ?", (url,)
+            ).fetchone()
+        return row if row else (self.default_interval, 0, None)
+
+    def due_feeds(self, urls: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Returns the URLs (in the given order) that are due; feeds never polled are always due."""
+        now = time.time() if now is None else now
+        urls = list(urls)
+        with self._lock:
+            not_due = {
+                row[0] for row in self._conn.execute(
+                    "SELECT url FROM feed_poll WHERE next_poll_at > ?", (now,)
+                )
+            }
+        return [url for url in urls if url not in not_due]
+
+    def record_success(self, url: str, entry_times: Iterable[Optional[float]], now: Optional[float] = None):
+        """
+        Updates a feed's interval after a successful poll.
+
+        Args:
+            url (str): The feed URL.
+            entry_times (Iterable[Optional[float]]): Publication times (epoch
+                seconds) of the feed's entries; None values are ignored.
+            now (float, optional): Time of the poll.
+        """
+        now = time.time() if now is None else now
+        interval, _, last_entry_at = self._get(url)
+        times = sorted((t for t in entry_times if t is not None), reverse=True)[:RATE_WINDOW]
+
+        if not times or (last_entry_at is not None and times[0] <= last_entry_at):
+            # Nothing new: poll less often
+            interval = self._clamp(interval * QUIET_BACKOFF)
+        else:
+            last_entry_at = times[0]
+            if len(times) >= 2:
+                mean_gap = (times[0] - times[-1]) / (len(times) - 1)
+                interval = self._clamp(mean_gap / POLLS_PER_ENTRY)
+        self._write(url, interval, interval, 0, last_entry_at, now)
+
+    def record_failure(self, url: str, now: Optional[float] = None):
+        """Backs a failing feed off exponentially (its base interval is kept for when it recovers)."""
+        now = time.time() if now is None else now
+        interval, failures, last_entry_at = self._get(url)
+        failures += 1
+        self._write(url, interval, self._clamp(self.min_interval * (2 ** failures)), failures, last_entry_at, now)
+
+    def high_water_mark(self, url: str) -> Tuple[Optional[float], FrozenSet[str]]:
+        """
+        Returns a feed's high-water mark: the newest entry timestamp seen so
+        far and the entry IDs seen on the last poll. (None, empty set) if the
+        feed was never processed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT published, entry_ids FROM feed_marks WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None, frozenset()
+        return row[0], frozenset(json.loads(row[1]))
+
+    def pending(self, url: str) -> Dict[str, Article]:
+        """Returns a feed's articles that were fetched but not consumed yet, by link."""
+        with self._lock:
+            rows = self._conn.execute("SELECT link, article FROM feed_pending WHERE url = ?", (url,)).fetchall()
+        return {link: Article.from_dict(json.loads(article)) for link, article in rows}
+
+    def stage(self, url: str, published: Optional[float], entry_ids: Iterable[str],
+              entry_times: Iterable[Optional[float]]):
+        """
+        Holds the outcome of a successful poll until commit(url).
+
+        Args:
+            url (str): The feed URL.
+            published (Optional[float]): Newest entry timestamp seen so far.
+            entry_ids (Iterable[str]): IDs of the entries currently in the feed.
+            entry_times (Iterable[Optional[float]]): Publication times of the
+                feed's entries, for record_success().
+        """
+        with self._lock:
+            self._staged[url] = (published, list(entry_ids)[:MAX_SEEN_IDS], list(entry_times))
+
+    def commit(self, url: str, unconsumed: Iterable[Article] = ()):
+        """
+        Records a feed's staged poll and high-water mark. Nothing happens if none is staged.
+
+        Args:
+            url (str): The feed URL.
+            unconsumed (Iterable[Article]): The feed's articles that were not
+                handed on; they replace the feed's pending articles.
+        """
+        with self._lock:
+            staged = self._staged.pop(url, None)
+        if staged is None:
+            return
+        published, entry_ids, entry_times = staged
+        self.record_success(url, entry_times)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_marks (url, published, entry_ids) VALUES (?, ?, ?)",
+                (url, published, json.dumps(entry_ids))
+            )
+            self._conn.execute("DELETE FROM feed_pending WHERE url = ?", (url,))
+            self._conn.executemany("INSERT OR IGNORE INTO feed_pending (url, link, article) VALUES (?, ?, ?)",
+                                   [(url, article.link, json.dumps(article.to_dict())) for article in unconsumed])
+
+    def release(self, articles: Iterable[Article]):
+        """
+        Offers articles again on their feed's next poll, even if it answers 304.
+
+        For callers that dropped articles they were handed (e.g. candidates
+        that were not queued). Articles without a source feed are ignored. A
+        pending article is dropped once its entry is no longer in the feed.
+        """
+        rows = [(article.source, article.link, json.dumps(article.to_dict()))
+                for article in articles if article.source]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO feed_pending (url, link, article) VALUES (?, ?, ?)", rows)
+
+    def state(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns the stored polling state of a feed, or None if it was never polled."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT interval, next_poll_at, failures, last_entry_at, last_polled_at FROM feed_poll WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("interval", "next_poll_at", "failures", "last_entry_at", "last_polled_at"), row))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
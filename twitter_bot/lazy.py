@@ -0,0 +1,33 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Placeholder for a module that is only imported when one of its attributes is used.
+
+    Heavy dependencies (tweepy, requests, feedparser, numpy) are bound this
+    way at module level, so `python -m twitter_bot ingest` never pays for
+    tweepy and `--help` pays for none of them. Usage is unchanged:
+
+        np = LazyModule("numpy")
+        np.zeros(3)  # numpy is imported here
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module = None
+        self.__lock = threading.Lock()
+
+    def __load(self):
+        with self.__lock:
+            if self.__module is None:
+                self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def __getattr__(self, attr):
+        # Only called for names not found on the placeholder itself
+        return getattr(self.__module or self.__load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<lazy module {self.__name!r} ({state})>"
@@ -0,0 +1,55 @@
+import json
+import logging
+import sys
+from typing import Optional
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+# Attributes every LogRecord has; anything else was passed with extra= and is a structured field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including fields passed with extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Plain one-line format, with fields passed with extra= appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream=None):
+    """
+    Configures the root logger for the bot's entry points.
+
+    Args:
+        level (str, optional): Level name. Defaults to config.BOT_LOG_LEVEL.
+        fmt (str, optional): "text" or "json". Defaults to config.BOT_LOG_FORMAT.
+        stream (optional): Where to write. Defaults to stderr.
+    """
+    level = (level or config.BOT_LOG_LEVEL).upper()
+    fmt = (fmt or config.BOT_LOG_FORMAT).lower()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), handlers=[handler], force=True)
@@ -3,75 +3,265 @@
 # depending on PYTHONPATH setup or how the script is invoked.
 # For package structure, it's often better to run as 'python -m twitter_bot.main' from parent dir.
 
+import logging
+import time
+from contextlib import closing
+
 try:
     from . import twitter_client
     from . import content_manager
     from . import config # To ensure config is loaded, though not directly used here often
+    from . import composer
+    from . import engagement
+    from . import logs
+    from . import metrics
+    from .feed_cache import FeedCache
+    from .feed_state import FeedStateStore
+    from .engagement import EngagementStore
+    from .posted_index import PostedIndex
+    from .ranking import default_ranker
+    from .tweet_queue import TweetQueue, PostingWorker
 except ImportError:
     # Fallback for direct execution (e.g., python main.py from within twitter_bot dir)
     # This is less ideal for package structures but common for simple scripts.
     import twitter_client
     import content_manager
     import config
+    import composer
+    import engagement
+    import logs
+    import metrics
+    from feed_cache import FeedCache
+    from feed_state import FeedStateStore
+    from engagement import EngagementStore
+    from posted_index import PostedIndex
+    from ranking import default_ranker
+    from tweet_queue import TweetQueue, PostingWorker
 
-def post_latest_article():
+logger = logging.getLogger(__name__)
+
+# How many unposted candidates to gather before feed fetching stops early
+MAX_CANDIDATES = 50
+
+# Rolling near-duplicate index, kept for the life of the process so a story
+# picked up from one feed is not a candidate again when another feed carries it
+near_duplicates = content_manager.NearDuplicateIndex()
+
+def collect_candidates(feed_cache, posted_index, tweet_queue=None, max_candidates=MAX_CANDIDATES,
+                       feed_state=None, dedup=None):
     """
-    Fetches the latest articles from RSS feeds and posts the first one to Twitter.
+    Streams articles from the RSS feeds until enough unposted candidates are found.
+
+    Args:
+        feed_cache (FeedCache): Validator cache for conditional GETs.
+        posted_index (PostedIndex, optional): Index of already-posted articles
+                                              to skip.
+        tweet_queue (TweetQueue, optional): Queue of composed tweets; articles
+                                            already queued are skipped too.
+        max_candidates (int): Stop fetching once this many candidates are found.
+        feed_state (FeedStateStore, optional): Polling state; only feeds that
+                                               are due are fetched.
+        dedup (NearDuplicateIndex, optional): Near-duplicate index; only one
+                                              article per story is kept.
+
+    Returns:
+        list: Candidate Article records in the order their feeds finished.
+              With feed_state, feeds only advance past the articles read
+              here; callers that drop candidates should release_articles() them.
     """
-    print("Attempting to post the latest article...")
+    candidates = []
+    with closing(content_manager.iter_rss_feeds(cache=feed_cache, state=feed_state, dedup=dedup)) as articles:
+        for article in articles:
+            if not article.title or not article.link:
+                continue
+            if posted_index is not None and posted_index.contains_article(article):
+                metrics.inc("dedup_hits_total", kind="posted")
+                continue
+            if tweet_queue is not None and tweet_queue.contains(article.key):
+                metrics.inc("dedup_hits_total", kind="queued")
+                continue
+            candidates.append(article)
+            if len(candidates) >= max_candidates:
+                break
+    return candidates
 
-    # 1. Fetch articles
-    #    For now, using default RSS feeds.
-    #    This could be expanded to take feed URLs from config or other sources.
-    articles = content_manager.fetch_rss_feeds()
+def release_articles(articles):
+    """
+    Hands dropped candidates back to the feed state, so they are offered again.
 
+    Args:
+        articles (list): Article records that were ingested but not queued.
+    """
+    articles = list(articles)
     if not articles:
-        print("No articles fetched. Nothing to post.")
         return
+    with FeedStateStore() as feed_state:
+        feed_state.release(articles)
 
-    # 2. Select an article
-    #    For simplicity, let's pick the first article.
-    #    More sophisticated selection logic can be added later (e.g., random, based on keywords).
-    article_to_post = articles[0]
-    title = article_to_post.get("title")
-    link = article_to_post.get("link")
-
-    if not title or not link:
-        print("Selected article is missing a title or link. Skipping.")
-        return
+def compose_tweet(article, template=None):
+    """
+    Builds the tweet text for an article.
 
-    # 3. Construct the tweet
-    #    Basic format. Can be made more engaging.
-    #    Consider character limits. A simple way is to truncate the title if too long.
-    #    Max tweet length is 280. Link takes up t.co length (around 23 chars).
-    #    "News: ... [link]" leaves about 280 - 6 - 23 = 251 chars for title.
-    max_title_len = 250 # A bit of buffer
-    if len(title) > max_title_len:
-        title = title[:max_title_len-3] + "..."
+    Uses template, or config.TWEET_TEMPLATE; the title is truncated so the
+    text fits X's weighted length, counting the link as a 23-character t.co URL.
 
-    tweet_text = f"News: {title} {link}"
+    Args:
+        article (Article): The article to tweet about.
+        template (str, optional): Tweet template, e.g. an account's own.
 
+    Returns:
+        str: The tweet text.
+    """
     # An alternative for more topics:
-    # tweet_text = f"Check out this article on {topic_keyword}: {title} {link} #Data #AI"
+    # TWEET_TEMPLATE="Check out this article on Data & AI: {title} {link} #Data #AI"
+    return composer.compose(article, template)
+
+def ingest_articles(max_candidates=MAX_CANDIDATES):
+    """
+    Fetches the latest articles from RSS feeds.
+
+    Returns:
+        list: Up to max_candidates Article records not yet posted or queued.
+    """
+    with PostedIndex() as posted_index, TweetQueue() as tweet_queue:
+        # For now, using default RSS feeds.
+        # This could be expanded to take feed URLs from config or other sources.
+        # Unchanged feeds are answered from the conditional GET cache, and
+        # fetching stops once enough new candidates have been found. Each feed
+        # is only polled when its adaptive interval says it is due.
+        with FeedCache() as feed_cache, FeedStateStore() as feed_state:
+            candidates = collect_candidates(feed_cache, posted_index, tweet_queue, max_candidates, feed_state,
+                                            near_duplicates)
+            logger.debug("Feed cache stats: %s", feed_cache.stats())
+    logger.info("Ingested %d candidate articles.", len(candidates))
+    return candidates
+
+def queue_best_article(candidates, posted_index, tweet_queue, template=None, source_weights=None):
+    """
+    Queues a tweet for the best-ranked candidate not in posted_index or tweet_queue.
+
+    Args:
+        candidates (list): Article records, e.g. from ingest_articles().
+        posted_index (PostedIndex): Articles already posted; their recent
+                                    titles also drive the novelty ranking.
+        tweet_queue (TweetQueue): Queue the tweet is added to.
+        template (str, optional): Tweet template. Defaults to config.TWEET_TEMPLATE.
+        source_weights (dict, optional): Feed weights learned from engagement.
+
+    Returns:
+        bool: True if a tweet was queued.
+    """
+    # Select an article: rank by recency, topic keywords, source weight and
+    # similarity to recent posts. Candidates may have been ingested a while
+    # ago, so re-check them against the index and queue.
+    ranker = default_ranker(posted_index.recent_titles(config.RANKING_NOVELTY_WINDOW), source_weights)
+    article_to_post = next(
+        (a for a in ranker.rank(candidates)
+         if not posted_index.contains_article(a) and not tweet_queue.contains(a.key)),
+        None
+    )
+    if article_to_post is None:
+        logger.info("No new articles to compose. Nothing to post.")
+        return False
+
+    # Construct the tweet and queue it for the posting worker
+    tweet_text = compose_tweet(article_to_post, template)
+    logger.info("Prepared tweet: %s", tweet_text)
+    return tweet_queue.enqueue(tweet_text, article_to_post.key, article_to_post)
 
-    print(f"Prepared tweet: {tweet_text}")
+def compose_article(candidates):
+    """
+    Queues a tweet for the best-ranked candidate that is still unposted and unqueued.
+
+    Args:
+        candidates (list): Article records, e.g. from ingest_articles().
+
+    Returns:
+        bool: True if a tweet was queued.
+    """
+    with PostedIndex() as posted_index, TweetQueue() as tweet_queue, metrics.timer("compose_seconds"):
+        queued = queue_best_article(candidates, posted_index, tweet_queue,
+                                    source_weights=engagement.source_weights())
+        depth = tweet_queue.depth()
+        metrics.set_gauge("tweet_queue_depth", depth)
+        logger.info("Tweet queue depth: %d", depth)
+        return queued
+
+def compose_latest_article():
+    """
+    Fetches the latest articles from RSS feeds and queues a tweet for the first new one.
+
+    Returns:
+        bool: True if a tweet was queued.
+    """
+    logger.info("Attempting to compose a tweet for the latest article...")
+    candidates = ingest_articles()
+    queued = compose_article(candidates)
+    # Only one is queued; the rest are offered again on their feeds' next poll
+    release_articles(candidates)
+    return queued
+
+def post_queued_tweets(max_items=None):
+    """
+    Posts tweets waiting in the outbound queue.
+
+    Failed posts stay queued and are retried with backoff on a later call.
+    This requires API keys to be correctly set in the .env file.
+
+    Args:
+        max_items (int, optional): Stop after handling this many tweets.
 
-    # 4. Post the tweet
-    #    This requires API keys to be correctly set in the .env file.
-    try:
-        twitter_client.post_tweet(tweet_text)
-        print("Tweet posting process initiated from main.py.")
-    except Exception as e:
-        print(f"An error occurred while trying to post tweet from main.py: {e}")
+    Returns:
+        int: The number of tweets handled.
+    """
+    with PostedIndex() as posted_index, TweetQueue() as tweet_queue:
+        worker = PostingWorker(tweet_queue, twitter_client.send_tweet, posted_index)
+        handled = worker.drain(max_items)
+        metrics.set_gauge("tweet_queue_depth", tweet_queue.depth())
+        logger.info("Tweet queue: handled %d tweets, now %s", handled, tweet_queue.stats())
+        return handled
+
+def poll_engagement():
+    """
+    Refreshes the engagement metrics of recently posted tweets.
+
+    Tweets the queue delivered within ENGAGEMENT_TRACK_DAYS are tracked, and
+    those due are looked up in batches of 100; see engagement.py.
+
+    Returns:
+        int: The number of tweets polled.
+    """
+    since = time.time() - config.ENGAGEMENT_TRACK_DAYS * 86400
+    with TweetQueue() as tweet_queue, EngagementStore() as store:
+        store.track(tweet_queue.sent_since(since))
+        polled = 0
+        if store.due():  # Only build the API client when there is something to look up
+            polled = engagement.poll(store, twitter_client.get_twitter_client(), twitter_client.rate_limiter)
+        store.compact()
+    return polled
+
+def post_latest_article():
+    """
+    Fetches the latest articles from RSS feeds and posts the first new one to Twitter.
+
+    The tweet goes through the outbound queue, so if posting fails it is
+    retried by the next call (or by the scheduler's posting job).
+    """
+    logger.info("Attempting to post the latest article...")
+    compose_latest_article()
+    post_queued_tweets()
 
 if __name__ == '__main__':
-    print("Running twitter_bot main.py...")
+    logs.setup_logging()
+    logger.info("Running twitter_bot main.py...")
     # Ensure API keys are loaded by importing config first
     # (already done by the import at the top if relative imports work,
     # or by the fallback direct import)
     if not config.X_API_KEY: # A simple check
-        print("WARNING: Twitter API keys not found in config. Tweet posting will likely fail.")
-        print("Please ensure your .env file is set up correctly in the 'twitter_bot' directory.")
+        logger.warning("Twitter API keys not found in config. Tweet posting will likely fail.")
+        logger.warning("Please ensure your .env file is set up correctly in the 'twitter_bot' directory.")
 
     post_latest_article()
-    print("twitter_bot main.py finished.")
+    if config.METRICS_PATH:
+        metrics.REGISTRY.write(config.METRICS_PATH)
+    logger.info("twitter_bot main.py finished.")
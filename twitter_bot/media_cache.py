@@ -0,0 +1,262 @@
+import hashlib
+import itertools
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    from . import config
+    from . import storage
+    from .lazy import LazyModule
+except ImportError:
+    import config
+    import storage
+    from lazy import LazyModule
+
+requests = LazyModule("requests")
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_blobs_lru ON media_blobs (last_access);
+CREATE TABLE IF NOT EXISTS media_urls (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_urls_digest ON media_urls (digest);
+"""
+
+CHUNK_SIZE = 64 * 1024
+
+class MediaCache:
+    """
+    Content-addressed on-disk cache of downloaded images.
+
+    Each image is stored once under the SHA-256 of its bytes, however many
+    URLs point to it; an SQLite index maps URLs to digests and tracks blob
+    sizes and last access. When the cache grows past max_bytes, the least
+    recently used blobs are deleted. Cached images are read back through
+    memory maps, so large files are not copied into memory.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_image_bytes: Optional[int] = None):
+        self.root = root or config.MEDIA_CACHE_DIR
+        self.max_bytes = int(config.MEDIA_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self.max_image_bytes = (int(config.MEDIA_MAX_IMAGE_MB * 1024 * 1024)
+                                if max_image_bytes is None else max_image_bytes)
+        self.bytes_downloaded = 0
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = storage.connect(os.path.join(self.root, "index.sqlite3"))
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def digest(self, url: str) -> Optional[str]:
+        """Returns the digest of a cached URL, or None if it isn't cached."""
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM media_urls WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(self._blob_path(row[0])):
+            return None
+        return row[0]
+
+    def __contains__(self, url: str) -> bool:
+        return self.digest(url) is not None
+
+    def _touch(self, digest: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE media_blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+
+    def path(self, url: str) -> Optional[str]:
+        """Returns the file holding a cached URL's bytes, or None if it isn't cached."""
+        digest = self.digest(url)
+        if digest is None:
+            return None
+        self._touch(digest)
+        return self._blob_path(digest)
+
+    def open(self, url: str) -> Optional[mmap.mmap]:
+        """
+        Returns a read-only memory map of a cached image, or None if it isn't cached.
+
+        The map stays valid even if the blob is evicted while it is open.
+        Close it when done, e.g. `with cache.open(url) as data: ...`.
+        """
+        path = self.path(url)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _commit(self, url: str, temp_path: str, digest: str, size: int) -> str:
+        """Moves a downloaded temp file into place (unless the blob exists) and indexes it."""
+        path = self._blob_path(digest)
+        now = time.time()
+        with self._lock, self._conn:
+            if os.path.exists(path):
+                os.remove(temp_path)  # Same bytes already cached under another URL
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+            self._conn.execute("INSERT OR REPLACE INTO media_blobs (digest, size, last_access) VALUES (?, ?, ?)",
+                               (digest, size, now))
+            self._conn.execute("INSERT OR REPLACE INTO media_urls (url, digest, fetched_at) VALUES (?, ?, ?)",
+                               (url, digest, now))
+            self._evict(keep=digest)
+        return digest
+
+    def store(self, url: str, data: bytes) -> str:
+        """
+        Caches data as the content of url and returns its digest.
+
+        Raises:
+            ValueError: If data is larger than the whole cache (max_bytes).
+        """
+        if len(data) > self.max_bytes:
+            raise ValueError(f"{len(data)} bytes don't fit in a cache of {self.max_bytes} bytes")
+        fd, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self._commit(url, temp_path, hashlib.sha256(data).hexdigest(), len(data))
+
+    def _evict(self, keep: str):
+        """
+        Deletes least recently used blobs until the cache fits max_bytes. Caller holds the lock.
+
+        The keep blob (the one just committed, whose digest is returned to
+        the caller) is never deleted, even if it is the oldest.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in self._conn.execute(
+                "SELECT digest, size FROM media_blobs WHERE digest != ? ORDER BY last_access", (keep,)).fetchall():
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM media_blobs WHERE digest = ?", (digest,))
+            self._conn.execute("DELETE FROM media_urls WHERE digest = ?", (digest,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _download(self, session: "requests.Session", url: str, timeout: float) -> str:
+        """Streams url into a temp file, hashing as it goes, and caches it."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        sha = hashlib.sha256()
+        size = 0
+        # An image bigger than the whole cache could only be kept by evicting it again
+        max_size = min(self.max_image_bytes, self.max_bytes)
+        try:
+            with os.fdopen(fd, "wb") as f, session.get(url, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ValueError(f"image larger than {max_size} bytes")
+                    sha.update(chunk)
+                    f.write(chunk)
+            if not size:
+                raise ValueError("empty response")
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        finally:
+            with self._lock:
+                self.bytes_downloaded += size
+        return self._commit(url, temp_path, sha.hexdigest(), size)
+
+    def prefetch(self, urls: Iterable[str], max_per_host: Optional[int] = None,
+                 max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                 session: Optional["requests.Session"] = None) -> Dict[str, Optional[str]]:
+        """
+        Downloads the images that aren't cached yet, concurrently.
+
+        Each image host gets at most max_per_host downloads (and keep-alive
+        connections) at a time. URLs already cached are not requested again.
+
+        Args:
+            urls (Iterable[str]): Image URLs; duplicates are fetched once.
+            max_per_host (int, optional): Concurrent downloads per host.
+            max_workers (int, optional): Concurrent downloads overall.
+            timeout (float, optional): Connect/read timeout of each download.
+            session (requests.Session, optional): Session to download with.
+
+        Returns:
+            Dict[str, Optional[str]]: Maps each URL to its digest, or to None
+            if it could not be downloaded.
+        """
+        max_per_host = config.MEDIA_MAX_PER_HOST if max_per_host is None else max_per_host
+        max_workers = config.MEDIA_PREFETCH_WORKERS if max_workers is None else max_workers
+        timeout = config.MEDIA_TIMEOUT_SECONDS if timeout is None else timeout
+
+        results: Dict[str, Optional[str]] = {}
+        by_host: Dict[str, List[str]] = {}
+        for url in dict.fromkeys(urls):
+            digest = self.digest(url)
+            if digest is not None:
+                self._touch(digest)
+                results[url] = digest
+            else:
+                results[url] = None
+                by_host.setdefault(urlsplit(url).netloc, []).append(url)
+        if not by_host:
+            return results
+
+        own_session = session is None
+        if own_session:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=len(by_host), pool_maxsize=max_per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        limits = {host: threading.BoundedSemaphore(max(1, max_per_host)) for host in by_host}
+
+        def fetch(url):
+            with limits[urlsplit(url).netloc]:
+                try:
+                    results[url] = self._download(session, url, timeout)
+                except Exception as e:
+                    logger.warning("Error prefetching image %s: %s", url, e)
+
+        # Interleave hosts so workers aren't all parked on one host's limit
+        queue = [url for group in itertools.zip_longest(*by_host.values()) for url in group if url]
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                list(pool.map(fetch, queue))
+        finally:
+            if own_session:
+                session.close()
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of cached URLs and blobs, and the bytes stored and downloaded."""
+        with self._lock:
+            urls = self._conn.execute("SELECT COUNT(*) FROM media_urls").fetchone()[0]
+            blobs, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM media_blobs").fetchone()
+            return {"urls": urls, "blobs": blobs, "bytes": size, "bytes_downloaded": self.bytes_downloaded}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
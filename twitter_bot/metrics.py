@@ -0,0 +1,210 @@
+import bisect
+import functools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+PREFIX = "twitter_bot_"
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics recorded by the bot, with their type and help text
+METRICS = {
+    "feed_fetch_seconds": ("histogram", "Time to download and parse one feed, by feed URL."),
+    "feed_parse_seconds": ("histogram", "Time to parse one downloaded feed, by feed URL."),
+    "feed_fetches_total": ("counter", "Feed fetches, by feed URL and outcome (ok, not_modified, error, deadline)."),
+    "feed_parses_total": ("counter", "Feeds parsed, by backend (lean, fallback to feedparser, feedparser)."),
+    "articles_parsed_total": ("counter", "Articles turned into candidates from feed entries."),
+    "dedup_hits_total": ("counter", "Candidates dropped as duplicates, by kind (near_duplicate, posted, queued)."),
+    "articles_routed_total": ("counter", "Candidates routed to an account by its topic and feed rules, by account."),
+    "compose_seconds": ("histogram", "Time to rank candidates and compose one tweet."),
+    "api_request_seconds": ("histogram", "X API call latency, by endpoint."),
+    "api_requests_total": ("counter", "X API calls, by endpoint and outcome (ok, rate_limited, server_error, error)."),
+    "api_retries_total": ("counter", "X API calls retried, by endpoint and reason."),
+    "rate_limit_wait_seconds_total": ("counter", "Time spent waiting for a rate-limit window, by endpoint."),
+    "tweet_queue_depth": ("gauge", "Tweets waiting in the outbound queue."),
+    "queue_posts_total": ("counter", "Queued tweets handled by the posting worker, by outcome (sent, retry, rate_limited, failed)."),
+    "engagement_polls_total": ("counter", "Tweets whose engagement metrics were looked up."),
+    "job_seconds": ("histogram", "Duration of scheduler jobs, by job."),
+    "job_errors_total": ("counter", "Scheduler jobs that raised, by job."),
+}
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key, extra=()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Registry:
+    """
+    In-process counters, gauges and latency histograms, keyed by name and labels.
+
+    Recording is a dict update under a lock, cheap enough for hot paths.
+    render() produces the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._gauges: Dict[str, Dict[tuple, float]] = {}
+        # name -> labels -> [per-bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[tuple, list]] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """Adds amount to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        """Sets a gauge."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = float(value)
+
+    def observe(self, name: str, value: float, **labels):
+        """Records one sample (usually seconds) in a histogram."""
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Context manager recording the duration of its block in a histogram, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator recording the duration of each call in a histogram."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[tuple, object]]:
+        """
+        Returns a copy of every series: counter and gauge values, and for
+        histograms a dict with count, sum and cumulative bucket counts.
+        """
+        with self._lock:
+            result = {name: dict(series) for name, series in {**self._counters, **self._gauges}.items()}
+            for name, series in self._histograms.items():
+                result[name] = {key: self._histogram_summary(counts) for key, counts in series.items()}
+        return result
+
+    def _histogram_summary(self, counts):
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets, counts):
+            total += count
+            cumulative.append((bound, total))
+        return {"count": counts[-1], "sum": counts[-2], "buckets": cumulative}
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        snapshot = self.snapshot()
+        with self._lock:
+            kinds = {**{n: "counter" for n in self._counters}, **{n: "gauge" for n in self._gauges},
+                     **{n: "histogram" for n in self._histograms}}
+        lines = []
+        for name in sorted(snapshot):
+            kind = kinds[name]
+            full = PREFIX + name
+            help_text = METRICS.get(name, (kind, name))[1]
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for key, value in sorted(snapshot[name].items()):
+                if kind != "histogram":
+                    lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                for bound, count in value["buckets"]:
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', _format_value(bound))])} {count}")
+                lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{full}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                lines.append(f"{full}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes render() to path atomically, e.g. for node_exporter's textfile
+        collector or to inspect after a run.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+# Process-wide registry used by the bot's modules
+REGISTRY = Registry()
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+
+def serve(port: int, host: str = "127.0.0.1", registry: Optional[Registry] = None) -> "http.server.ThreadingHTTPServer":
+    """
+    Serves GET /metrics from a daemon thread and returns the server.
+
+    Binds to localhost by default; call server.shutdown() to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood the bot's log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
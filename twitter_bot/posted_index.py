@@ -0,0 +1,141 @@
+import hashlib
+import re
+import threading
+import time
+from typing import Optional, List
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+try:
+    from . import config
+    from . import storage
+except ImportError:
+    import config
+    import storage
+
+# Query parameters that only track where a click came from; they never change the article.
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "source", "cmpid", "ncid"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted (
+    url_key TEXT PRIMARY KEY,
+    title_hash TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    posted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posted_title_hash ON posted (title_hash);
+CREATE INDEX IF NOT EXISTS posted_posted_at ON posted (posted_at);
+"""
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes an article URL so trivial variants map to the same key.
+
+    The scheme, a leading 'www.', default ports, the fragment, tracking query
+    parameters (utm_* and friends) and a trailing slash are dropped; the host
+    is lowercased and the remaining query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/")
+    normalized = host + path
+    if query:
+        normalized += "?" + urlencode(sorted(query))
+    return normalized
+
+def title_hash(title: str) -> str:
+    """Returns a short hash of a title with case, punctuation and spacing normalized."""
+    text = _PUNCTUATION_RE.sub(" ", title.casefold())
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+class PostedIndex:
+    """
+    Durable index of articles the bot has already posted.
+
+    Articles are keyed by normalized URL and by title hash, both indexed, so a
+    lookup is a constant-time index probe however long the history gets.
+    Entries older than the TTL are evicted, keeping the index bounded.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_days: Optional[float] = None):
+        self.path = path or config.POSTED_INDEX_PATH
+        self.ttl_seconds = (ttl_days if ttl_days is not None else config.POSTED_TTL_DAYS) * 86400
+        self._lock = threading.Lock()
+        self._conn = storage.connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+        self.evict_expired()
+
+    def _contains_keys(self, url_key: str, title_key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM posted WHERE url_key = ? UNION ALL "
+                "SELECT 1 FROM posted WHERE title_hash = ? LIMIT 1",
+                (url_key, title_key)
+            ).fetchone()
+        return row is not None
+
+    def _add_keys(self, url_key: str, title_key: str, link: str, title: str, posted_at: Optional[float]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posted (url_key, title_hash, title, link, posted_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url_key, title_key, title, link, posted_at if posted_at is not None else time.time())
+            )
+
+    def contains(self, link: str, title: str) -> bool:
+        """Returns True if an article with the same URL or title was already posted."""
+        return self._contains_keys(normalize_url(link), title_hash(title))
+
+    def contains_article(self, article) -> bool:
+        """Like contains(), using the Article's precomputed dedup keys."""
+        return self._contains_keys(article.url_key, article.title_key)
+
+    def add(self, link: str, title: str, posted_at: Optional[float] = None):
+        """Records an article as posted."""
+        self._add_keys(normalize_url(link), title_hash(title), link, title, posted_at)
+
+    def add_article(self, article, posted_at: Optional[float] = None):
+        """Records an Article as posted, using its precomputed dedup keys."""
+        self._add_keys(article.url_key, article.title_key, article.link, article.title, posted_at)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Deletes entries older than the TTL and returns how many were removed."""
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM posted WHERE posted_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def recent_titles(self, limit: int = 50) -> List[str]:
+        """Returns the titles of the most recently posted articles, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title FROM posted ORDER BY posted_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posted").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import string
+import time
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    from . import config
+    from .lazy import LazyModule
+except ImportError:
+    import config
+    from lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# Joins titles into one string so they can be lowercased and split in a single pass
+_SEPARATOR = "\x01"
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation + "‘’“”–—…«»"})
+STOPWORDS = tuple(sorted(
+    "a an and are as at be by can do for from has have how in into is it its new not of on or "
+    "over than that the their this to up was what when who why will with you your".split()
+))
+MIN_TOKEN_LENGTH = 2
+
+# Weight of each feature in the final score. Novelty is a penalty, hence negative.
+DEFAULT_WEIGHTS = {"recency": 1.0, "keywords": 1.0, "source": 1.0, "novelty": -2.0}
+
+def tokenize(titles: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits titles into lowercase word tokens, dropping stopwords and punctuation.
+
+    All titles are joined and split in one pass, so the cost is a few string
+    operations over the whole batch rather than a Python loop per title.
+
+    Args:
+        titles (Sequence[str]): The titles to tokenize.
+
+    Returns:
+        tuple: (rows, words) arrays with one element per distinct token of
+               each title: the index of the title and the word.
+    """
+    text = _SEPARATOR.join(titles).casefold().translate(_PUNCTUATION)
+    flat = np.array(text.replace(_SEPARATOR, f" {_SEPARATOR} ").split(), dtype=str)
+    is_separator = flat == _SEPARATOR
+    if np.count_nonzero(is_separator) != max(len(titles) - 1, 0):
+        # A title contained the separator itself; scrub it and try again
+        return tokenize([title.replace(_SEPARATOR, " ") for title in titles])
+
+    rows = np.cumsum(is_separator)[~is_separator]
+    words = flat[~is_separator]
+    keep = (np.char.str_len(words) >= MIN_TOKEN_LENGTH) & ~np.isin(words, STOPWORDS)
+    rows, words = rows[keep], words[keep]
+    if not len(words):
+        return rows, words
+
+    # Each word counts once per title
+    vocabulary, ids = np.unique(words, return_inverse=True)
+    pairs = np.unique(rows * len(vocabulary) + ids)
+    return pairs // len(vocabulary), vocabulary[pairs % len(vocabulary)]
+
+def _presence(rows: np.ndarray, words: np.ndarray, count: int, vocabulary: np.ndarray) -> np.ndarray:
+    """Returns a (count x len(vocabulary)) 0/1 matrix of which titles contain which words."""
+    matrix = np.zeros((count, len(vocabulary)), dtype=np.float32)
+    if len(vocabulary) and len(words):
+        cols = np.minimum(np.searchsorted(vocabulary, words), len(vocabulary) - 1)
+        hit = vocabulary[cols] == words
+        matrix[rows[hit], cols[hit]] = 1.0
+    return matrix
+
+class CandidateBatch:
+    """
+    Column view of a list of candidate articles, shared by the ranking features.
+
+    Columns are extracted from the Article records once, on first use.
+    """
+
+    def __init__(self, articles: Sequence, now: Optional[float] = None):
+        self.articles = articles
+        self.now = time.time() if now is None else now
+
+    def __len__(self):
+        return len(self.articles)
+
+    @cached_property
+    def published(self) -> np.ndarray:
+        """Publication times in epoch seconds, NaN where unknown."""
+        return np.array([a.published for a in self.articles], dtype=float)
+
+    @cached_property
+    def sources(self) -> np.ndarray:
+        return np.array([a.source or "" for a in self.articles], dtype=str)
+
+    @cached_property
+    def tokens(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, words) title tokens, see tokenize()."""
+        return tokenize([a.title for a in self.articles])
+
+    @cached_property
+    def token_counts(self) -> np.ndarray:
+        """Number of distinct tokens in each title."""
+        return np.bincount(self.tokens[0], minlength=len(self))
+
+    def presence(self, vocabulary: np.ndarray) -> np.ndarray:
+        """Returns a 0/1 matrix of which titles contain which words of a sorted vocabulary."""
+        rows, words = self.tokens
+        return _presence(rows, words, len(self), vocabulary)
+
+class Recency:
+    """Exponential decay with age: 1.0 for a brand new article, 0.5 after half_life_hours."""
+
+    def __init__(self, half_life_hours: Optional[float] = None, unknown_age_hours: float = 24.0):
+        self.half_life_hours = config.RANKING_HALF_LIFE_HOURS if half_life_hours is None else half_life_hours
+        self.unknown_age_hours = unknown_age_hours
+
+    def __call__(self, batch: CandidateBatch) -> np.ndarray:
+        age = (batch.now - batch.published) / 3600
+        age = np.where(np.isnan(age), self.unknown_age_hours, np.maximum(age, 0))
+        return 0.5 ** (age / self.half_life_hours)
+
+class KeywordMatch:
+    """
+    Topic match against a vocabulary of terms, saturating towards 1.0.
+
+    A multi-word term matches when the title contains all of its words.
+    Terms can be given as a list, or as a dict of term -> weight.
+    """
+
+    def __init__(self, keywords: Union[Iterable[str], Dict[str, float], None] = None):
+        if keywords is None:
+            keywords = config.RANKING_KEYWORDS
+        if not isinstance(keywords, dict):
+            keywords = {term: 1.0 for term in keywords}
+        terms = [term for term in keywords if term.strip()]
+        rows, words = tokenize(terms)
+        self.vocabulary = np.unique(words)
+        # (vocabulary x terms) membership, words needed per term, and term weights
+        self._terms = _presence(rows, words, len(terms), self.vocabulary).T
+        self._term_sizes = self._terms.sum(axis=0)
+        self._weights = np.array([keywords[term] for term in terms], dtype=float)
+        self._weights[self._term_sizes == 0] = 0.0  # Terms made only of stopwords never match
+
+    def __call__(self, batch: CandidateBatch) -> np.ndarray:
+        if not len(self._weights):
+            return np.zeros(len(batch))
+        matched = batch.presence(self.vocabulary) @ self._terms
+        full_matches = matched >= np.maximum(self._term_sizes, 1)
+        return 1.0 - np.exp(-(full_matches @ self._weights))
+
+class SourceWeight:
+    """Log of a per-feed weight, so the default weight of 1.0 scores 0."""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = config.RANKING_SOURCE_WEIGHTS if weights is None else weights
+
+    def __call__(self, batch: CandidateBatch) -> np.ndarray:
+        if not len(batch):
+            return np.zeros(0)
+        sources, inverse = np.unique(batch.sources, return_inverse=True)
+        weights = np.array([self.weights.get(source, 1.0) for source in sources], dtype=float)
+        return np.log(np.maximum(weights, 1e-3))[inverse]
+
+class Novelty:
+    """Highest cosine similarity (over title words) between a candidate and a recently posted title."""
+
+    def __init__(self, recent_titles: Sequence[str] = ()):
+        rows, words = tokenize(list(recent_titles))
+        self.vocabulary = np.unique(words)
+        self._posted = _presence(rows, words, len(recent_titles), self.vocabulary)
+        self._posted_norms = np.sqrt(self._posted.sum(axis=1))
+
+    def __call__(self, batch: CandidateBatch) -> np.ndarray:
+        if not len(self.vocabulary) or not len(batch):
+            return np.zeros(len(batch))
+        overlap = batch.presence(self.vocabulary) @ self._posted.T
+        norms = np.sqrt(batch.token_counts)[:, None] * self._posted_norms[None, :]
+        return (overlap / np.maximum(norms, 1.0)).max(axis=1)
+
+class Ranker:
+    """
+    Scores candidate articles as a weighted sum of features, computed in batch.
+
+    A feature is any callable taking a CandidateBatch and returning one score
+    per candidate as a NumPy array, so new signals can be plugged in by name.
+    """
+
+    def __init__(self, features: Dict[str, Callable[[CandidateBatch], np.ndarray]],
+                 weights: Optional[Dict[str, float]] = None):
+        self.features = dict(features)
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+
+    def scores(self, articles: Sequence, now: Optional[float] = None) -> np.ndarray:
+        """Returns the score of every article, in input order."""
+        batch = CandidateBatch(articles, now)
+        total = np.zeros(len(batch))
+        for name, feature in self.features.items():
+            weight = self.weights.get(name, 1.0)
+            if weight:
+                total += weight * feature(batch)
+        return total
+
+    def rank(self, articles: Iterable, now: Optional[float] = None) -> List:
+        """
+        Sorts articles from best to worst score.
+
+        Articles with equal scores keep their input order.
+        """
+        articles = list(articles)
+        if not articles:
+            return []
+        order = np.argsort(-self.scores(articles, now), kind="stable")
+        return [articles[i] for i in order]
+
+def default_ranker(recent_titles: Sequence[str] = (), learned_weights: Optional[Dict[str, float]] = None) -> Ranker:
+    """
+    Builds the ranker used for article selection from the configuration.
+
+    Args:
+        recent_titles (Sequence[str]): Titles of recent posts, for the novelty penalty.
+        learned_weights (Dict[str, float], optional): Per-feed weights learned
+            from engagement (see engagement.source_weights); they multiply
+            config.RANKING_SOURCE_WEIGHTS.
+
+    Returns:
+        Ranker: Recency, keyword, source-weight and novelty features.
+    """
+    weights = config.RANKING_SOURCE_WEIGHTS
+    if learned_weights:
+        weights = {source: weights.get(source, 1.0) * learned_weights.get(source, 1.0)
+                   for source in set(weights) | set(learned_weights)}
+    return Ranker({
+        "recency": Recency(),
+        "keywords": KeywordMatch(),
+        "source": SourceWeight(weights),
+        "novelty": Novelty(recent_titles),
+    })
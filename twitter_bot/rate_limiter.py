@@ -0,0 +1,256 @@
+import logging
+import random
+import re
+import threading
+import time
+from typing import Optional, Dict, Callable, Any, Awaitable
+from urllib.parse import urlsplit
+
+try:
+    from . import config
+    from . import metrics
+    from .lazy import LazyModule
+except ImportError:
+    import config
+    import metrics
+    from lazy import LazyModule
+
+asyncio = LazyModule("asyncio")
+tweepy = LazyModule("tweepy")
+
+logger = logging.getLogger(__name__)
+
+# Maps X API v2 routes to the endpoint names used for rate-limit bookkeeping.
+ENDPOINT_ROUTES = [
+    ("POST", re.compile(r"^/2/tweets$"), "create_tweet"),
+    ("GET", re.compile(r"^/2/tweets$"), "get_tweets"),
+    ("GET", re.compile(r"^/2/users/by/username/[^/]+$"), "get_user"),
+    ("GET", re.compile(r"^/2/users(/by)?$"), "get_users"),
+    ("GET", re.compile(r"^/2/users/[^/]+/tweets$"), "get_users_tweets"),
+]
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when an endpoint's window won't reopen within the allowed wait.
+
+    Attributes:
+        reset_at (Optional[float]): When the window reopens (epoch seconds), if known.
+    """
+
+    def __init__(self, message: str, reset_at: Optional[float] = None):
+        super().__init__(message)
+        self.reset_at = reset_at
+
+def _record(endpoint: str, start: float, outcome: str):
+    metrics.observe("api_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+    metrics.inc("api_requests_total", endpoint=endpoint, outcome=outcome)
+
+def endpoint_for(method: str, url: str) -> Optional[str]:
+    """Returns the endpoint name for a request method and URL, or None if untracked."""
+    path = urlsplit(url).path
+    for route_method, pattern, name in ENDPOINT_ROUTES:
+        if method == route_method and pattern.match(path):
+            return name
+    return None
+
+class _Window:
+    """Token bucket for one endpoint, refilled when the API's window resets."""
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(self):
+        self.limit = None      # Requests allowed per window, once the API has told us
+        self.remaining = None  # Tokens left in the current window (None = unknown, don't throttle)
+        self.reset_at = 0.0    # Epoch seconds when the window resets
+
+class RateLimiter:
+    """
+    Client-side scheduler that keeps X API calls inside their rate limits.
+
+    Each endpoint has a token bucket sized from the x-rate-limit-limit,
+    x-rate-limit-remaining and x-rate-limit-reset response headers. A call
+    takes a token before it is sent; when the bucket is empty the caller waits
+    until the window resets. 429 responses and server errors are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, max_retries: Optional[int] = None, max_wait: Optional[float] = None,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep,
+                 async_sleep: Optional[Callable[[float], Awaitable[None]]] = None):
+        self.max_retries = config.X_API_MAX_RETRIES if max_retries is None else max_retries
+        self.max_wait = config.X_API_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep  # Defaults to asyncio.sleep, resolved on first use
+        self._lock = threading.Lock()
+        self._windows: Dict[str, _Window] = {}
+
+    def _window(self, endpoint: str) -> _Window:
+        window = self._windows.get(endpoint)
+        if window is None:
+            window = self._windows[endpoint] = _Window()
+        return window
+
+    def _reserve(self, endpoint: str) -> Optional[float]:
+        """
+        Takes a token for endpoint if one is available.
+
+        Returns:
+            Optional[float]: None if a token was taken, otherwise the seconds
+            until the window resets.
+
+        Raises:
+            RateLimitExceeded: If the wait would be longer than max_wait.
+        """
+        with self._lock:
+            window = self._window(endpoint)
+            now = self._clock()
+            if window.remaining is not None and window.remaining <= 0 and now >= window.reset_at:
+                # The window has reset; refill to the known limit, or stop throttling if unknown
+                window.remaining = window.limit
+            if window.remaining is None or window.remaining > 0:
+                if window.remaining is not None:
+                    window.remaining -= 1
+                return None
+            wait = window.reset_at - now
+        if wait > self.max_wait:
+            raise RateLimitExceeded(
+                f"Rate limit for {endpoint} resets in {wait:.0f}s, longer than the {self.max_wait}s allowed wait.",
+                reset_at=now + wait
+            )
+        return wait
+
+    def acquire(self, endpoint: str):
+        """
+        Takes a token for endpoint, waiting for the window to reset if needed.
+
+        Raises:
+            RateLimitExceeded: If the wait would be longer than max_wait.
+        """
+        while (wait := self._reserve(endpoint)) is not None:
+            metrics.inc("rate_limit_wait_seconds_total", wait, endpoint=endpoint)
+            self._sleep(wait)
+
+    async def acquire_async(self, endpoint: str):
+        """Like acquire(), but waits without blocking the event loop."""
+        while (wait := self._reserve(endpoint)) is not None:
+            metrics.inc("rate_limit_wait_seconds_total", wait, endpoint=endpoint)
+            await (self._async_sleep or asyncio.sleep)(wait)
+
+    def update(self, endpoint: str, headers):
+        """Updates an endpoint's window from x-rate-limit-* response headers."""
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            window = self._window(endpoint)
+            window.limit = limit
+            if reset_at > window.reset_at or window.remaining is None:
+                # A new window: the API's count is authoritative
+                window.remaining = remaining
+                window.reset_at = reset_at
+            else:
+                # Same window: requests we've sent since may not be counted yet
+                window.remaining = min(window.remaining, remaining)
+
+    def exhaust(self, endpoint: str, reset_at: float):
+        """Marks an endpoint as out of tokens until reset_at (e.g. after a 429)."""
+        with self._lock:
+            window = self._window(endpoint)
+            window.remaining = 0
+            window.reset_at = max(window.reset_at, reset_at)
+
+    def on_response(self, response, *args, **kwargs):
+        """requests response hook that feeds rate-limit headers into the limiter."""
+        endpoint = endpoint_for(response.request.method, response.request.url)
+        if endpoint is not None:
+            self.update(endpoint, response.headers)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from concurrent callers across the interval
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(self, endpoint: str, start: float, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Records a failed attempt and decides whether call() should retry it.
+
+        A 429 empties endpoint's bucket until the reset time the API reports,
+        so the next acquire() does the waiting; a 5xx is retried after a
+        jittered backoff.
+
+        Returns:
+            Seconds to sleep before the next attempt, or None if error should
+            be raised.
+        """
+        if isinstance(error, tweepy.TooManyRequests):
+            _record(endpoint, start, "rate_limited")
+            if attempt >= self.max_retries:
+                return None
+            reset_time = error.reset_time
+            if reset_time is None:
+                reset_time = self._clock() + self._backoff(attempt)
+            self.exhaust(endpoint, reset_time + random.uniform(0, 1))
+            metrics.inc("api_retries_total", endpoint=endpoint, reason="rate_limited")
+            logger.warning("Rate limited on %s; retry %d/%d after window reset.",
+                           endpoint, attempt + 1, self.max_retries)
+            return 0.0
+        if isinstance(error, tweepy.TwitterServerError):
+            _record(endpoint, start, "server_error")
+            if attempt >= self.max_retries:
+                return None
+            delay = self._backoff(attempt)
+            metrics.inc("api_retries_total", endpoint=endpoint, reason="server_error")
+            logger.warning("Server error on %s (%s); retry %d/%d in %.1fs.",
+                           endpoint, error, attempt + 1, self.max_retries, delay)
+            return delay
+        _record(endpoint, start, "error")
+        return None
+
+    def call(self, endpoint: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Calls func(*args, **kwargs) within endpoint's rate limit.
+
+        Waits for a token before each attempt. A 429 empties the bucket until
+        the reset time the API reports; 429s and 5xx errors are retried up to
+        max_retries times with jittered backoff. Other errors are raised.
+        """
+        attempt = 0
+        while True:
+            self.acquire(endpoint)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(endpoint, start, attempt, e)
+                if delay is None:
+                    raise
+                if delay:
+                    self._sleep(delay)
+            else:
+                _record(endpoint, start, "ok")
+                return result
+            attempt += 1
+
+    async def call_async(self, endpoint: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Like call(), for a coroutine function such as a tweepy AsyncClient method."""
+        attempt = 0
+        while True:
+            await self.acquire_async(endpoint)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(endpoint, start, attempt, e)
+                if delay is None:
+                    raise
+                if delay:
+                    await (self._async_sleep or asyncio.sleep)(delay)
+            else:
+                _record(endpoint, start, "ok")
+                return result
+            attempt += 1
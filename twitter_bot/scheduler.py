@@ -1,5 +1,12 @@
-from apscheduler.schedulers.blocking import BlockingScheduler
+# APScheduler is imported where schedulers are built, so importing this
+# module (e.g. for `python -m twitter_bot post`) stays cheap.
+import functools
+import logging
+import threading
 import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
 
 # Assuming main.py's post_latest_article is the function to schedule.
 # We need to ensure it can be imported and run correctly.
@@ -9,50 +16,214 @@ import time
 try:
     # Attempt to import from main, assuming it's in the same package
     from .main import post_latest_article
+    from . import main as main_module
+    from . import accounts
     from . import config # To ensure config is loaded
+    from . import logs
+    from . import metrics
+    from . import tweet_queue
 except ImportError:
     # Fallback for simpler structures or direct execution if PYTHONPATH is tricky
     # This implies that main.py and config.py are directly findable.
     # For robust packaging, the relative imports above are preferred.
-    print("Scheduler: Falling back to direct imports (main, config). Ensure PYTHONPATH is set if issues occur.")
+    logger.warning("Falling back to direct imports (main, config). Ensure PYTHONPATH is set if issues occur.")
     try:
         import main as main_module # Alias to avoid conflict if scheduler itself is main
         post_latest_article = main_module.post_latest_article
+        import accounts
         import config
+        import logs
+        import metrics
+        import tweet_queue
     except ImportError as e:
-        print(f"Scheduler: Critical - Could not import 'post_latest_article' from main or config. Error: {e}")
-        print("Scheduler: Please ensure 'main.py' and 'config.py' are in the same directory or python path.")
+        logger.critical("Could not import 'post_latest_article' from main or config. Error: %s", e)
+        logger.critical("Please ensure 'main.py' and 'config.py' are in the same directory or python path.")
         post_latest_article = None # Set to None to prevent scheduler from running with missing task
+        main_module = None
+        accounts = None
         config = None
+        tweet_queue = None
 
 
 # Schedule settings (can be moved to config.py later)
 POSTING_INTERVAL_HOURS = 4 # Example: post every 4 hours
 
+# Lane settings for the non-blocking scheduler mode ("lanes").
+# Each lane runs on its own thread pool, so a slow feed fetch never delays
+# a post that is already queued.
+INGEST_INTERVAL_MINUTES = 5      # Poll the feeds that are due (each feed keeps its own adaptive interval)
+POST_INTERVAL_MINUTES = 1        # Drain the outbound tweet queue
+ANALYTICS_INTERVAL_MINUTES = 60  # Poll profiles listed in ANALYTICS_USERNAMES and our tweets' engagement
+LANE_WORKERS = {"ingest": 2, "compose": 1, "post": 1, "analytics": 2}
+MISFIRE_GRACE_SECONDS = {"ingest": 300, "compose": 900, "post": 60, "analytics": 600}
+
+# Latest candidates from the ingest lane, handed to the compose lane
+_candidates = []
+_candidates_lock = threading.Lock()
+
 def scheduled_job():
     """The job that the scheduler will run."""
-    print(f"Scheduler: Running scheduled job - {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("Running scheduled job - %s", time.strftime('%Y-%m-%d %H:%M:%S'))
     if post_latest_article:
         try:
-            post_latest_article()
-            print("Scheduler: 'post_latest_article' executed successfully.")
+            with metrics.timer("job_seconds", job="post_latest_article"):
+                accounts.pipeline().post_latest_article()
+            logger.info("'post_latest_article' executed successfully.")
         except Exception as e:
-            print(f"Scheduler: Error during scheduled execution of 'post_latest_article': {e}")
+            metrics.inc("job_errors_total", job="post_latest_article")
+            logger.exception("Error during scheduled execution of 'post_latest_article': %s", e)
+        _export_metrics()
     else:
-        print("Scheduler: 'post_latest_article' function not loaded. Cannot run scheduled job.")
+        logger.error("'post_latest_article' function not loaded. Cannot run scheduled job.")
 
-if __name__ == '__main__':
+def _export_metrics():
+    """Writes the metrics file, if METRICS_PATH is set."""
+    if config.METRICS_PATH:
+        try:
+            metrics.REGISTRY.write(config.METRICS_PATH)
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", config.METRICS_PATH, e)
+
+def _instrumented(lane, func):
+    """Wraps a lane's job so its duration is recorded and the metrics file refreshed."""
+    @functools.wraps(func)
+    def job():
+        try:
+            with metrics.timer("job_seconds", job=lane):
+                return func()
+        finally:
+            _export_metrics()
+    return job
+
+def ingest_job():
+    """
+    Ingest lane: adds new articles to the candidates used by the compose lane.
+
+    Only feeds that are due get polled on a tick, so new candidates are merged
+    in front of the current ones instead of replacing them. With X_ACCOUNTS
+    set, the feeds are still fetched once for all accounts.
+    """
+    global _candidates
+    candidates = accounts.pipeline().ingest_articles()
+    with _candidates_lock:
+        seen = {a.key for a in candidates}
+        merged = candidates + [a for a in _candidates if a.key not in seen]
+        _candidates = merged[:main_module.MAX_CANDIDATES]
+        dropped = merged[main_module.MAX_CANDIDATES:]
+    # Candidates pushed out are offered again on their feeds' next poll
+    main_module.release_articles(dropped)
+
+def compose_job():
+    """Compose lane: queues a tweet for the best current candidate (per account, with X_ACCOUNTS set)."""
+    pipeline = accounts.pipeline()
+    with _candidates_lock:
+        candidates = list(_candidates)
+    if not candidates:
+        # Nothing ingested yet (e.g. first tick); fetch inline once
+        ingest_job()
+        with _candidates_lock:
+            candidates = list(_candidates)
+    pipeline.compose_article(candidates)
+
+def post_job():
+    """Post lane: posts tweets waiting in the outbound queue (every account's, with X_ACCOUNTS set)."""
+    accounts.pipeline().post_queued_tweets()
+
+def analytics_job():
+    """Analytics lane: refreshes profile data for the configured accounts and the engagement of our tweets."""
+    if config.ANALYTICS_USERNAMES:
+        main_module.twitter_client.get_twitter_users_info(config.ANALYTICS_USERNAMES)
+    accounts.pipeline().poll_engagement()
+
+def _on_job_event(event):
+    """Reports jobs that were skipped or failed, per lane."""
+    from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_ERROR
+
+    if event.code == EVENT_JOB_MISSED:
+        logger.warning("Job '%s' missed its run at %s; coalesced into the next one.",
+                       event.job_id, event.scheduled_run_time)
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        logger.warning("Job '%s' is still running; skipped an overlapping run.", event.job_id)
+    elif event.code == EVENT_JOB_ERROR:
+        metrics.inc("job_errors_total", job=event.job_id)
+        logger.error("Job '%s' raised an error: %s", event.job_id, event.exception)
+
+def build_lane_scheduler():
+    """
+    Builds a BackgroundScheduler with separate ingest, compose, post and analytics lanes.
+
+    Every lane has its own executor pool. Jobs run with max_instances=1 and
+    coalescing, so a long run never overlaps the next tick and missed runs
+    collapse into one. Runs later than the lane's misfire grace time are
+    skipped.
+
+    Returns:
+        BackgroundScheduler: The configured (not yet started) scheduler.
+    """
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_ERROR
+
+    executors = {lane: ThreadPoolExecutor(workers) for lane, workers in LANE_WORKERS.items()}
+    scheduler = BackgroundScheduler(
+        executors=executors,
+        job_defaults={"coalesce": True, "max_instances": 1},
+        timezone="UTC"
+    )
+    lanes = [
+        # Ingest straight away so the first compose has candidates
+        ("ingest", ingest_job, {"minutes": INGEST_INTERVAL_MINUTES, "next_run_time": datetime.now(timezone.utc)}),
+        ("compose", compose_job, {"hours": POSTING_INTERVAL_HOURS}),
+        ("post", post_job, {"minutes": POST_INTERVAL_MINUTES}),
+        ("analytics", analytics_job, {"minutes": ANALYTICS_INTERVAL_MINUTES}),
+    ]
+    for lane, func, trigger_args in lanes:
+        scheduler.add_job(
+            _instrumented(lane, func), 'interval', id=lane, name=lane, executor=lane,
+            misfire_grace_time=MISFIRE_GRACE_SECONDS[lane], **trigger_args
+        )
+    scheduler.add_listener(_on_job_event, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_ERROR)
+    return scheduler
+
+def run_lanes():
+    """Runs the lane scheduler until interrupted."""
+    logger.info("Starting lanes: %s", ", ".join(
+        f"{lane} ({workers} workers)" for lane, workers in LANE_WORKERS.items()))
+    logger.info("Press Ctrl+C to exit.")
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_PORT)
+        logger.info("Serving metrics on http://127.0.0.1:%d/metrics", config.METRICS_PORT)
+    scheduler = build_lane_scheduler()
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(1)
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Shutting down...")
+    finally:
+        scheduler.shutdown(wait=False)
+
+def run_scheduler():
+    """Runs the scheduler in config.SCHEDULER_MODE until interrupted. Logging must be set up by the caller."""
+    if tweet_queue:
+        tweet_queue.check_lease()
     if not post_latest_article or not config:
-        print("Scheduler: Exiting. Core components (post_latest_article or config) not loaded.")
-    elif not config.X_API_KEY: # Check if API keys are likely missing
-        print("Scheduler: WARNING - Twitter API keys not found in config.")
-        print("Scheduler: The bot will run, but tweet posting will likely fail.")
-        print("Scheduler: Please ensure your .env file is set up correctly in the 'twitter_bot' directory.")
+        logger.critical("Exiting. Core components (post_latest_article or config) not loaded.")
+    elif not config.X_API_KEY and not config.X_ACCOUNTS: # Check if API keys are likely missing
+        logger.warning("Twitter API keys not found in config.")
+        logger.warning("The bot will run, but tweet posting will likely fail.")
+        logger.warning("Please ensure your .env file is set up correctly in the 'twitter_bot' directory.")
         # Proceed to run the scheduler anyway, as it might be intentional for testing other parts
 
-    if post_latest_article:
-        print(f"Scheduler: Starting scheduler to run 'post_latest_article' every {POSTING_INTERVAL_HOURS} hours.")
-        print("Scheduler: Press Ctrl+C to exit.")
+    if post_latest_article and config.SCHEDULER_MODE == "lanes":
+        run_lanes()
+    elif post_latest_article:
+        from apscheduler.schedulers.blocking import BlockingScheduler
+
+        logger.info("Starting scheduler to run 'post_latest_article' every %s hours.", POSTING_INTERVAL_HOURS)
+        logger.info("Press Ctrl+C to exit.")
+        if config.METRICS_PORT:
+            metrics.serve(config.METRICS_PORT)
 
         scheduler = BlockingScheduler(timezone="UTC") # Or your local timezone
 
@@ -65,8 +236,13 @@ if __name__ == '__main__':
         try:
             scheduler.start()
         except (KeyboardInterrupt, SystemExit):
-            print("Scheduler: Shutting down...")
+            logger.info("Shutting down...")
         except Exception as e:
-            print(f"Scheduler: An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
     else:
-        print("Scheduler: Not starting due to missing 'post_latest_article' function.")
+        logger.critical("Not starting due to missing 'post_latest_article' function.")
+
+if __name__ == '__main__':
+    if config:
+        logs.setup_logging()
+    run_scheduler()
@@ -0,0 +1,24 @@
+import os
+import sqlite3
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database used by one of the bot's local stores.
+
+    Parent directories are created as needed and the database is switched to
+    WAL mode so readers don't block the writer. The connection may be shared
+    between threads; callers serialize access with their own lock.
+
+    Args:
+        path (str): Path to the database file, or ":memory:".
+
+    Returns:
+        sqlite3.Connection: The open connection.
+    """
+    if path != ":memory:":
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
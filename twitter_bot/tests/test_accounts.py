@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from twitter_bot import accounts, config, main, metrics
+from twitter_bot.accounts import Account, AccountPool
+from twitter_bot.article import Article
+from twitter_bot.engagement import EngagementStore
+from twitter_bot.tweet_queue import TweetQueue
+
+CREDENTIALS = ("key", "secret", "token", "token-secret")
+
+
+def _account(name, topics=(), feeds=(), template=None, credentials=CREDENTIALS):
+    return Account(name, *credentials, topics=tuple(topics), feeds=tuple(feeds), template=template)
+
+
+class TestAccountConfig(unittest.TestCase):
+
+    def test_reads_credentials_and_routing_rules_from_the_environment(self):
+        environ = {"X_DATA_TEAM_API_KEY": "k", "X_DATA_TEAM_API_SECRET_KEY": "s", "X_DATA_TEAM_ACCESS_TOKEN": "t",
+                   "X_DATA_TEAM_ACCESS_TOKEN_SECRET": "ts", "X_DATA_TEAM_TOPICS": "big data, analytics,",
+                   "X_DATA_TEAM_FEEDS": "https://a.test/feed", "X_DATA_TEAM_TEMPLATE": "Data: {title} {link}"}
+
+        account = accounts.load_account("data-team", environ)
+
+        self.assertEqual(account, Account("data-team", "k", "s", "t", "ts", ("big data", "analytics"),
+                                          ("https://a.test/feed",), "Data: {title} {link}"))
+        self.assertTrue(account.has_credentials)
+        self.assertFalse(accounts.load_account("other", environ).has_credentials)
+
+    def test_rejects_names_that_are_not_safe_paths(self):
+        for name in ("../x", "a b", ""):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                accounts.load_account(name, {})
+        with self.assertRaises(ValueError):
+            AccountPool([_account("a"), _account("a")])
+
+    def test_pipeline_is_main_without_accounts(self):
+        with patch.object(config, "X_ACCOUNTS", []):
+            self.assertIs(accounts.pipeline(), main)
+        with patch.object(config, "X_ACCOUNTS", ["a"]):
+            self.assertIs(accounts.pipeline(), accounts)
+
+
+class TestRouting(unittest.TestCase):
+
+    def test_topics_match_whole_words_and_phrases(self):
+        account = _account("ai", topics=["AI", "machine learning"])
+
+        self.assertTrue(account.matches(Article("New AI chips", "https://a.test/1")))
+        self.assertTrue(account.matches(Article("Survey", "https://a.test/2", summary="On Machine-Learning ops")))
+        self.assertFalse(account.matches(Article("He said it was fine", "https://a.test/3")))
+        self.assertFalse(account.matches(Article("Learning machines", "https://a.test/4")))
+
+    def test_feeds_restrict_and_empty_rules_take_everything(self):
+        pool = AccountPool([_account("all"), _account("feed", feeds=["https://a.test/feed"])])
+
+        from_feed = Article("Anything", "https://a.test/1", source="https://a.test/feed")
+        elsewhere = Article("Anything", "https://a.test/2", source="https://b.test/feed")
+        self.assertEqual([a.name for a in pool.route(from_feed)], ["all", "feed"])
+        self.assertEqual([a.name for a in pool.route(elsewhere)], ["all"])
+
+
+class TestAccountPool(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = patch.object(config, "ACCOUNTS_DIR", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        metrics.REGISTRY.reset()
+        self.pool = AccountPool([
+            _account("ai", topics=["ai"]),
+            _account("data", topics=["data"], template="Data: {title} {link}"),
+            _account("nokeys", credentials=(None,) * 4),
+        ])
+
+    def _queued(self, name):
+        with TweetQueue(self.pool.account(name).queue_path) as queue:
+            return [tweet.text for tweet in iter(queue.claim, None)]
+
+    def test_compose_queues_each_account_its_routed_articles(self):
+        candidates = [Article("AI and data", "https://a.test/1"), Article("Only AI", "https://a.test/2")]
+
+        queued = self.pool.compose(candidates)
+
+        self.assertEqual(queued, {"ai": True, "data": True, "nokeys": True})
+        self.assertEqual(self._queued("data"), ["Data: AI and data https://a.test/1"])
+        self.assertEqual(len(self._queued("ai")), 1)
+        routed = metrics.REGISTRY.snapshot()["articles_routed_total"]
+        self.assertEqual({key[0][1]: value for key, value in routed.items()}, {"ai": 2, "data": 1, "nokeys": 2})
+
+    def test_each_account_posts_with_its_own_client_and_rate_limiter(self):
+        clients = {}
+
+        def build_client(api_key, api_secret_key, access_token, access_token_secret, limiter):
+            client = MagicMock()
+            client.create_tweet.return_value = MagicMock(data={"id": str(len(clients))})
+            clients[limiter] = client
+            return client
+
+        self.pool.compose([Article("AI and data", "https://a.test/1")])
+        with patch.object(accounts.twitter_client, "build_client", side_effect=build_client):
+            handled = self.pool.post()
+            self.pool.post()
+
+        self.assertEqual(handled, {"ai": 1, "data": 1, "nokeys": 0})
+        # One client per account with credentials, each bound to that account's limiter
+        self.assertEqual(set(clients), {self.pool.rate_limiters["ai"], self.pool.rate_limiters["data"]})
+        for client in clients.values():
+            client.create_tweet.assert_called_once()
+        self.assertEqual(len(self._queued("nokeys")), 1)  # Waits for credentials
+
+    def test_a_failing_account_does_not_hold_up_the_others(self):
+        self.pool.compose([Article("AI and data", "https://a.test/1")])
+
+        def send_tweet(name, text):
+            if name == "ai":
+                raise OSError("rate limited")
+            return MagicMock(data={"id": "1"})
+
+        with patch.object(self.pool, "send_tweet", side_effect=send_tweet):
+            handled = self.pool.post()
+
+        self.assertEqual(handled, {"ai": 1, "data": 1, "nokeys": 0})
+        posts = metrics.REGISTRY.snapshot()["queue_posts_total"]
+        self.assertEqual({dict(key)["account"]: dict(key)["outcome"] for key in posts}, {"ai": "retry", "data": "sent"})
+
+    def test_engagement_is_polled_with_each_accounts_client(self):
+        self.pool.compose([Article("AI and data", "https://a.test/1", source="https://a.test/feed")])
+        clients = {}
+
+        def build_client(api_key, api_secret_key, access_token, access_token_secret, limiter):
+            client = MagicMock()
+            client.create_tweet.return_value = MagicMock(data={"id": str(len(clients) + 1)})
+            client.get_tweets.side_effect = lambda ids, **kwargs: MagicMock(
+                data=[MagicMock(id=i, public_metrics={"like_count": 3}) for i in ids])
+            clients[limiter] = client
+            return client
+
+        with patch.object(accounts.twitter_client, "build_client", side_effect=build_client), \
+             patch.object(config, "ENGAGEMENT_PATH", os.path.join(config.ACCOUNTS_DIR, "engagement.sqlite3")):
+            self.pool.post()
+            self.assertEqual(self.pool.poll_engagement(), {"ai": 1, "data": 1, "nokeys": 0})
+            with EngagementStore() as store:
+                self.assertEqual(store.engagement_by_source(0, account="ai"), {"https://a.test/feed": (1, 3)})
+
+        for name in ("ai", "data"):
+            clients[self.pool.rate_limiters[name]].get_tweets.assert_called_once()
+
+    def test_feeds_are_fetched_once_for_all_accounts(self):
+        articles = [Article("AI news", "https://a.test/1"), Article("Data news", "https://a.test/2")]
+        with patch.object(accounts, "_pool", self.pool), \
+             patch.object(config, "X_ACCOUNTS", ["ai", "data", "nokeys"]), \
+             patch.object(accounts, "FeedCache", return_value=MagicMock()), \
+             patch.object(accounts, "FeedStateStore", return_value=MagicMock()), \
+             patch.object(main, "FeedStateStore", return_value=MagicMock()), \
+             patch.object(main.content_manager, "iter_rss_feeds", return_value=(a for a in articles)) as mock_feeds:
+            self.assertTrue(accounts.compose_latest_article())
+
+        mock_feeds.assert_called_once()
+        self.assertEqual(self._queued("ai"), ["News: AI news https://a.test/1"])
+        self.assertEqual(self._queued("data"), ["Data: Data news https://a.test/2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from twitter_bot.article import Article
+from twitter_bot.posted_index import normalize_url, title_hash
+
+
+class TestArticle(unittest.TestCase):
+
+    def test_dedup_keys_are_precomputed(self):
+        article = Article("  Data Quality Matters ", " https://www.example.com/a/?utm_source=rss ")
+
+        self.assertEqual(article.title, "Data Quality Matters")
+        self.assertEqual(article.link, "https://www.example.com/a/?utm_source=rss")
+        self.assertEqual(article.url_key, normalize_url(article.link))
+        self.assertEqual(article.title_key, title_hash("data quality matters"))
+        self.assertEqual(article.key, article.url_key)
+
+    def test_uses_slots(self):
+        article = Article("Title", "https://example.com/a")
+        self.assertFalse(hasattr(article, "__dict__"))
+        with self.assertRaises(AttributeError):
+            article.extra = 1
+
+    def test_dict_round_trip(self):
+        article = Article("Title", "https://example.com/a", published=1700000000.0, source="https://example.com/feed",
+                          summary="Short summary.")
+        data = article.to_dict()
+
+        self.assertEqual(data, {"title": "Title", "link": "https://example.com/a",
+                                "published": 1700000000.0, "source": "https://example.com/feed",
+                                "summary": "Short summary."})
+        self.assertEqual(Article.from_dict(data), article)
+        self.assertEqual(Article.from_dict({"title": "Old", "link": "https://example.com/b"}).published, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from twitter_bot import content_manager, twitter_client
+from twitter_bot.async_twitter_client import AsyncTwitterClient
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+from twitter_bot.feed_cache import FeedCache
+from twitter_bot.rate_limiter import RateLimiter
+
+
+@patch.multiple('twitter_bot.config', X_API_KEY="key", X_API_SECRET_KEY="secret",
+                X_ACCESS_TOKEN="token", X_ACCESS_TOKEN_SECRET="token_secret")
+class TestAsyncTwitterClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        twitter_client.clear_user_cache()
+
+    async def _client(self, **kwargs):
+        client = AsyncTwitterClient(rate_limiter=RateLimiter(), **kwargs)
+        await client.start()
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_calls_share_one_session(self):
+        client = await self._client()
+        self.assertIs(client.client.session, client.session)
+
+    async def test_concurrency_is_bounded(self):
+        client = await self._client(max_concurrency=5)
+        in_flight = peak = 0
+
+        async def create_tweet(text):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(data={"id": text})
+
+        client.client.create_tweet = create_tweet
+        responses = await asyncio.gather(*(client.post_tweet(f"tweet {i}") for i in range(50)))
+
+        self.assertEqual(len([r for r in responses if r is not None]), 50)
+        self.assertEqual(peak, 5)
+
+    async def test_timeout_abandons_call(self):
+        client = await self._client()
+
+        async def slow(**kwargs):
+            await asyncio.sleep(10)
+
+        client.client.create_tweet = slow
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.send_tweet("slow", timeout=0.05)
+        self.assertIsNone(await client.post_tweet("slow", timeout=0.05))
+
+    async def test_calls_default_to_the_client_timeout(self):
+        client = await self._client(timeout=0.05)
+
+        async def slow(**kwargs):
+            await asyncio.sleep(10)
+
+        client.client.create_tweet = slow
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.send_tweet("slow")
+
+    async def test_rate_limit_wait_holds_no_slot_and_is_not_timed(self):
+        client = await self._client(max_concurrency=1)
+        client.rate_limiter.exhaust("create_tweet", client.rate_limiter._clock() + 0.2)
+        client.client.create_tweet = AsyncMock(return_value=MagicMock(data={"id": "1"}))
+        client.client.get_user = AsyncMock(return_value=MagicMock(data=None))
+
+        throttled = asyncio.create_task(client.send_tweet("waits for the window", timeout=0.1))
+        await asyncio.sleep(0.01)
+        # The throttled call is waiting on its window, not on the only slot
+        await asyncio.wait_for(client.get_twitter_user_info("someone"), 0.1)
+
+        response = await throttled
+        self.assertEqual(response.data["id"], "1")
+
+    async def test_cancellation_releases_slot(self):
+        client = await self._client(max_concurrency=1)
+        started = asyncio.Event()
+
+        async def hang(**kwargs):
+            started.set()
+            await asyncio.sleep(10)
+
+        client.client.create_tweet = hang
+        task = asyncio.create_task(client.send_tweet("stuck"))
+        await started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        client.client.create_tweet = AsyncMock(return_value=MagicMock(data={"id": "2"}))
+        response = await client.send_tweet("next", timeout=1)
+        self.assertEqual(response.data["id"], "2")
+
+    async def test_user_lookups_use_shared_cache(self):
+        client = await self._client()
+        user = MagicMock(id="42", username="someone", public_metrics={"followers_count": 7}, created_at=None)
+        client.client.get_users = AsyncMock(return_value=MagicMock(data=[user]))
+        client.client.get_users_tweets = AsyncMock(return_value=MagicMock(data=[], includes={}))
+
+        results = await client.get_twitter_users_info(["someone", "SOMEONE", "missing"])
+        self.assertEqual(results["someone"]["followers_count"], 7)
+        self.assertEqual(results["SOMEONE"]["id"], "42")
+        self.assertIsNone(results["missing"])
+        client.client.get_users.assert_awaited_once()
+
+        # A later lookup (sync or async) is served from the cache
+        client.client.get_user = AsyncMock()
+        info = await client.get_twitter_user_info("Someone")
+        self.assertEqual(info["id"], "42")
+        client.client.get_user.assert_not_awaited()
+        self.assertEqual(twitter_client.profile_cache.peek("someone")["id"], "42")
+
+    async def test_rate_limit_headers_update_the_limiter(self):
+        client = await self._client()
+        params = MagicMock(method="POST", url="https://api.twitter.com/2/tweets")
+        params.response.headers = {"x-rate-limit-limit": "200", "x-rate-limit-remaining": "0",
+                                   "x-rate-limit-reset": "9999999999"}
+        await client._on_request_end(None, None, params)
+
+        window = client.rate_limiter._windows["create_tweet"]
+        self.assertEqual((window.limit, window.remaining), (200, 0))
+
+
+class TestFetchRssFeedsAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def test_fetches_feeds_in_order_with_conditional_get(self):
+        with StandInServer() as server, FeedCache(":memory:") as cache:
+            urls = [server.add_feed("/slow.xml", make_rss(2, "Slow"), latency=0.1),
+                    server.add_feed("/fast.xml", make_rss(3, "Fast"))]
+            first = await content_manager.fetch_rss_feeds_async(urls, cache=cache)
+            second = await content_manager.fetch_rss_feeds_async(urls, cache=cache)
+
+        self.assertEqual([a.title for a in first], ["Slow 0", "Slow 1", "Fast 0", "Fast 1", "Fast 2"])
+        self.assertEqual(second, first)
+        self.assertEqual(server.not_modified_count, 2)
+
+    async def test_deadline_and_errors_skip_feeds(self):
+        with StandInServer() as server:
+            urls = [server.add_feed("/stuck.xml", make_rss(1), latency=0.8),
+                    server.base_url + "/missing.xml",
+                    server.add_feed("/ok.xml", make_rss(1, "Ok"))]
+            articles = await content_manager.fetch_rss_feeds_async(urls, deadline=0.2)
+
+        self.assertEqual([a.title for a in articles], ["Ok 0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from twitter_bot import composer, twitter_client
+from twitter_bot.article import Article
+
+
+class TestWeightedLength(unittest.TestCase):
+
+    def test_latin_counts_once_and_cjk_twice(self):
+        self.assertEqual(composer.weighted_length("hello"), 5)
+        self.assertEqual(composer.weighted_length("日本語"), 6)
+        self.assertEqual(composer.weighted_length("café — “quoted”"), 15)
+
+    def test_emoji_sequences_count_two(self):
+        for emoji in ("👍", "👍🏽", "👨‍👩‍👧", "🇫🇷", "1️⃣", "❤️"):
+            self.assertEqual(composer.weighted_length(emoji), 2, emoji)
+
+    def test_urls_count_as_tco_length(self):
+        self.assertEqual(composer.weighted_length("https://example.com/" + "a" * 500), 23)
+        self.assertEqual(composer.weighted_length("see http://x.io"), 4 + 23)
+
+    def test_text_is_nfc_normalized(self):
+        self.assertEqual(composer.weighted_length("café"), 4)
+
+
+class TestTruncate(unittest.TestCase):
+
+    def test_ellipsis_counts_double(self):
+        self.assertEqual(composer.weighted_length(composer.ELLIPSIS), 2)
+
+    def test_short_text_is_unchanged(self):
+        self.assertEqual(composer.truncate("exactly ten", 11), "exactly ten")
+
+    def test_cuts_on_grapheme_boundaries(self):
+        self.assertEqual(composer.truncate("ab👨‍👩‍👧cd", 4), "ab…")
+        self.assertEqual(composer.truncate("xक्षyz", 5), "xक्…")  # Virama stays with its consonant
+        text = "日本語のテキスト"
+        truncated = composer.truncate(text, 9)
+        self.assertEqual(truncated, "日本語…")
+        self.assertEqual(composer.weighted_length(truncated), 8)
+
+
+class TestCompose(unittest.TestCase):
+
+    def test_long_title_is_truncated_to_fit(self):
+        article = Article("漢字" * 200, "https://example.com/" + "p" * 300)
+        text = composer.compose(article, "News: {title} {link}")
+
+        self.assertEqual(composer.weighted_length(text), 280)
+        self.assertTrue(text.startswith("News: 漢字"))
+        self.assertTrue(text.endswith("… https://example.com/" + "p" * 300))
+
+    def test_short_title_is_not_truncated(self):
+        article = Article("A" * 250, "https://example.com/a")
+        self.assertEqual(composer.compose(article, "{title} {link}"), "A" * 250 + " https://example.com/a")
+
+    def test_templates_are_compiled_once(self):
+        composer.compile_template.cache_clear()
+        articles = [Article(f"Story {i}", f"https://example.com/{i}") for i in range(100)]
+        for article in articles:
+            composer.compose(article, "{title} via {source}: {link}")
+
+        info = composer.compile_template.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 99))
+
+    def test_invalid_templates_raise(self):
+        with self.assertRaises(ValueError):
+            composer.Template("{title!r}")
+        with self.assertRaises(ValueError):
+            composer.compose(Article("t", "https://example.com"), "x" * 300 + " {title}")
+
+
+class TestSendTweetLength(unittest.TestCase):
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_uses_weighted_length(self, mock_get_client):
+        mock_get_client.return_value.create_tweet.return_value = MagicMock(data={"id": "1"})
+        long_url_tweet = "a" * 250 + " https://example.com/" + "p" * 100
+        twitter_client.send_tweet(long_url_tweet)
+        mock_get_client.return_value.create_tweet.assert_called_once_with(text=long_url_tweet)
+
+        with self.assertRaises(ValueError):
+            twitter_client.send_tweet("字" * 141)
+
+
+if __name__ == '__main__':
+    unittest.main()
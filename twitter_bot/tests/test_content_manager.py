@@ -0,0 +1,176 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from twitter_bot import content_manager
+from twitter_bot.article import Article
+from twitter_bot.feed_cache import FeedCache
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+
+
+def _fake_download(latencies):
+    """Returns a _download_feed replacement serving a small feed after a delay."""
+    def download(url, timeout, etag=None, modified=None):
+        time.sleep(latencies.get(url, 0))
+        if url == "http://feeds.test/broken":
+            raise OSError("connection refused")
+        return 200, make_rss(2, title_prefix=url, base_link=url), {}
+    return download
+
+
+class TestFetchRssFeeds(unittest.TestCase):
+
+    def test_results_follow_feed_order_not_completion_order(self):
+        urls = ["http://feeds.test/slow", "http://feeds.test/fast"]
+        latencies = {"http://feeds.test/slow": 0.2, "http://feeds.test/fast": 0.0}
+        with patch.object(content_manager, "_download_feed", _fake_download(latencies)):
+            articles = content_manager.fetch_rss_feeds(urls, max_workers=2)
+
+        self.assertEqual(len(articles), 4)
+        self.assertTrue(articles[0].link.startswith("http://feeds.test/slow"))
+        self.assertTrue(articles[-1].link.startswith("http://feeds.test/fast"))
+
+    def test_feeds_are_fetched_concurrently(self):
+        urls = [f"http://feeds.test/{i}" for i in range(5)]
+        latencies = {url: 0.2 for url in urls}
+        with patch.object(content_manager, "_download_feed", _fake_download(latencies)):
+            start = time.perf_counter()
+            articles = content_manager.fetch_rss_feeds(urls, max_workers=5)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(articles), 10)
+        self.assertLess(elapsed, 0.8)  # Sequential would take at least 1.0s
+
+    def test_deadline_skips_pending_feeds(self):
+        urls = ["http://feeds.test/fast", "http://feeds.test/stuck"]
+        latencies = {"http://feeds.test/stuck": 1.0}
+        with patch.object(content_manager, "_download_feed", _fake_download(latencies)):
+            start = time.perf_counter()
+            articles = content_manager.fetch_rss_feeds(urls, max_workers=2, deadline=0.2)
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual([a.link for a in articles],
+                         ["http://feeds.test/fast/0", "http://feeds.test/fast/1"])
+
+    def test_articles_carry_source_and_published_time(self):
+        with patch.object(content_manager, "_download_feed", _fake_download({})):
+            article = content_manager.fetch_rss_feeds(["http://feeds.test/a"])[0]
+
+        self.assertEqual(article.source, "http://feeds.test/a")
+        self.assertEqual(article.published, 1736121600.0)  # Mon, 06 Jan 2025 00:00:00 GMT
+
+    def test_failing_feed_does_not_drop_others(self):
+        urls = ["http://feeds.test/broken", "http://feeds.test/ok"]
+        with patch.object(content_manager, "_download_feed", _fake_download({})):
+            articles = content_manager.fetch_rss_feeds(urls)
+
+        self.assertEqual(len(articles), 2)
+        self.assertTrue(all(a.link.startswith("http://feeds.test/ok") for a in articles))
+
+
+class TestIterRssFeeds(unittest.TestCase):
+
+    def test_yields_in_completion_order(self):
+        urls = ["http://feeds.test/slow", "http://feeds.test/fast"]
+        latencies = {"http://feeds.test/slow": 0.2}
+        with patch.object(content_manager, "_download_feed", _fake_download(latencies)):
+            links = [a.link for a in content_manager.iter_rss_feeds(urls, max_workers=2)]
+
+        self.assertEqual(links[0], "http://feeds.test/fast/0")
+        self.assertEqual(len(links), 4)
+
+    def test_limit_stops_early_and_cancels_pending_feeds(self):
+        urls = [f"http://feeds.test/{i}" for i in range(20)]
+        fetched = []
+        download = _fake_download({})
+
+        def tracking_download(url, timeout, **kwargs):
+            fetched.append(url)
+            return download(url, timeout, **kwargs)
+
+        with patch.object(content_manager, "_download_feed", tracking_download):
+            articles = list(content_manager.iter_rss_feeds(urls, max_workers=1, limit=3))
+
+        self.assertEqual(len(articles), 3)
+        self.assertLess(len(fetched), len(urls))
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def test_not_modified_feed_reuses_cached_articles(self):
+        with StandInServer() as server, FeedCache(":memory:") as cache:
+            url = server.add_feed("/feed.xml", make_rss(3))
+            first = content_manager.fetch_rss_feeds([url], cache=cache)
+            with patch.object(content_manager.feed_parser, "parse") as mock_parse:
+                second = content_manager.fetch_rss_feeds([url], cache=cache)
+
+            mock_parse.assert_not_called()
+            self.assertEqual(first, second)
+            self.assertEqual(server.not_modified_count, 1)
+            stats = cache.stats()
+            self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+            self.assertEqual(stats["bytes_saved"], len(make_rss(3)))
+
+    def test_changed_feed_is_parsed_again(self):
+        with StandInServer() as server, FeedCache(":memory:") as cache:
+            url = server.add_feed("/feed.xml", make_rss(1))
+            content_manager.fetch_rss_feeds([url], cache=cache)
+            server.add_feed("/feed.xml", make_rss(2))
+            articles = content_manager.fetch_rss_feeds([url], cache=cache)
+
+            self.assertEqual(len(articles), 2)
+            self.assertEqual(cache.stats()["misses"], 2)
+
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+
+    def test_same_story_from_different_feeds_is_clustered(self):
+        index = content_manager.NearDuplicateIndex(threshold=0.5, max_size=100)
+        first = Article("OpenAI unveils GPT-5 model with improved reasoning", "https://a.test/1")
+        variant = Article("OpenAI unveils new GPT-5 model with improved reasoning", "https://b.test/x?ref=rss")
+        other = Article("Stock markets fall as inflation data surprises", "https://c.test/2")
+
+        self.assertIsNone(index.add(first))
+        self.assertEqual(index.add(variant), first.key)
+        self.assertIsNone(index.add(other))
+
+    def test_summaries_are_shingled_too(self):
+        summary = "The central bank raised its benchmark rate by a quarter point on Wednesday, citing persistent inflation."
+        index = content_manager.NearDuplicateIndex(threshold=0.5, max_size=100)
+        self.assertIsNone(index.add(Article("Fed hikes rates", "https://a.test/1", summary=summary)))
+        self.assertIsNotNone(index.add(Article("Rates go up again", "https://b.test/1", summary=summary)))
+
+    def test_index_is_bounded(self):
+        index = content_manager.NearDuplicateIndex(max_size=2)
+        first = Article("Quantum computing startup raises funding", "https://a.test/1")
+        index.add(first)
+        index.add(Article("Gardening tips for the spring season", "https://a.test/2"))
+        index.add(Article("Local team wins the championship final", "https://a.test/3"))
+
+        self.assertEqual(len(index), 2)
+        # The evicted story is new again
+        self.assertIsNone(index.add(Article(first.title, "https://b.test/1")))
+        self.assertTrue(all(index._buckets[0].values()))
+
+    def test_iter_rss_feeds_keeps_one_article_per_story(self):
+        titles = {"http://feeds.test/a": "Chipmaker reports record quarterly revenue",
+                  "http://feeds.test/b": "Chipmaker reports record quarterly revenue growth",
+                  "http://feeds.test/c": "City council approves new cycling lanes"}
+        def download(url, timeout, etag=None, modified=None):
+            return 200, make_rss(1, title_prefix=titles[url], base_link=url), {}
+        index = content_manager.NearDuplicateIndex(max_size=100)
+        with patch.object(content_manager, "_download_feed", download):
+            articles = list(content_manager.iter_rss_feeds(list(titles), max_workers=1, dedup=index))
+
+        self.assertEqual(len(articles), 2)
+        self.assertEqual({a.source for a in articles}, {"http://feeds.test/a", "http://feeds.test/c"})
+
+    def test_summary_is_plain_text(self):
+        self.assertEqual(content_manager._plain_text("<p>Hello &amp;\n <b>world</b></p>"), "Hello & world")
+        self.assertIsNone(content_manager._plain_text(""))
+
+
+if __name__ == '__main__':
+    unittest.main()
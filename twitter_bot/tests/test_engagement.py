@@ -0,0 +1,190 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from twitter_bot import config, engagement, main
+from twitter_bot.article import Article
+from twitter_bot.benchmarks.standin import StandInServer
+from twitter_bot.engagement import EngagementStore, Sample
+from twitter_bot.rate_limiter import RateLimiter
+from twitter_bot.tests.test_standin import _client
+from twitter_bot.tweet_queue import SentTweet, TweetQueue
+
+NOW = 1_800_000_000  # On an hour boundary
+HOUR = 3600
+
+
+def _metrics(likes=0, retweets=0, replies=0, quotes=0, impressions=0):
+    return {"like_count": likes, "retweet_count": retweets, "reply_count": replies, "quote_count": quotes,
+            "impression_count": impressions}
+
+
+def _sent(tweet_id, source="https://a.test/feed", sent_at=NOW - HOUR):
+    return SentTweet(str(tweet_id), f"https://a.test/{tweet_id}", source, sent_at)
+
+
+def _not_found(tweet_id):
+    return {"value": tweet_id, "resource_id": tweet_id, "title": "Not Found Error",
+            "type": "https://api.twitter.com/2/problems/resource-not-found"}
+
+
+class TestEngagementStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = EngagementStore(":memory:")
+        self.addCleanup(self.store.close)
+
+    def test_appends_only_changes(self):
+        self.assertEqual(self.store.track([_sent(1), _sent(2)]), 2)
+        self.assertEqual(self.store.track([_sent(1)]), 0)
+
+        self.assertEqual(self.store.record({"1": _metrics(likes=3, impressions=50), "2": _metrics()}, NOW), 1)
+        self.assertEqual(self.store.record({"1": _metrics(likes=3, impressions=50)}, NOW + 60), 0)
+        self.assertEqual(self.store.record({"1": _metrics(likes=2, retweets=1, impressions=80)}, NOW + 120), 1)
+
+        self.assertEqual(self.store.series("1"), [Sample(NOW, 3, 0, 0, 0, 50), Sample(NOW + 120, -1, 1, 0, 0, 30)])
+        self.assertEqual(self.store.series("1", start=NOW + 1), [Sample(NOW + 120, -1, 1, 0, 0, 30)])
+        self.assertEqual(self.store.series("2"), [])
+        self.assertEqual(self.store.totals("1"),
+                         {"likes": 2, "retweets": 1, "replies": 0, "quotes": 0, "impressions": 80})
+
+    def test_young_tweets_are_polled_more_often(self):
+        self.store.track([_sent(1, sent_at=NOW - HOUR), _sent(2, sent_at=NOW - 48 * HOUR),
+                          _sent(3, sent_at=NOW - 30 * 24 * HOUR)])
+        self.assertEqual(self.store.due(NOW), ["2", "1"])  # Tweet 3 is past ENGAGEMENT_TRACK_DAYS
+
+        self.store.record({"1": _metrics(), "2": _metrics()}, NOW)
+        self.assertEqual(self.store.due(NOW + HOUR), ["1"])
+        self.assertEqual(self.store.due(NOW + 5 * HOUR), ["2", "1"])  # A 2-day-old tweet waits over 4 hours
+
+        self.store.record({}, NOW + 4 * HOUR, deleted=["1"])
+        self.assertEqual(self.store.due(NOW + 8 * HOUR), ["2"])
+
+    def test_downsampling_keeps_range_sums(self):
+        self.store.track([_sent(1, sent_at=NOW - 10 * HOUR)])
+        for minute in range(0, 180, 10):
+            self.store.record({"1": _metrics(likes=minute // 10 + 1)}, NOW - 5 * HOUR + minute * 60)
+
+        removed = self.store.downsample(NOW - 2 * HOUR)
+
+        series = self.store.series("1")
+        self.assertEqual(removed, 18 - len(series))
+        self.assertEqual([s.ts for s in series], [NOW - 5 * HOUR, NOW - 4 * HOUR, NOW - 3 * HOUR])
+        self.assertEqual([s.likes for s in series], [6, 6, 6])
+        self.assertEqual(self.store.downsample(NOW - 2 * HOUR), 0)
+
+    def test_source_weights_favor_engaging_feeds(self):
+        good, poor = "https://good.test/feed", "https://poor.test/feed"
+        self.store.track([_sent(i, good if i < 10 else poor) for i in range(20)])
+        self.store.record({str(i): _metrics(likes=30 if i < 10 else 10, impressions=1000) for i in range(20)}, NOW)
+
+        self.assertEqual(self.store.engagement_by_source(NOW - 2 * HOUR), {good: (10, 300), poor: (10, 100)})
+        weights = self.store.source_weights(NOW - 2 * HOUR)
+        self.assertGreater(weights[good], 1.0)
+        self.assertLess(weights[poor], 1.0)
+        self.assertEqual(self.store.source_weights(NOW - 2 * HOUR, max_weight=1.2)[good], 1.2)
+        self.assertEqual(self.store.source_weights(NOW + HOUR), {})  # Nothing posted since
+
+
+class TestPoll(unittest.TestCase):
+
+    def test_looks_tweets_up_in_batches_of_100(self):
+        store = EngagementStore(":memory:")
+        self.addCleanup(store.close)
+        store.track([_sent(i) for i in range(250)])
+        client = MagicMock()
+        client.get_tweets.side_effect = lambda ids, **kwargs: MagicMock(
+            data=[MagicMock(id=int(i), public_metrics=_metrics(likes=1)) for i in ids if i != "7"],
+            errors=[_not_found("7")] if "7" in ids else [])
+
+        self.assertEqual(engagement.poll(store, client, RateLimiter(), now=NOW), 250)
+
+        self.assertEqual([len(c.kwargs["ids"]) for c in client.get_tweets.call_args_list], [100, 100, 50])
+        self.assertEqual(client.get_tweets.call_args.kwargs["tweet_fields"], ["public_metrics"])
+        self.assertEqual(store.due(NOW + 30 * 24 * HOUR - 2 * HOUR), [])
+        self.assertNotIn("7", store.due(NOW + 6 * HOUR))  # Deleted tweets are dropped
+        self.assertEqual(len(store.due(NOW + 6 * HOUR)), 249)
+
+    def test_only_not_found_tweets_are_marked_deleted(self):
+        store = EngagementStore(":memory:")
+        self.addCleanup(store.close)
+        store.track([_sent("1"), _sent("2"), _sent("3")])
+        client = MagicMock()
+        client.get_tweets.return_value = MagicMock(
+            data=[MagicMock(id=1, public_metrics=_metrics(likes=1))],
+            errors=[_not_found("2"),
+                    {"value": "3", "resource_id": "3", "title": "Authorization Error",
+                     "type": "https://api.twitter.com/2/problems/not-authorized-for-resource"}])
+
+        engagement.poll(store, client, RateLimiter(), now=NOW)
+
+        self.assertEqual(store.due(NOW), ["3"])  # Hidden, not deleted: retried next poll
+        self.assertCountEqual(store.due(NOW + 6 * HOUR), ["1", "3"])
+
+    def test_polls_the_stand_in_api(self):
+        with StandInServer() as server, EngagementStore(":memory:") as store:
+            client = _client(server)
+            tweet_id = client.create_tweet(text="hello").data["id"]
+            store.track([_sent(tweet_id), _sent("404")])
+            server.tweet_metrics[tweet_id].update(like_count=4, impression_count=120)
+
+            engagement.poll(store, client, RateLimiter(), now=NOW)
+
+            self.assertEqual(store.series(tweet_id), [Sample(NOW, 4, 0, 0, 0, 120)])
+            self.assertEqual(store.due(NOW + 6 * HOUR), [tweet_id])  # "404" was not found
+        self.assertEqual(server.api_counts["get_tweets"], 1)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "engagement.sqlite3")
+        self.queue_path = os.path.join(tmp.name, "queue.sqlite3")
+        for name, value in (("ENGAGEMENT_PATH", self.path), ("TWEET_QUEUE_PATH", self.queue_path)):
+            patcher = patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_polls_tweets_the_queue_delivered(self):
+        with TweetQueue() as queue:
+            queue.enqueue("News: A https://a.test/a", "a.test/a", Article("A", "https://a.test/a", source="feed"))
+            queue.mark_sent(queue.claim().id, "42")
+        client = MagicMock()
+        client.get_tweets.return_value = MagicMock(data=[MagicMock(id=42, public_metrics=_metrics(likes=2))])
+
+        with patch.object(main.twitter_client, "get_twitter_client", return_value=client):
+            self.assertEqual(main.poll_engagement(), 1)
+            self.assertEqual(main.poll_engagement(), 0)  # Not due again yet
+
+        with EngagementStore() as store:
+            self.assertEqual(store.totals("42")["likes"], 2)
+
+    def test_without_history_no_client_is_built_and_weights_are_neutral(self):
+        with patch.object(main.twitter_client, "get_twitter_client") as get_client:
+            self.assertEqual(main.poll_engagement(), 0)
+        get_client.assert_not_called()
+        self.assertEqual(engagement.source_weights(), {})
+
+    def test_learned_weights_steer_article_selection(self):
+        good, poor = "https://good.test/feed", "https://poor.test/feed"
+        now = time.time()
+        with EngagementStore() as store:
+            store.track([_sent(i, good if i < 10 else poor, now - HOUR) for i in range(20)])
+            store.record({str(i): _metrics(likes=50 if i < 10 else 1) for i in range(20)}, now)
+        candidates = [Article("Story", "https://poor.test/1", now, poor),
+                      Article("Story", "https://good.test/1", now, good)]
+
+        posted_path = os.path.join(os.path.dirname(self.path), "posted.sqlite3")
+        with patch.object(config, "POSTED_INDEX_PATH", posted_path):
+            self.assertTrue(main.compose_article(candidates))
+
+        with TweetQueue() as queue:
+            self.assertEqual(queue.claim().article_link, "https://good.test/1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import warnings
+from unittest.mock import patch
+
+from twitter_bot import config, feed_parser, metrics
+from twitter_bot.benchmarks.standin import make_atom, make_rss
+from twitter_bot.feed_parser import FeedEntry, UnsupportedFeed
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel><title>Feed</title>
+<item><title> AT&amp;T &#8217;s &lt; plan </title><guid>https://a.test/1</guid>
+  <pubDate>Mon, 06 Jan 2025 10:00:00 EST</pubDate><description><![CDATA[<p>Hello <b>world</b></p>]]></description></item>
+<item><title>Dublin Core date</title><link>https://a.test/2</link><guid isPermaLink="false">id-2</guid>
+  <dc:date>2025-01-06T10:00:00+02:00</dc:date><content:encoded>&lt;p&gt;Body&lt;/p&gt;</content:encoded></item>
+<item><title>No link</title><guid isPermaLink="false">id-3</guid></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Feed</title>
+<entry><title type="html">Atom &amp; co</title><link rel="self" href="https://a.test/self"/>
+  <link href="https://a.test/a"/><id>urn:a</id><updated>2025-01-06T10:00:00Z</updated>
+  <published>2025-01-05T10:00:00.500+01:00</published><summary type="html">&lt;p&gt;S&lt;/p&gt;</summary></entry>
+<entry><title>Updated only</title><link rel="alternate" href="https://a.test/b"/><id>urn:b</id>
+  <updated>2025-01-06</updated><content type="html">C</content></entry>
+</feed>"""
+
+RDF = b"""<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel rdf:about="https://a.test/"><title>Feed</title><link>https://a.test/</link></channel>
+<item rdf:about="https://a.test/r1"><title>RSS 1.0</title><link>https://a.test/r1</link>
+  <dc:date>2025-01-06T10:00:00Z</dc:date><description>D</description></item>
+</rdf:RDF>"""
+
+
+def _feedparser_entries(body):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return feed_parser.parse_feedparser(body).entries
+
+
+class TestLeanParser(unittest.TestCase):
+
+    def test_matches_feedparser_on_rss_atom_and_rdf(self):
+        for body in (RSS, ATOM, RDF, make_rss(20, distinct=True), make_atom(20, start=7)):
+            with self.subTest(body=body[:60]):
+                self.assertEqual(feed_parser.parse_lean(body), _feedparser_entries(body))
+
+    def test_extracts_the_fields_the_bot_uses(self):
+        first, second, third = feed_parser.parse_lean(RSS)
+
+        self.assertEqual(first, FeedEntry("AT&T ’s < plan", "https://a.test/1", "https://a.test/1",
+                                          1736175600, "<p>Hello <b>world</b></p>"))
+        self.assertEqual((second.link, second.id, second.published, second.summary),
+                         ("https://a.test/2", "id-2", 1736150400, "<p>Body</p>"))
+        self.assertIsNone(third.link)  # A guid that isn't a permalink is not a link
+
+    def test_zoneless_dates_are_utc(self):
+        body = make_rss(1).replace(b" GMT</pubDate>", b"</pubDate>")
+        self.assertEqual(feed_parser.parse_lean(body)[0].published, feed_parser.parse_lean(make_rss(1))[0].published)
+
+    def test_documents_it_cannot_read_exactly_are_unsupported(self):
+        cases = {
+            "ill-formed": make_rss(3)[:-40],
+            "other format": b'<?xml version="1.0"?><opml version="2.0"><body/></opml>',
+            "markup in title": RSS.replace(b"Dublin Core date", b"&lt;b&gt;Bold&lt;/b&gt;"),
+            "relative link": RSS.replace(b"https://a.test/2", b"/2"),
+            "odd date": RSS.replace(b"2025-01-06T10:00:00+02:00", b"yesterday"),
+            "undefined entity": RSS.replace(b"Dublin Core date", b"Caf&eacute;"),
+        }
+        for name, body in cases.items():
+            with self.subTest(name), self.assertRaises(UnsupportedFeed):
+                feed_parser.parse_lean(body)
+
+
+class TestParse(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def _parses(self):
+        return {key[0][1]: value for key, value in metrics.REGISTRY.snapshot()["feed_parses_total"].items()}
+
+    def test_well_formed_feeds_use_the_lean_parser(self):
+        with patch.object(feed_parser.feedparser, "parse") as mock_parse:
+            parsed = feed_parser.parse(ATOM, backend="lean")
+
+        mock_parse.assert_not_called()
+        self.assertEqual((parsed.backend, len(parsed.entries), parsed.error), ("lean", 2, None))
+        self.assertEqual(self._parses(), {"lean": 1})
+
+    def test_ill_formed_feeds_fall_back_to_feedparser(self):
+        body = RSS.replace(b"</channel>", b"")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            parsed = feed_parser.parse(body, backend="lean")
+
+        self.assertEqual(parsed.backend, "feedparser")
+        self.assertIsNotNone(parsed.error)  # feedparser's bozo_exception
+        self.assertEqual([e.title for e in parsed.entries], ["AT&T ’s < plan", "Dublin Core date", "No link"])
+        self.assertEqual(self._parses(), {"fallback": 1})
+
+    def test_backend_defaults_to_config(self):
+        with patch.object(config, "FEED_PARSER", "feedparser"), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            parsed = feed_parser.parse(RDF)
+
+        self.assertEqual(parsed.backend, "feedparser")
+        self.assertEqual(parsed.entries, feed_parser.parse_lean(RDF))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from twitter_bot import content_manager, main
+from twitter_bot.article import Article
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+from twitter_bot.feed_cache import FeedCache
+from twitter_bot.feed_state import FeedStateStore, QUIET_BACKOFF
+
+HOUR = 3600.0
+URL = "http://feeds.test/a"
+
+
+class TestFeedStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.state = FeedStateStore(":memory:", min_interval=900, max_interval=24 * HOUR,
+                                    default_interval=4 * HOUR)
+        self.addCleanup(self.state.close)
+        patcher = patch("twitter_bot.feed_state.JITTER", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_interval_follows_publish_rate(self):
+        now = 100 * HOUR
+        # One entry per hour -> poll every half hour
+        self.state.record_success(URL, [now - i * HOUR for i in range(10)], now=now)
+
+        state = self.state.state(URL)
+        self.assertAlmostEqual(state["interval"], HOUR / 2)
+        self.assertAlmostEqual(state["next_poll_at"], now + HOUR / 2)
+        self.assertEqual(state["last_entry_at"], now)
+
+    def test_interval_is_clamped(self):
+        now = 100 * HOUR
+        self.state.record_success(URL, [now - i for i in range(10)], now=now)
+        self.assertEqual(self.state.state(URL)["interval"], 900)
+
+        self.state.record_success("http://feeds.test/b", [now - i * 10 * 24 * HOUR for i in range(3)], now=now)
+        self.assertEqual(self.state.state("http://feeds.test/b")["interval"], 24 * HOUR)
+
+    def test_quiet_feed_backs_off(self):
+        now = 100 * HOUR
+        entries = [now - i * HOUR for i in range(10)]
+        self.state.record_success(URL, entries, now=now)
+        self.state.record_success(URL, entries, now=now + HOUR)
+
+        self.assertAlmostEqual(self.state.state(URL)["interval"], HOUR / 2 * QUIET_BACKOFF)
+
+    def test_failures_back_off_exponentially_and_reset_on_success(self):
+        self.state.record_failure(URL, now=0)
+        self.state.record_failure(URL, now=0)
+        state = self.state.state(URL)
+        self.assertEqual(state["failures"], 2)
+        self.assertEqual(state["next_poll_at"], 900 * 4)
+
+        self.state.record_success(URL, [], now=0)
+        self.assertEqual(self.state.state(URL)["failures"], 0)
+
+    def test_only_due_feeds_are_fetched(self):
+        now = time.time()
+        self.state.record_success(URL, [now - HOUR, now], now=now)
+        urls = [URL, "http://feeds.test/new"]
+        self.assertEqual(self.state.due_feeds(urls, now=now + 1), ["http://feeds.test/new"])
+
+        fetched = []
+        def download(url, timeout, etag=None, modified=None):
+            fetched.append(url)
+            return 200, make_rss(2, base_link=url), {}
+        with patch.object(content_manager, "_download_feed", download):
+            articles = content_manager.fetch_rss_feeds(urls, state=self.state)
+
+        self.assertEqual(fetched, ["http://feeds.test/new"])
+        self.assertEqual(len(articles), 2)
+        self.assertIsNotNone(self.state.state("http://feeds.test/new"))
+
+    def test_fetch_error_is_recorded_as_failure(self):
+        def download(url, timeout, etag=None, modified=None):
+            raise OSError("connection refused")
+        with patch.object(content_manager, "_download_feed", download):
+            self.assertEqual(content_manager.fetch_rss_feeds([URL], state=self.state), [])
+
+        self.assertEqual(self.state.state(URL)["failures"], 1)
+
+
+
+def _with_new_item(body, title, link, pub_date):
+    item = f"<item><title>{title}</title><link>{link}</link><guid>{link}</guid><pubDate>{pub_date}</pubDate></item>"
+    return body.replace(b"<item>", item.encode() + b"<item>", 1)
+
+
+class TestIncrementalFeedProcessing(unittest.TestCase):
+
+    def setUp(self):
+        self.state = FeedStateStore(":memory:")
+        self.addCleanup(self.state.close)
+        self.body = make_rss(24, base_link=URL)
+
+    def _fetch(self, body):
+        built = []
+        def counting_article(*args, **kwargs):
+            article = Article(*args, **kwargs)
+            built.append(article)
+            return article
+        download = lambda url, timeout, etag=None, modified=None: (200, body, {})
+        with patch.object(content_manager, "_download_feed", download), \
+             patch.object(content_manager, "Article", counting_article):
+            articles = content_manager.fetch_rss_feeds([URL], state=self.state)
+        return articles, built
+
+    def test_replayed_feed_yields_nothing_new(self):
+        articles, built = self._fetch(self.body)
+        self.assertEqual(len(articles), 24)
+
+        self.state.record_success(URL, [], now=0)  # Make the feed due again
+        articles, built = self._fetch(self.body)
+        self.assertEqual(articles, [])
+        self.assertEqual(built, [])  # Old entries are not even normalized
+
+    def test_only_entries_past_the_mark_are_processed(self):
+        self._fetch(self.body)
+        self.state.record_success(URL, [], now=0)
+        body = _with_new_item(self.body, "Fresh", "https://example.com/fresh", "Tue, 07 Jan 2025 08:00:00 GMT")
+        articles, built = self._fetch(body)
+
+        self.assertEqual([a.title for a in articles], ["Fresh"])
+        self.assertEqual(len(built), 1)
+
+    def test_undated_entries_use_their_ids(self):
+        body = _with_new_item(b"<rss version='2.0'><channel><item></item></channel></rss>", "Undated",
+                              "https://example.com/undated", "")
+        self.assertEqual(len(self._fetch(body)[0]), 1)
+        self.state.record_success(URL, [], now=0)
+        self.assertEqual(self._fetch(body)[0], [])
+
+class TestUnconsumedEntries(unittest.TestCase):
+
+    def setUp(self):
+        self.state = FeedStateStore(":memory:")
+        self.addCleanup(self.state.close)
+
+    def _make_due(self, urls):
+        for url in urls:
+            self.state.record_success(url, [], now=0)
+
+    def test_entries_past_an_early_stop_are_offered_next_time(self):
+        urls = ["http://feeds.test/a", "http://feeds.test/b"]
+        download = lambda url, timeout, etag=None, modified=None: (200, make_rss(40, base_link=url), {})
+
+        passes = []
+        with patch.object(content_manager, "_download_feed", download):
+            for _ in range(3):
+                with patch.object(content_manager, "DEFAULT_RSS_FEEDS", urls):
+                    passes.append(main.collect_candidates(None, None, max_candidates=50, feed_state=self.state))
+                self._make_due(urls)
+
+        self.assertEqual([len(candidates) for candidates in passes], [50, 30, 0])
+        self.assertEqual(len({a.link for candidates in passes for a in candidates}), 80)
+
+    def test_not_modified_feed_yields_its_pending_entries(self):
+        with StandInServer() as server, FeedCache(":memory:") as cache:
+            url = server.add_feed("/feed.xml", make_rss(24))
+            first = list(content_manager.iter_rss_feeds([url], cache=cache, limit=10, state=self.state))
+            self._make_due([url])
+            second = list(content_manager.iter_rss_feeds([url], cache=cache, state=self.state))
+            self._make_due([url])
+            third = list(content_manager.iter_rss_feeds([url], cache=cache, state=self.state))
+
+            self.assertEqual(server.not_modified_count, 2)
+        self.assertEqual(len(first), 10)
+        self.assertEqual({a.link for a in second}, {f"https://example.com/articles/{i}" for i in range(10, 24)})
+        self.assertEqual(third, [])
+
+    def test_released_article_from_an_older_poll_survives_a_304(self):
+        a, b = "https://example.com/a", "https://example.com/b"
+        first = _with_new_item(b"<rss version='2.0'><channel><item></item></channel></rss>", "A", a,
+                               "Mon, 06 Jan 2025 08:00:00 GMT")
+        second = _with_new_item(first, "B", b, "Tue, 07 Jan 2025 08:00:00 GMT")
+        responses = iter([(200, first, {"etag": '"1"'}), (200, second, {"etag": '"2"'}), (304, None, {})])
+        download = lambda url, timeout, etag=None, modified=None: next(responses)
+
+        with FeedCache(":memory:") as cache, patch.object(content_manager, "_download_feed", download):
+            polls = []
+            for _ in range(3):
+                polls.append(content_manager.fetch_rss_feeds([URL], cache=cache, state=self.state))
+                if len(polls) == 2:
+                    self.state.release(polls[0])  # Read on poll 1, dropped after poll 2
+                self._make_due([URL])
+
+        self.assertEqual([[article.link for article in poll] for poll in polls], [[a], [b], [a]])
+        self.assertEqual(polls[2], polls[0])
+        self.assertEqual(self.state.pending(URL), {})
+
+    def test_feeds_fetched_but_not_read_stay_due(self):
+        urls = ["http://feeds.test/a", "http://feeds.test/b"]
+        download = lambda url, timeout, etag=None, modified=None: (200, make_rss(3, base_link=url), {})
+        parsed = threading.Semaphore(0)
+        fetch_feed = content_manager._fetch_feed
+
+        def counting_fetch_feed(*args, **kwargs):
+            try:
+                return fetch_feed(*args, **kwargs)
+            finally:
+                parsed.release()
+
+        with patch.object(content_manager, "_download_feed", download), \
+             patch.object(content_manager, "_fetch_feed", counting_fetch_feed):
+            feeds = content_manager.iter_rss_feeds(urls, max_workers=2, state=self.state)
+            first = next(feeds)
+            self.assertTrue(parsed.acquire(timeout=5) and parsed.acquire(timeout=5))  # Both feeds were fetched
+            feeds.close()
+
+        read = first.source
+        unread = next(url for url in urls if url != read)
+        self.assertEqual(self.state.due_feeds(urls), [unread])
+        self.assertIsNone(self.state.state(unread))
+        self.assertEqual(self.state.high_water_mark(unread), (None, frozenset()))
+        self.assertEqual(len(self.state.pending(read)), 2)
+
+    def test_released_articles_are_offered_again(self):
+        download = lambda url, timeout, etag=None, modified=None: (200, make_rss(5, base_link=URL), {})
+        with patch.object(content_manager, "_download_feed", download):
+            articles = content_manager.fetch_rss_feeds([URL], state=self.state)
+            self.state.release(articles[:2])
+            self._make_due([URL])
+            again = content_manager.fetch_rss_feeds([URL], state=self.state)
+            self._make_due([URL])
+
+            self.assertEqual(again, articles[:2])
+            self.assertEqual(content_manager.fetch_rss_feeds([URL], state=self.state), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from twitter_bot import main
+from twitter_bot.article import Article
+from twitter_bot.posted_index import PostedIndex
+from twitter_bot.tweet_queue import TweetQueue
+
+
+def _articles(count, consumed):
+    for i in range(count):
+        consumed.append(i)
+        yield Article(f"Story {i}", f"https://example.com/{i}")
+
+
+class TestPostLatestArticle(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "posted.sqlite3")
+        self.posted_index = PostedIndex(path)
+        self.addCleanup(self.posted_index.close)
+        patcher = patch.object(main, "PostedIndex", side_effect=lambda: PostedIndex(path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        queue_path = os.path.join(tmp.name, "queue.sqlite3")
+        patcher = patch.object(main, "TweetQueue", side_effect=lambda: TweetQueue(queue_path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(main, "FeedCache", return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(main, "FeedStateStore", return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_collect_candidates_stops_early_and_skips_posted(self):
+        self.posted_index.add("https://example.com/0", "Story 0")
+        consumed = []
+        with patch.object(main.content_manager, "iter_rss_feeds", return_value=_articles(1000, consumed)):
+            candidates = main.collect_candidates(MagicMock(), self.posted_index, max_candidates=3)
+
+        self.assertEqual([c.title for c in candidates], ["Story 1", "Story 2", "Story 3"])
+        self.assertEqual(len(consumed), 4)
+
+    def test_posts_each_article_once(self):
+        with patch.object(main.content_manager, "iter_rss_feeds", side_effect=lambda **kwargs: _articles(2, [])), \
+             patch.object(main.twitter_client, "send_tweet", return_value=MagicMock(data={"id": "1"})) as mock_post:
+            for _ in range(3):
+                main.post_latest_article()
+
+        self.assertEqual([c.args[0] for c in mock_post.call_args_list],
+                         ["News: Story 0 https://example.com/0", "News: Story 1 https://example.com/1"])
+
+    def test_failed_post_stays_queued_and_is_not_recomposed(self):
+        with patch.object(main.content_manager, "iter_rss_feeds", side_effect=lambda **kwargs: _articles(1, [])), \
+             patch.object(main.twitter_client, "send_tweet", side_effect=OSError("network down")) as mock_send:
+            main.post_latest_article()
+            self.assertFalse(main.compose_latest_article())
+
+        mock_send.assert_called_once()
+        self.assertEqual(len(self.posted_index), 0)
+        with main.TweetQueue() as queue:
+            self.assertEqual(queue.depth(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
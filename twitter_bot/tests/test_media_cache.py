@@ -0,0 +1,155 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from twitter_bot import twitter_client
+from twitter_bot.media_cache import MediaCache
+from twitter_bot.benchmarks.standin import StandInServer
+
+
+class TestMediaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MediaCache(root=self.tmp.name, max_bytes=1000)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_store_and_read_back_through_mmap(self):
+        digest = self.cache.store("https://pbs.test/a.jpg", b"\xff\xd8image")
+        self.assertIn("https://pbs.test/a.jpg", self.cache)
+        self.assertEqual(self.cache.digest("https://pbs.test/a.jpg"), digest)
+        with self.cache.open("https://pbs.test/a.jpg") as data:
+            self.assertEqual(data[:], b"\xff\xd8image")
+        self.assertIsNone(self.cache.open("https://pbs.test/missing.jpg"))
+
+    def test_identical_content_is_stored_once(self):
+        first = self.cache.store("https://pbs.test/a.jpg", b"same bytes")
+        second = self.cache.store("https://pbs.test/b.jpg?name=small", b"same bytes")
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()["urls"], 2)
+        self.assertEqual(self.cache.stats()["blobs"], 1)
+        self.assertEqual(self.cache.stats()["bytes"], len(b"same bytes"))
+
+    def test_least_recently_used_blobs_are_evicted_past_the_budget(self):
+        self.cache.store("https://pbs.test/1.jpg", b"1" * 400)
+        self.cache.store("https://pbs.test/2.jpg", b"2" * 400)
+        time.sleep(0.01)
+        self.cache.open("https://pbs.test/1.jpg").close()  # 1 is now more recent than 2
+        self.cache.store("https://pbs.test/3.jpg", b"3" * 400)
+
+        self.assertIn("https://pbs.test/1.jpg", self.cache)
+        self.assertNotIn("https://pbs.test/2.jpg", self.cache)
+        self.assertIn("https://pbs.test/3.jpg", self.cache)
+        self.assertLessEqual(self.cache.stats()["bytes"], 1000)
+
+    def test_the_blob_just_stored_is_never_evicted(self):
+        self.cache.store("https://pbs.test/1.jpg", b"1" * 600)
+        time.sleep(0.01)
+        self.cache.open("https://pbs.test/1.jpg").close()
+        # A clock step back makes the new blob the least recently used one
+        with patch("twitter_bot.media_cache.time.time", return_value=0):
+            digest = self.cache.store("https://pbs.test/2.jpg", b"2" * 600)
+
+        self.assertEqual(self.cache.digest("https://pbs.test/2.jpg"), digest)
+        self.assertNotIn("https://pbs.test/1.jpg", self.cache)
+        with self.assertRaises(ValueError):
+            self.cache.store("https://pbs.test/huge.jpg", b"x" * 1001)
+        self.assertNotIn("https://pbs.test/huge.jpg", self.cache)
+
+    def test_open_map_survives_eviction(self):
+        self.cache.store("https://pbs.test/1.jpg", b"1" * 600)
+        data = self.cache.open("https://pbs.test/1.jpg")
+        self.cache.store("https://pbs.test/2.jpg", b"2" * 600)
+        self.assertNotIn("https://pbs.test/1.jpg", self.cache)
+        self.assertEqual(data[:3], b"111")
+        data.close()
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MediaCache(root=self.tmp.name)
+        self.server = StandInServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_repeated_prefetch_costs_no_bandwidth(self):
+        urls = [self.server.add_feed(f"/media/{i}.jpg", b"img%d" % i * 100) for i in range(5)]
+        first = self.cache.prefetch(urls)
+        self.assertEqual(self.server.request_count, 5)
+        self.assertTrue(all(first.values()))
+
+        downloaded = self.cache.stats()["bytes_downloaded"]
+        second = self.cache.prefetch(urls + urls)
+        self.assertEqual(second, first)
+        self.assertEqual(self.server.request_count, 5)
+        self.assertEqual(self.cache.stats()["bytes_downloaded"], downloaded)
+
+    def test_downloads_respect_the_per_host_limit(self):
+        urls = [self.server.add_feed(f"/media/{i}.jpg", b"x%d" % i, latency=0.1) for i in range(6)]
+        start = time.perf_counter()
+        self.cache.prefetch(urls, max_per_host=2, max_workers=6)
+        elapsed = time.perf_counter() - start
+        # 6 downloads, 2 at a time: three rounds, not one and not six
+        self.assertGreaterEqual(elapsed, 0.29)
+        self.assertLess(elapsed, 0.55)
+        self.assertLessEqual(self.server.connection_count, 2)
+
+    def test_failed_downloads_map_to_none_and_leave_no_files(self):
+        ok = self.server.add_feed("/media/ok.jpg", b"fine")
+        missing = self.server.base_url + "/media/missing.jpg"
+        results = self.cache.prefetch([ok, missing])
+        self.assertIsNotNone(results[ok])
+        self.assertIsNone(results[missing])
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "tmp")), [])
+
+    def test_oversized_images_are_abandoned(self):
+        self.cache.max_image_bytes = 10
+        url = self.server.add_feed("/media/big.jpg", b"x" * 100)
+        self.assertIsNone(self.cache.prefetch([url])[url])
+        self.assertNotIn(url, self.cache)
+
+    def test_images_bigger_than_the_cache_are_not_reported_as_cached(self):
+        self.cache.max_bytes = 50
+        kept = self.server.add_feed("/media/small.jpg", b"s" * 40)
+        big = self.server.add_feed("/media/big.jpg", b"x" * 100)
+        self.cache.prefetch([kept])
+
+        results = self.cache.prefetch([big])
+
+        self.assertIsNone(results[big])
+        self.assertIn(kept, self.cache)
+
+
+class TestUserInfoPrefetch(unittest.TestCase):
+
+    def test_prefetch_collects_image_urls_of_all_users(self):
+        infos = [
+            {"recent_tweets": [{"image_urls": ["https://pbs.test/a.jpg"]},
+                               {"image_urls": ["https://pbs.test/b.jpg"]}]},
+            None,
+            {"recent_tweets": [{"image_urls": []}]},
+        ]
+        with patch.object(twitter_client, "get_media_cache") as mock_cache:
+            twitter_client.prefetch_user_media(infos)
+        mock_cache.return_value.prefetch.assert_called_once_with(
+            ["https://pbs.test/a.jpg", "https://pbs.test/b.jpg"]
+        )
+
+    def test_nothing_to_prefetch_does_not_create_the_cache(self):
+        with patch.object(twitter_client, "get_media_cache") as mock_cache:
+            self.assertEqual(twitter_client.prefetch_user_media([{"recent_tweets": []}]), {})
+        mock_cache.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+import urllib.request
+
+import tweepy
+
+from twitter_bot import content_manager, logs, metrics
+from twitter_bot.metrics import Registry
+from twitter_bot.rate_limiter import RateLimiter
+from twitter_bot.benchmarks.standin import StandInServer, make_rss
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry(buckets=(0.1, 1.0))
+
+    def test_counters_and_gauges_are_keyed_by_labels(self):
+        self.registry.inc("api_requests_total", endpoint="get_user", outcome="ok")
+        self.registry.inc("api_requests_total", 2, outcome="ok", endpoint="get_user")
+        self.registry.inc("api_requests_total", endpoint="create_tweet", outcome="ok")
+        self.registry.set("tweet_queue_depth", 3)
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["api_requests_total"][(("endpoint", "get_user"), ("outcome", "ok"))], 3)
+        self.assertEqual(snapshot["tweet_queue_depth"][()], 3)
+
+    def test_timer_records_even_when_the_block_raises(self):
+        with self.assertRaises(ValueError):
+            with self.registry.timer("compose_seconds"):
+                raise ValueError("bad template")
+        self.assertEqual(self.registry.snapshot()["compose_seconds"][()]["count"], 1)
+
+    def test_render_uses_prometheus_text_format(self):
+        self.registry.observe("feed_fetch_seconds", 0.05, feed='http://a.test/"rss"')
+        self.registry.observe("feed_fetch_seconds", 0.5, feed='http://a.test/"rss"')
+        self.registry.observe("feed_fetch_seconds", 5.0, feed='http://a.test/"rss"')
+        self.registry.inc("articles_parsed_total", 7)
+
+        text = self.registry.render()
+        labels = 'feed="http://a.test/\\"rss\\""'
+        self.assertIn("# TYPE twitter_bot_feed_fetch_seconds histogram", text)
+        self.assertIn(f'twitter_bot_feed_fetch_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'twitter_bot_feed_fetch_seconds_bucket{{{labels},le="1"}} 2', text)
+        self.assertIn(f'twitter_bot_feed_fetch_seconds_bucket{{{labels},le="+Inf"}} 3', text)
+        self.assertIn(f"twitter_bot_feed_fetch_seconds_count{{{labels}}} 3", text)
+        self.assertIn(f"twitter_bot_feed_fetch_seconds_sum{{{labels}}} 5.55", text)
+        self.assertIn("# TYPE twitter_bot_articles_parsed_total counter", text)
+        self.assertIn("twitter_bot_articles_parsed_total 7", text)
+
+    def test_write_and_serve_expose_the_same_text(self):
+        self.registry.inc("job_errors_total", job="ingest")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics", "bot.prom")
+            self.registry.write(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), self.registry.render())
+
+        server = metrics.serve(0, registry=self.registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                self.assertEqual(response.read().decode(), self.registry.render())
+                self.assertIn("text/plain", response.headers["Content-Type"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def test_api_calls_record_latency_outcome_and_retries(self):
+        response = type("Response", (), {"status_code": 503, "reason": "Unavailable", "headers": {},
+                                         "json": lambda self: {}, "text": ""})()
+        calls = iter([tweepy.TwitterServerError(response), "ok"])
+
+        def flaky():
+            result = next(calls)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        limiter = RateLimiter(sleep=lambda s: None)
+        self.assertEqual(limiter.call("get_user", flaky), "ok")
+
+        snapshot = metrics.REGISTRY.snapshot()
+        requests = snapshot["api_requests_total"]
+        self.assertEqual(requests[(("endpoint", "get_user"), ("outcome", "server_error"))], 1)
+        self.assertEqual(requests[(("endpoint", "get_user"), ("outcome", "ok"))], 1)
+        self.assertEqual(snapshot["api_retries_total"][(("endpoint", "get_user"), ("reason", "server_error"))], 1)
+        self.assertEqual(snapshot["api_request_seconds"][(("endpoint", "get_user"),)]["count"], 2)
+
+    def test_feed_fetches_record_per_feed_timings(self):
+        with StandInServer() as server:
+            ok = server.add_feed("/ok.xml", make_rss(3))
+            missing = server.base_url + "/missing.xml"
+            content_manager.fetch_rss_feeds([ok, missing])
+
+        snapshot = metrics.REGISTRY.snapshot()
+        self.assertEqual(snapshot["feed_fetch_seconds"][(("feed", ok),)]["count"], 1)
+        self.assertEqual(snapshot["feed_fetch_seconds"][(("feed", missing),)]["count"], 1)
+        self.assertEqual(snapshot["feed_parse_seconds"][(("feed", ok),)]["count"], 1)
+        self.assertEqual(snapshot["feed_fetches_total"][(("feed", ok), ("outcome", "ok"))], 1)
+        self.assertEqual(snapshot["feed_fetches_total"][(("feed", missing), ("outcome", "error"))], 1)
+        self.assertEqual(snapshot["articles_parsed_total"][()], 3)
+
+
+class TestLogging(unittest.TestCase):
+
+    def tearDown(self):
+        logging.basicConfig(force=True)
+        logging.getLogger().setLevel(logging.WARNING)
+
+    def test_json_lines_include_extra_fields(self):
+        stream = io.StringIO()
+        logs.setup_logging("INFO", "json", stream)
+        logging.getLogger("twitter_bot.content_manager").info("Fetched %s", "feed", extra={"feed": "http://a.test"})
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "twitter_bot.content_manager")
+        self.assertEqual(entry["message"], "Fetched feed")
+        self.assertEqual(entry["feed"], "http://a.test")
+
+    def test_level_filters_records(self):
+        stream = io.StringIO()
+        logs.setup_logging("warning", "text", stream)
+        logger = logging.getLogger("twitter_bot.main")
+        logger.info("routine")
+        logger.warning("attention")
+
+        self.assertNotIn("routine", stream.getvalue())
+        self.assertIn("WARNING twitter_bot.main: attention", stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from twitter_bot.posted_index import PostedIndex, normalize_url, title_hash
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_url_variants_normalize_to_same_key(self):
+        expected = normalize_url("https://example.com/news/story?id=7")
+        for variant in (
+            "http://www.Example.com/news/story/?id=7",
+            "https://example.com/news/story?utm_source=rss&id=7&utm_medium=feed",
+            "https://example.com:443/news/story?id=7#comments",
+        ):
+            self.assertEqual(normalize_url(variant), expected, variant)
+
+    def test_distinct_query_is_kept(self):
+        self.assertNotEqual(normalize_url("https://example.com/story?id=1"),
+                            normalize_url("https://example.com/story?id=2"))
+
+    def test_title_hash_ignores_case_punctuation_and_spacing(self):
+        self.assertEqual(title_hash("AI  Agents: The Next Step!"), title_hash("ai agents the next step"))
+
+
+class TestPostedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PostedIndex(":memory:", ttl_days=30)
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_contains_matches_url_or_title(self):
+        self.index.add("https://example.com/a?utm_source=x", "Data quality matters")
+
+        self.assertTrue(self.index.contains("http://www.example.com/a/", "Something else"))
+        self.assertTrue(self.index.contains("https://mirror.test/a", "Data Quality Matters."))
+        self.assertFalse(self.index.contains("https://example.com/b", "Another story"))
+
+    def test_expired_entries_are_evicted(self):
+        now = time.time()
+        self.index.add("https://example.com/old", "Old story", posted_at=now - 31 * 86400)
+        self.index.add("https://example.com/new", "New story", posted_at=now)
+
+        self.assertEqual(self.index.evict_expired(now), 1)
+        self.assertEqual(len(self.index), 1)
+        self.assertFalse(self.index.contains("https://example.com/old", "Old story"))
+        self.assertEqual(self.index.recent_titles(), ["New story"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from twitter_bot.article import Article
+from twitter_bot.ranking import (
+    Ranker, Recency, KeywordMatch, SourceWeight, Novelty, CandidateBatch, default_ranker, tokenize
+)
+
+NOW = 1_700_000_000.0
+HOUR = 3600.0
+
+
+def _article(title, age_hours=None, source="https://feeds.test/a"):
+    published = NOW - age_hours * HOUR if age_hours is not None else None
+    return Article(title, f"https://example.com/{abs(hash(title))}", published=published, source=source)
+
+
+class TestTokenize(unittest.TestCase):
+
+    def test_tokens_are_distinct_lowercase_words_without_stopwords(self):
+        rows, words = tokenize(["The AI, the AI!", "", "Data-science news"])
+        self.assertEqual(list(zip(rows.tolist(), words.tolist())),
+                         [(0, "ai"), (2, "data"), (2, "news"), (2, "science")])
+
+    def test_titles_containing_the_separator_stay_aligned(self):
+        rows, words = tokenize(["one\x01two", "three"])
+        self.assertEqual(list(zip(rows.tolist(), words.tolist())), [(0, "one"), (0, "two"), (1, "three")])
+
+
+class TestFeatures(unittest.TestCase):
+
+    def _scores(self, feature, articles):
+        return feature(CandidateBatch(articles, now=NOW))
+
+    def test_recency_halves_every_half_life(self):
+        scores = self._scores(Recency(half_life_hours=12), [_article("a", 0), _article("b", 12), _article("c")])
+        np.testing.assert_allclose(scores, [1.0, 0.5, 0.25])
+
+    def test_keyword_match_needs_every_word_of_a_term(self):
+        feature = KeywordMatch({"machine learning": 1.0, "llm": 2.0})
+        scores = self._scores(feature, [_article("Machine learning at scale"), _article("Learning to cook"),
+                                        _article("New LLM released"), _article("Nothing here")])
+        np.testing.assert_allclose(scores, [1 - np.exp(-1), 0.0, 1 - np.exp(-2), 0.0])
+
+    def test_source_weight_is_logarithmic(self):
+        feature = SourceWeight({"https://feeds.test/good": np.e})
+        scores = self._scores(feature, [_article("a", source="https://feeds.test/good"), _article("b")])
+        np.testing.assert_allclose(scores, [1.0, 0.0])
+
+    def test_novelty_is_similarity_to_recent_posts(self):
+        feature = Novelty(["OpenAI releases new model", "Stock markets rally"])
+        scores = self._scores(feature, [_article("OpenAI releases new model"), _article("Gardening tips")])
+        np.testing.assert_allclose(scores, [1.0, 0.0], atol=1e-6)
+
+
+class TestRanker(unittest.TestCase):
+
+    def test_rank_orders_by_weighted_score_and_keeps_ties_stable(self):
+        ranker = Ranker({"recency": Recency(half_life_hours=12)}, {"recency": 1.0})
+        old, new, tie_a, tie_b = _article("old", 48), _article("new", 1), _article("x"), _article("y")
+        self.assertEqual(ranker.rank([tie_a, old, tie_b, new], now=NOW), [new, tie_a, tie_b, old])
+
+    def test_default_ranker_prefers_on_topic_novel_articles(self):
+        ranker = default_ranker(["Deep learning model tops benchmark"])
+        repeat = _article("Deep learning model tops benchmark again", 1)
+        fresh = _article("New data science toolkit released", 1)
+        off_topic = _article("Local bakery opens", 1)
+        self.assertEqual(ranker.rank([off_topic, repeat, fresh], now=NOW)[0], fresh)
+
+    def test_empty_candidate_list(self):
+        self.assertEqual(default_ranker().rank([]), [])
+        self.assertEqual(default_ranker(["a b"]).scores([]).shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock
+
+import tweepy
+
+from twitter_bot.rate_limiter import RateLimiter, RateLimitExceeded, endpoint_for
+
+
+class FakeClock:
+    """Clock whose sleep() advances time instantly."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _http_error(cls, status, headers=None, **kwargs):
+    response = MagicMock(status_code=status, reason="error", headers=headers or {})
+    response.json.return_value = {}
+    return cls(response, **kwargs)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(max_retries=2, max_wait=900, clock=self.clock.time, sleep=self.clock.sleep)
+
+    def _headers(self, limit, remaining, reset_in):
+        return {"x-rate-limit-limit": str(limit), "x-rate-limit-remaining": str(remaining),
+                "x-rate-limit-reset": str(int(self.clock.now + reset_in))}
+
+    def test_endpoint_routes(self):
+        self.assertEqual(endpoint_for("POST", "https://api.twitter.com/2/tweets"), "create_tweet")
+        self.assertEqual(endpoint_for("GET", "https://api.twitter.com/2/users/by/username/jack?x=1"), "get_user")
+        self.assertEqual(endpoint_for("GET", "https://api.twitter.com/2/users/12/tweets"), "get_users_tweets")
+        self.assertEqual(endpoint_for("GET", "https://api.twitter.com/2/tweets?ids=1,2"), "get_tweets")
+        self.assertIsNone(endpoint_for("GET", "https://api.twitter.com/2/tweets/search/recent"))
+
+    def test_unknown_endpoint_is_not_throttled(self):
+        for _ in range(100):
+            self.limiter.acquire("get_user")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_for_reset_when_window_is_used_up(self):
+        self.limiter.update("get_user", self._headers(limit=3, remaining=2, reset_in=60))
+        self.limiter.acquire("get_user")
+        self.limiter.acquire("get_user")
+        self.assertEqual(self.clock.sleeps, [])
+
+        self.limiter.acquire("get_user")
+        self.assertEqual(self.clock.sleeps, [60])
+        # The window was refilled to its limit: two more calls go through immediately
+        self.limiter.acquire("get_user")
+        self.limiter.acquire("get_user")
+        self.assertEqual(len(self.clock.sleeps), 1)
+
+    def test_wait_longer_than_max_wait_raises(self):
+        self.limiter.update("create_tweet", self._headers(limit=17, remaining=0, reset_in=86400))
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("create_tweet")
+
+    def test_429_is_retried_after_reset(self):
+        reset_time = int(self.clock.now + 30)
+        func = MagicMock(side_effect=[_http_error(tweepy.TooManyRequests, 429, reset_time=reset_time), "ok"])
+
+        self.assertEqual(self.limiter.call("create_tweet", func, text="hi"), "ok")
+        self.assertEqual(func.call_count, 2)
+        self.assertGreaterEqual(self.clock.now, reset_time)
+
+    def test_server_errors_retry_then_give_up(self):
+        func = MagicMock(side_effect=_http_error(tweepy.TwitterServerError, 503))
+
+        with self.assertRaises(tweepy.TwitterServerError):
+            self.limiter.call("get_user", func)
+        self.assertEqual(func.call_count, 3)  # First attempt plus max_retries
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+    def test_other_errors_are_not_retried(self):
+        func = MagicMock(side_effect=_http_error(tweepy.Forbidden, 403))
+
+        with self.assertRaises(tweepy.Forbidden):
+            self.limiter.call("create_tweet", func)
+        func.assert_called_once()
+
+    def test_response_hook_reads_headers(self):
+        response = MagicMock(headers=self._headers(limit=5, remaining=0, reset_in=10))
+        response.request.method = "GET"
+        response.request.url = "https://api.twitter.com/2/users/12/tweets"
+        self.limiter.on_response(response)
+
+        self.limiter.acquire("get_users_tweets")
+        self.assertEqual(self.clock.sleeps, [10])
+
+
+if __name__ == '__main__':
+    unittest.main()
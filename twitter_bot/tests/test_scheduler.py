@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from twitter_bot import scheduler
+from twitter_bot.article import Article
+
+
+class TestLaneScheduler(unittest.TestCase):
+
+    def tearDown(self):
+        scheduler._candidates = []
+
+    def test_each_lane_has_its_own_executor_and_overlap_control(self):
+        sched = scheduler.build_lane_scheduler()
+        sched.start(paused=True)
+        self.addCleanup(sched.shutdown, wait=False)
+        jobs = {job.id: job for job in sched.get_jobs()}
+
+        self.assertEqual(set(jobs), {"ingest", "compose", "post", "analytics"})
+        for lane, job in jobs.items():
+            self.assertEqual(job.executor, lane)
+            self.assertEqual(job.max_instances, 1)
+            self.assertTrue(job.coalesce)
+            self.assertEqual(job.misfire_grace_time, scheduler.MISFIRE_GRACE_SECONDS[lane])
+
+    def test_compose_uses_candidates_from_ingest(self):
+        articles = [Article("A", "https://example.com/a"), Article("B", "https://example.com/b")]
+        with patch.object(scheduler.main_module, "ingest_articles", return_value=articles) as mock_ingest, \
+             patch.object(scheduler.main_module, "compose_article") as mock_compose:
+            scheduler.ingest_job()
+            scheduler.compose_job()
+
+        mock_ingest.assert_called_once()
+        mock_compose.assert_called_once_with(articles)
+
+    def test_ingest_merges_new_candidates_in_front(self):
+        a, b, c = (Article(t, f"https://example.com/{t}") for t in "abc")
+        with patch.object(scheduler.main_module, "ingest_articles", side_effect=[[a, b], [c, a]]):
+            scheduler.ingest_job()
+            scheduler.ingest_job()
+
+        self.assertEqual(scheduler._candidates, [c, a, b])
+
+    def test_candidates_pushed_out_are_released_to_the_feeds(self):
+        a, b, c = (Article(t, f"https://example.com/{t}") for t in "abc")
+        with patch.object(scheduler.main_module, "MAX_CANDIDATES", 2), \
+             patch.object(scheduler.main_module, "ingest_articles", side_effect=[[a, b], [c]]), \
+             patch.object(scheduler.main_module, "release_articles") as mock_release:
+            scheduler.ingest_job()
+            scheduler.ingest_job()
+
+        self.assertEqual(scheduler._candidates, [c, a])
+        self.assertEqual(mock_release.call_args_list[-1].args, ([b],))
+
+    def test_slow_ingest_does_not_delay_posting(self):
+        ingest_started = threading.Event()
+        release_ingest = threading.Event()
+        posted = threading.Event()
+
+        def slow_ingest():
+            ingest_started.set()
+            release_ingest.wait(5)
+            return []
+
+        with patch.object(scheduler.main_module, "ingest_articles", side_effect=slow_ingest), \
+             patch.object(scheduler.main_module, "post_queued_tweets", side_effect=lambda: posted.set()):
+            sched = scheduler.build_lane_scheduler()
+            sched.start()
+            try:
+                self.assertTrue(ingest_started.wait(5))
+                start = time.monotonic()
+                sched.modify_job("post", next_run_time=datetime.now(timezone.utc))
+                self.assertTrue(posted.wait(5))
+                self.assertLess(time.monotonic() - start, 2)
+            finally:
+                release_ingest.set()
+                sched.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
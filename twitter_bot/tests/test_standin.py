@@ -0,0 +1,87 @@
+import unittest
+
+import tweepy
+
+from twitter_bot.benchmarks import bench_cycle
+from twitter_bot.benchmarks.standin import StandInServer, make_atom, make_rss, route_api_to
+from twitter_bot.content_manager import fetch_rss_feeds
+from twitter_bot.rate_limiter import RateLimiter
+
+
+def _client(server):
+    client = tweepy.Client(consumer_key="k", consumer_secret="s", access_token="t", access_token_secret="ts")
+    route_api_to(client.session, server.base_url)
+    return client
+
+
+class TestStandInServer(unittest.TestCase):
+
+    def test_serves_rss_and_atom_feeds(self):
+        with StandInServer() as server:
+            urls = [server.add_feed("/a.rss", make_rss(3, "Rss story", distinct=True)),
+                    server.add_feed("/b.atom", make_atom(2, "Atom story", start=5))]
+            articles = fetch_rss_feeds(urls)
+
+        self.assertEqual(len(articles), 5)
+        self.assertIn("Atom story 6", [a.title for a in articles])
+        self.assertTrue(all(a.published for a in articles))
+
+    def test_emulates_users_timelines_and_posting(self):
+        with StandInServer(timeline_length=25) as server:
+            client = _client(server)
+            user = client.get_user(username="Alice", user_auth=True).data
+            pages = list(tweepy.Paginator(client.get_users_tweets, user.id, max_results=10, user_auth=True))
+            posted = client.create_tweet(text="hello")
+
+        self.assertEqual(user.username, "Alice")
+        self.assertEqual([len(page.data) for page in pages], [10, 10, 5])
+        self.assertNotIn("next_token", pages[-1].meta)
+        self.assertEqual(server.tweets, ["hello"])
+        self.assertEqual(posted.data["text"], "hello")
+        self.assertEqual(server.api_counts, {"get_user": 1, "get_users_tweets": 3, "create_tweet": 1})
+
+    def test_injected_faults_are_retried_by_the_rate_limiter(self):
+        with StandInServer() as server:
+            client = _client(server)
+            limiter = RateLimiter(sleep=lambda s: None)
+            server.inject("get_user", 503)
+            server.inject("get_user", 429)
+            user = limiter.call("get_user", client.get_user, username="bob", user_auth=True)
+
+        self.assertEqual(user.data.username, "bob")
+        self.assertEqual(server.status_counts, {503: 1, 429: 1, 200: 1})
+
+    def test_rate_limit_window_answers_429_with_headers(self):
+        with StandInServer() as server:
+            client = _client(server)
+            server.set_rate_limit("create_tweet", 1, window=60)
+            response = client.create_tweet(text="first")
+            with self.assertRaises(tweepy.TooManyRequests) as cm:
+                client.create_tweet(text="second")
+
+        self.assertTrue(response.data)
+        self.assertEqual(cm.exception.response.headers["x-rate-limit-remaining"], "0")
+        self.assertEqual(server.tweets, ["first"])
+
+
+class TestBenchCycle(unittest.TestCase):
+
+    def test_short_run_posts_a_tweet_per_cycle_and_reports_percentiles(self):
+        results = bench_cycle.run(cycles=2, feeds=2, entries=5, new_per_cycle=2, users=2, memory=False)
+
+        self.assertEqual(results["throughput"]["tweets_posted"], 2)
+        self.assertEqual(set(results["latency_ms"]), set(bench_cycle.STAGES))
+        self.assertEqual(results["api"]["requests"]["create_tweet"], 2)
+        self.assertEqual(bench_cycle.compare(results, results, 0.25), [])
+
+    def test_compare_flags_p99_and_memory_regressions(self):
+        baseline = {"latency_ms": {"post": {"p50": 1.0, "p99": 10.0}}, "memory_mb": {"tracemalloc_peak": 4.0}}
+        results = {"latency_ms": {"post": {"p50": 1.0, "p99": 20.0}}, "memory_mb": {"tracemalloc_peak": 4.5}}
+
+        self.assertEqual(len(bench_cycle.compare(results, baseline, 0.25)), 1)
+        self.assertEqual(len(bench_cycle.compare(results, baseline, 0.05)), 2)
+        self.assertEqual(bench_cycle.percentile([5, 1, 3, 2, 4], 50), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
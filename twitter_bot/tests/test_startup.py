@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from twitter_bot import __main__ as cli
+from twitter_bot import main
+from twitter_bot.lazy import LazyModule
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ("tweepy", "requests", "feedparser", "numpy", "apscheduler", "aiohttp", "asyncio")
+# Generous, so slow CI machines pass; eager imports of the heavy modules cost several times this
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def _run(script):
+    """Runs a script in a fresh interpreter and returns its stdout lines."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, X_API_KEY="", BOT_DATA_DIR=tmp)
+        result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+    if result.returncode:
+        raise AssertionError(result.stderr)
+    return result.stdout.splitlines()
+
+
+def _loaded_after(statements):
+    """Returns the heavy modules imported by running statements in a fresh interpreter."""
+    script = "import sys\n" + statements + f"\nprint(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    return _run(script)[-1].split()
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_importing_entry_points_loads_no_heavy_dependency(self):
+        for module in ("twitter_bot.main", "twitter_bot.scheduler", "twitter_bot.__main__"):
+            with self.subTest(module=module):
+                self.assertEqual(_loaded_after(f"import {module}"), [])
+
+    def test_import_time_budget(self):
+        script = ("import time\nstart = time.perf_counter()\nimport twitter_bot.main, twitter_bot.scheduler\n"
+                  "print(time.perf_counter() - start)")
+        # Best of three, to ignore a cold disk cache
+        elapsed = min(float(_run(script)[-1]) for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET_SECONDS)
+
+    def test_post_does_not_load_feed_parsing(self):
+        loaded = _loaded_after("from twitter_bot import main\nmain.post_queued_tweets()")
+        self.assertNotIn("feedparser", loaded)
+        self.assertNotIn("numpy", loaded)
+
+    def test_ingest_does_not_load_tweepy(self):
+        loaded = _loaded_after("from twitter_bot import content_manager, main\n"
+                               "content_manager.DEFAULT_RSS_FEEDS = []\nmain.compose_latest_article()")
+        self.assertNotIn("tweepy", loaded)
+        self.assertNotIn("requests", loaded)
+
+
+class TestLazyModule(unittest.TestCase):
+
+    def test_imports_on_first_attribute_access(self):
+        module = LazyModule("json")
+        self.assertIn("not loaded", repr(module))
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertIn("(loaded)", repr(module))
+
+    def test_missing_module_raises_on_use(self):
+        module = LazyModule("twitter_bot_no_such_module")
+        with self.assertRaises(ImportError):
+            module.anything
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def test_commands_dispatch_to_the_bot(self):
+        with patch.object(main, "compose_latest_article") as compose, \
+             patch.object(main, "post_queued_tweets") as post, \
+             patch.object(main, "post_latest_article") as once, \
+             patch.object(main, "poll_engagement") as poll, \
+             patch("twitter_bot.logs.setup_logging") as setup_logging:
+            self.assertEqual(cli.main(["ingest"]), 0)
+            self.assertEqual(cli.main(["--log-level", "debug", "post", "--max", "3"]), 0)
+            self.assertEqual(cli.main(["once"]), 0)
+            self.assertEqual(cli.main(["engagement"]), 0)
+
+        compose.assert_called_once_with()
+        post.assert_called_once_with(3)
+        once.assert_called_once_with()
+        poll.assert_called_once_with()
+        setup_logging.assert_any_call("debug", None)
+
+    def test_command_is_required(self):
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            cli.main([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from twitter_bot import timeline_export
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def _mock_timeline(total, fail_on_page=None):
+    """Returns a mock client whose get_users_tweets pages through `total` tweets."""
+    client = MagicMock()
+    created_at = datetime.datetime.fromisoformat("2023-10-26T10:00:00+00:00")
+
+    def get_users_tweets(id, max_results, pagination_token=None, **kwargs):
+        start = int(pagination_token or 0)
+        if fail_on_page is not None and start // max_results == fail_on_page:
+            raise OSError("connection reset")
+        ids = range(total - start, max(total - start - max_results, 0), -1)
+        next_token = str(start + max_results) if start + max_results < total else None
+        return MagicMock(
+            data=[MagicMock(id=i, text=f"tweet {i}", public_metrics={"like_count": i}, attachments=None,
+                            created_at=created_at) for i in ids],
+            includes=None, meta={"next_token": next_token} if next_token else {})
+    client.get_users_tweets.side_effect = get_users_tweets
+    return client
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestTimelinePages(unittest.TestCase):
+
+    def test_follows_pagination_with_largest_page_size(self):
+        client = _mock_timeline(250)
+        pages = list(timeline_export.iter_timeline_pages("42", client=client))
+
+        self.assertEqual([len(page) for page, _ in pages], [100, 100, 50])
+        self.assertEqual([token for _, token in pages], ["100", "200", None])
+        for call in client.get_users_tweets.call_args_list:
+            self.assertEqual(call.kwargs["max_results"], timeline_export.MAX_PAGE_SIZE)
+        self.assertNotIn("pagination_token", client.get_users_tweets.call_args_list[0].kwargs)
+
+    def test_tweets_are_yielded_lazily(self):
+        client = _mock_timeline(1000)
+        tweets = timeline_export.iter_user_timeline("42", client=client)
+        self.assertEqual(next(tweets)["id"], 1000)
+        self.assertEqual(client.get_users_tweets.call_count, 1)
+
+
+class TestExportTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "timeline.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exports_every_tweet_as_jsonl(self):
+        count = timeline_export.export_timeline("42", self.path, client=_mock_timeline(250))
+
+        records = _read_jsonl(self.path)
+        self.assertEqual(count, 250)
+        self.assertEqual([r["id"] for r in records], list(range(250, 0, -1)))
+        self.assertEqual(records[0]["user_id"], "42")
+        self.assertEqual(records[0]["like_count"], 250)
+
+    def test_crash_resumes_from_the_last_committed_page(self):
+        with self.assertRaises(OSError):
+            timeline_export.export_timeline("42", self.path, client=_mock_timeline(350, fail_on_page=2))
+        self.assertEqual(len(_read_jsonl(self.path)), 200)
+
+        client = _mock_timeline(350)
+        count = timeline_export.export_timeline("42", self.path, client=client)
+
+        self.assertEqual(count, 350)
+        self.assertEqual(client.get_users_tweets.call_args_list[0].kwargs["pagination_token"], "200")
+        self.assertEqual([r["id"] for r in _read_jsonl(self.path)], list(range(350, 0, -1)))
+
+    def test_uncommitted_lines_are_dropped_on_resume(self):
+        timeline_export.export_timeline("42", self.path, client=_mock_timeline(300), max_pages=1)
+        with open(self.path, "a") as f:
+            f.write('{"id": "half-written')  # Crash between writing a page and committing it
+
+        timeline_export.export_timeline("42", self.path, client=_mock_timeline(300))
+
+        self.assertEqual([r["id"] for r in _read_jsonl(self.path)], list(range(300, 0, -1)))
+
+    def test_finished_export_makes_no_requests(self):
+        timeline_export.export_timeline("42", self.path, client=_mock_timeline(120))
+        client = _mock_timeline(120)
+        self.assertEqual(timeline_export.export_timeline("42", self.path, client=client), 120)
+        client.get_users_tweets.assert_not_called()
+
+    def test_another_user_starts_a_fresh_export(self):
+        timeline_export.export_timeline("42", self.path, client=_mock_timeline(120))
+        self.assertEqual(timeline_export.export_timeline("7", self.path, client=_mock_timeline(30)), 30)
+        self.assertEqual(len(_read_jsonl(self.path)), 30)
+
+    @unittest.skipUnless(pq, "pyarrow is not installed")
+    def test_parquet_parts_are_resumable(self):
+        path = os.path.join(self.tmp.name, "timeline.parquet")
+        with self.assertRaises(OSError):
+            timeline_export.export_timeline("42", path, client=_mock_timeline(450, fail_on_page=3),
+                                            rows_per_part=200)
+        self.assertEqual(sorted(os.listdir(path)), ["part-00000.parquet"])
+
+        count = timeline_export.export_timeline("42", path, client=_mock_timeline(450), rows_per_part=200)
+
+        table = pq.read_table(path)
+        self.assertEqual(count, 450)
+        self.assertEqual(table.num_rows, 450)
+        self.assertEqual(table.column("id").to_pylist(), list(range(450, 0, -1)))
+        self.assertEqual(str(table.schema.field("created_at").type), "timestamp[us, tz=UTC]")
+
+    @unittest.skipUnless(pq, "pyarrow is not installed")
+    def test_parquet_resume_leaves_unrelated_files_alone(self):
+        path = os.path.join(self.tmp.name, "timeline.parquet")
+        os.makedirs(path)
+        for name in ("part-notes.txt", "part-00003.parquet"):
+            open(os.path.join(path, name), "w").close()
+
+        timeline_export.ParquetWriter(path, position=1)
+
+        self.assertEqual(os.listdir(path), ["part-notes.txt"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import tweepy
+
+from twitter_bot import config, tweet_queue
+from twitter_bot.article import Article
+from twitter_bot.composer import InvalidTweetText
+from twitter_bot.posted_index import PostedIndex
+from twitter_bot.rate_limiter import RateLimitExceeded
+from twitter_bot.tweet_queue import TweetQueue, PostingWorker
+
+
+class TestTweetQueue(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "queue.sqlite3")
+        self.queue = TweetQueue(self.path, lease_seconds=60)
+        self.addCleanup(self.queue.close)
+
+    def test_enqueue_is_idempotent(self):
+        self.assertTrue(self.queue.enqueue("hello", "key-1"))
+        self.assertFalse(self.queue.enqueue("hello again", "key-1"))
+        self.assertEqual(self.queue.depth(), 1)
+        self.assertTrue(self.queue.contains("key-1"))
+
+    def test_uses_wal_mode(self):
+        mode = self.queue._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_expired_lease_is_redelivered_after_crash(self):
+        self.queue.enqueue("hello", "key-1")
+        first = self.queue.claim()
+        self.assertIsNone(self.queue.claim())  # Leased, not handed out twice
+
+        # The worker holding the lease "crashed"; a fresh process sees it once the lease expires
+        reopened = TweetQueue(self.path, lease_seconds=60)
+        self.addCleanup(reopened.close)
+        again = reopened.claim(now=time.time() + 61)
+        self.assertEqual(again.id, first.id)
+        self.assertEqual(again.attempts, 2)
+
+    def test_lease_must_outlast_the_longest_send(self):
+        tweet_queue.check_lease()  # The defaults are consistent
+        with patch.object(config, "TWEET_QUEUE_LEASE_SECONDS", 300), self.assertRaises(ValueError):
+            tweet_queue.check_lease()
+        with patch.object(config, "X_API_MAX_WAIT_SECONDS", 60):
+            tweet_queue.check_lease(300)
+
+
+class TestPostingWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = TweetQueue(":memory:")
+        self.posted_index = PostedIndex(":memory:")
+        self.article = Article("Story", "https://example.com/story")
+        self.queue.enqueue("News: Story https://example.com/story", self.article.key, self.article)
+
+    def _forbidden(self, message):
+        response = MagicMock(status_code=403, reason="Forbidden")
+        response.json.return_value = {"detail": message}
+        return tweepy.Forbidden(response)
+
+    def test_successful_post_is_marked_sent_and_recorded(self):
+        send = MagicMock(return_value=MagicMock(data={"id": "99"}))
+        worker = PostingWorker(self.queue, send, self.posted_index)
+
+        self.assertEqual(worker.drain(), 1)
+        send.assert_called_once_with("News: Story https://example.com/story")
+        self.assertEqual(self.queue.stats()["sent"], 1)
+        self.assertTrue(self.posted_index.contains_article(self.article))
+
+    def test_failures_are_retried_then_given_up(self):
+        send = MagicMock(side_effect=OSError("timeout"))
+        worker = PostingWorker(self.queue, send, self.posted_index, max_attempts=2, retry_base=0)
+
+        worker.drain()
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(self.queue.stats()["failed"], 1)
+        self.assertFalse(self.posted_index.contains_article(self.article))
+
+    def test_duplicate_rejection_counts_as_delivered(self):
+        send = MagicMock(side_effect=self._forbidden("You are not allowed to create a Tweet with duplicate content."))
+        worker = PostingWorker(self.queue, send, self.posted_index)
+
+        worker.drain()
+        self.assertEqual(self.queue.stats()["sent"], 1)
+        self.assertTrue(self.posted_index.contains_article(self.article))
+
+    def test_invalid_text_is_not_retried(self):
+        send = MagicMock(side_effect=InvalidTweetText("Tweet text is too long"))
+        worker = PostingWorker(self.queue, send, max_attempts=5, retry_base=0)
+
+        worker.drain()
+        send.assert_called_once()
+        self.assertEqual(self.queue.stats()["failed"], 1)
+
+    def test_closed_rate_limit_window_defers_without_using_attempts(self):
+        now = [time.time()]
+        reset_at = now[0] + 86400
+        send = MagicMock(side_effect=RateLimitExceeded("create_tweet window resets in 86400s", reset_at=reset_at))
+        worker = PostingWorker(self.queue, send, max_attempts=2, retry_base=0)
+
+        with patch("twitter_bot.tweet_queue.time.time", side_effect=lambda: now[0]):
+            self.assertTrue(worker.process_one())
+            self.assertFalse(worker.process_one())  # Not due before the window reopens
+            now[0] = reset_at
+            for _ in range(5):  # Still closed each time the window was due to reopen
+                now[0] += 1
+                self.assertTrue(worker.process_one())
+
+            self.assertEqual(send.call_count, 6)
+            self.assertEqual(self.queue.stats()["failed"], 0)
+            self.assertEqual(self.queue.claim().attempts, 1)
+
+    def test_missing_credentials_are_retried(self):
+        send = MagicMock(side_effect=ValueError("Twitter API credentials are not fully configured."))
+        worker = PostingWorker(self.queue, send, max_attempts=5, retry_base=60)
+
+        worker.drain()
+        send.assert_called_once()
+        self.assertEqual(self.queue.stats()["failed"], 0)
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ import datetime # For created_at fields
 # For example, if 'twitter_bot' is in PYTHONPATH or tests are run from project root.
 # This import assumes tests might be run as 'python -m unittest discover' from project root.
 from twitter_bot.twitter_client import get_twitter_user_info
+from twitter_bot import twitter_client
 # from twitter_bot import config # To potentially mock config values if needed, though not directly for this test
 
 # Import TweepyException for error simulation if not already available via twitter_client
@@ -21,6 +22,9 @@ except ImportError:
 
 class TestTwitterClient(unittest.TestCase):
 
+    def setUp(self):
+        twitter_client.clear_user_cache()
+
     @patch('twitter_bot.twitter_client.get_twitter_client')
     def test_get_twitter_user_info_success(self, mock_get_twitter_client):
         # --- Mocking setup ---
@@ -191,5 +195,185 @@ class TestTwitterClient(unittest.TestCase):
         tweet_result = result['recent_tweets'][0]
         self.assertEqual(len(tweet_result['image_urls']), 0) # Expect no image URLs
 
+def _mock_user(username, user_id):
+    return MagicMock(id=user_id, username=username, name=username.title(), public_metrics={'followers_count': 1},
+                     created_at=datetime.datetime.fromisoformat("2023-01-01T00:00:00+00:00"), description=None,
+                     location=None, profile_image_url=None, url=None, verified=False)
+
+
+class TestBatchUserLookup(unittest.TestCase):
+
+    def setUp(self):
+        twitter_client.clear_user_cache()
+
+    def _mock_client(self, known_usernames):
+        mock_client = MagicMock()
+        known = {name.lower(): _mock_user(name, str(i)) for i, name in enumerate(known_usernames)}
+        mock_client.get_users.side_effect = lambda usernames, user_fields: MagicMock(
+            data=[known[name] for name in usernames if name in known] or None)
+        mock_client.get_users_tweets.side_effect = lambda id, **kwargs: MagicMock(
+            data=[MagicMock(id=f"t{id}", text=f"tweet by {id}", public_metrics={}, attachments=None,
+                            created_at=datetime.datetime.fromisoformat("2023-10-26T10:00:00+00:00"))],
+            includes=None)
+        return mock_client
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_batches_lookups_and_counts_round_trips(self, mock_get_twitter_client):
+        usernames = [f"user{i}" for i in range(250)]
+        mock_client = self._mock_client(usernames)
+        mock_get_twitter_client.return_value = mock_client
+
+        results = twitter_client.get_twitter_users_info(usernames, max_workers=4)
+
+        self.assertEqual(mock_client.get_users.call_count, 3)  # 100 + 100 + 50
+        self.assertEqual(mock_client.get_users_tweets.call_count, 250)
+        self.assertEqual(list(results), usernames)
+        self.assertEqual(results["user7"]["recent_tweets"][0]["text"], "tweet by 7")
+        self.assertEqual(results["user7"]["followers_count"], 1)
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_unknown_users_map_to_none_and_case_is_ignored(self, mock_get_twitter_client):
+        mock_client = self._mock_client(["Alice"])
+        mock_get_twitter_client.return_value = mock_client
+
+        results = twitter_client.get_twitter_users_info(["alice", "ALICE", "ghost"])
+
+        mock_client.get_users.assert_called_once_with(usernames=["alice", "ghost"], user_fields=twitter_client.USER_FIELDS)
+        self.assertEqual(mock_client.get_users_tweets.call_count, 1)
+        self.assertEqual(results["alice"]["username"], "Alice")
+        self.assertIs(results["ALICE"], results["alice"])
+        self.assertIsNone(results["ghost"])
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_timeline_error_only_affects_that_user(self, mock_get_twitter_client):
+        mock_client = self._mock_client(["ok", "broken"])
+        fetch_tweets = mock_client.get_users_tweets.side_effect
+
+        def get_users_tweets(id, **kwargs):
+            if id == "1":
+                raise TweepyException("timeline error")
+            return fetch_tweets(id, **kwargs)
+        mock_client.get_users_tweets.side_effect = get_users_tweets
+        mock_get_twitter_client.return_value = mock_client
+
+        results = twitter_client.get_twitter_users_info(["ok", "broken"])
+
+        self.assertIsNotNone(results["ok"])
+        self.assertIsNone(results["broken"])
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_exhausted_lookup_window_maps_that_chunk_to_none(self, mock_get_twitter_client):
+        usernames = [f"user{i}" for i in range(150)]
+        mock_get_twitter_client.return_value = self._mock_client(usernames)
+        call = twitter_client.rate_limiter.call
+
+        def limited_call(endpoint, func, *args, **kwargs):
+            if endpoint == "get_users" and "user0" not in kwargs["usernames"]:
+                raise twitter_client.RateLimitExceeded("get_users window resets in 900s")
+            return call(endpoint, func, *args, **kwargs)
+
+        with patch.object(twitter_client.rate_limiter, "call", side_effect=limited_call):
+            results = twitter_client.get_twitter_users_info(usernames)
+
+        self.assertEqual(list(results), usernames)
+        self.assertIsNotNone(results["user99"])
+        self.assertIsNone(results["user100"])
+
+
+class TestUserInfoCache(unittest.TestCase):
+
+    def setUp(self):
+        twitter_client.clear_user_cache()
+
+    def tearDown(self):
+        twitter_client.clear_user_cache()
+
+    def _mock_client(self):
+        mock_client = MagicMock()
+        mock_client.get_user.return_value = MagicMock(data=_mock_user("Cached", "42"))
+        mock_client.get_users_tweets.return_value = MagicMock(data=[], includes=None)
+        return mock_client
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_repeat_lookup_is_served_from_cache(self, mock_get_twitter_client):
+        mock_client = self._mock_client()
+        mock_get_twitter_client.return_value = mock_client
+
+        first = get_twitter_user_info("Cached")
+        second = get_twitter_user_info("cached")
+
+        self.assertEqual(first, second)
+        mock_client.get_user.assert_called_once()
+        mock_client.get_users_tweets.assert_called_once()
+        stats = twitter_client.user_cache_stats()
+        self.assertEqual((stats["profile"]["hits"], stats["profile"]["misses"]), (1, 1))
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_invalidate_user_forces_refetch(self, mock_get_twitter_client):
+        mock_client = self._mock_client()
+        mock_get_twitter_client.return_value = mock_client
+
+        get_twitter_user_info("cached")
+        twitter_client.invalidate_user("CACHED")
+        get_twitter_user_info("cached")
+
+        self.assertEqual(mock_client.get_user.call_count, 2)
+        self.assertEqual(mock_client.get_users_tweets.call_count, 2)
+
+    @patch('twitter_bot.twitter_client.get_twitter_client')
+    def test_batch_lookup_uses_cached_profiles(self, mock_get_twitter_client):
+        mock_client = self._mock_client()
+        mock_get_twitter_client.return_value = mock_client
+
+        get_twitter_user_info("cached")
+        results = twitter_client.get_twitter_users_info(["cached"])
+
+        mock_client.get_users.assert_not_called()
+        mock_client.get_users_tweets.assert_called_once()
+        self.assertEqual(results["cached"]["id"], "42")
+
+
+@patch.multiple('twitter_bot.config', X_API_KEY="key", X_API_SECRET_KEY="secret",
+                X_ACCESS_TOKEN="token", X_ACCESS_TOKEN_SECRET="token_secret")
+class TestSharedTwitterClient(unittest.TestCase):
+
+    def setUp(self):
+        twitter_client._client = None
+
+    def tearDown(self):
+        twitter_client._client = None
+
+    def test_client_is_built_once_and_reused(self):
+        with patch('twitter_bot.twitter_client._build_twitter_client', side_effect=lambda: MagicMock()) as mock_build:
+            first = twitter_client.get_twitter_client()
+            second = twitter_client.get_twitter_client()
+
+        self.assertIs(first, second)
+        mock_build.assert_called_once()
+
+    def test_concurrent_first_use_builds_one_client(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with patch('twitter_bot.twitter_client._build_twitter_client', side_effect=lambda: MagicMock()) as mock_build:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: twitter_client.get_twitter_client(), range(32)))
+
+        self.assertEqual(len({id(c) for c in clients}), 1)
+        mock_build.assert_called_once()
+
+    def test_refresh_replaces_client_with_new_credentials(self):
+        old = twitter_client.get_twitter_client()
+        with patch('twitter_bot.config.X_ACCESS_TOKEN', "rotated"):
+            new = twitter_client.refresh_twitter_client(reload_config=False)
+
+        self.assertIsNot(old, new)
+        self.assertIs(twitter_client.get_twitter_client(), new)
+        self.assertEqual(new.access_token, "rotated")
+
+    def test_missing_credentials_raise(self):
+        with patch('twitter_bot.config.X_API_KEY', None):
+            with self.assertRaises(ValueError):
+                twitter_client.get_twitter_client()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from twitter_bot.user_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_entries_expire_after_ttl(self):
+        cache = TTLCache("test", ttl=10, clock=self.clock)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+        self.clock.now += 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache("test", ttl=60, max_size=2, clock=self.clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")      # "b" is now least recently used
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["size"], 2)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        cache = TTLCache("test", ttl=10, stale_ttl=30, clock=self.clock)
+        cache.set("a", "old")
+        self.clock.now += 15
+        refreshed = threading.Event()
+
+        def loader():
+            refreshed.set()
+            return "new"
+
+        self.assertEqual(cache.get_or_load("a", loader), "old")
+        self.assertTrue(refreshed.wait(2))
+        cache._refresh_pool.shutdown(wait=True)
+        self.assertEqual(cache.get("a"), "new")
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_none_from_loader_is_not_cached(self):
+        cache = TTLCache("test", ttl=10, clock=self.clock)
+        self.assertIsNone(cache.get_or_load("missing", lambda: None))
+        self.assertEqual(cache.get_or_load("missing", lambda: "found"), "found")
+
+    def test_disk_backend_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            TTLCache("profile", ttl=60, path=path, clock=self.clock).set("alice", {"id": "1"})
+
+            reopened = TTLCache("profile", ttl=60, path=path, clock=self.clock)
+            self.assertEqual(reopened.get("alice"), {"id": "1"})
+            self.assertIsNone(TTLCache("tweets", ttl=60, path=path, clock=self.clock).get("alice"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from . import logs
+    from . import twitter_client
+except ImportError:
+    import logs
+    import twitter_client
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100  # Largest max_results get_users_tweets accepts
+MEDIA_FIELDS = ['url', 'preview_image_url', 'type']
+DEFAULT_ROWS_PER_PART = 10000  # Tweets buffered per Parquet part file
+_PART_RE = re.compile(r"^part-(\d{5})\.parquet$")
+
+# Columns of an exported tweet, in file order
+COLUMNS = ("id", "user_id", "text", "created_at", "like_count", "retweet_count", "reply_count", "quote_count",
+           "media_keys", "image_urls")
+
+def iter_timeline_pages(user_id, client=None, page_size: int = MAX_PAGE_SIZE,
+                        pagination_token: Optional[str] = None,
+                        max_pages: Optional[int] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+    """
+    Pages through a user's timeline, newest tweets first.
+
+    Follows the API's next_token until the timeline is exhausted. Each page
+    is fetched only when the previous one has been consumed, so memory use
+    does not grow with the length of the timeline.
+
+    Args:
+        user_id: The user's ID.
+        client (tweepy.Client, optional): Defaults to the shared client.
+        page_size (int): Tweets per request, at most MAX_PAGE_SIZE.
+        pagination_token (str, optional): Token of the page to start at, to resume.
+        max_pages (int, optional): Stop after this many pages.
+
+    Yields:
+        tuple: (tweets, next_token): the page's tweets, in the format of
+               get_twitter_user_info's recent_tweets, and the token of the
+               next page (None on the last page).
+    """
+    client = client or twitter_client.get_twitter_client()
+    token = pagination_token
+    pages = 0
+    while True:
+        kwargs = {"pagination_token": token} if token else {}
+        response = twitter_client.rate_limiter.call(
+            "get_users_tweets", client.get_users_tweets,
+            id=user_id,
+            max_results=max(5, min(page_size, MAX_PAGE_SIZE)),
+            tweet_fields=twitter_client.TWEET_FIELDS,
+            expansions=['attachments.media_keys'],
+            media_fields=MEDIA_FIELDS,
+            **kwargs
+        )
+        token = (response.meta or {}).get("next_token")
+        pages += 1
+        yield twitter_client._tweets_to_info(response), token
+        if not token or (max_pages is not None and pages >= max_pages):
+            return
+
+def iter_user_timeline(user_id, **kwargs) -> Iterator[Dict[str, Any]]:
+    """Yields a user's tweets one at a time; takes the arguments of iter_timeline_pages."""
+    for tweets, _ in iter_timeline_pages(user_id, **kwargs):
+        yield from tweets
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Replaces path with data atomically, so a crash leaves the old or the new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class JsonlWriter:
+    """Appends one JSON object per line. Its position is the byte offset of the committed data."""
+
+    def __init__(self, path: str, position: Optional[int] = None):
+        self.path = path
+        self._file = open(path, "ab")
+        # Drop lines written after the last commit (or everything, for a fresh export)
+        self._file.truncate(position or 0)
+        self._file.seek(position or 0)
+
+    def write(self, records: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8"))
+
+    def should_commit(self) -> bool:
+        return True
+
+    def commit(self) -> int:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """
+    Writes a directory of Parquet part files. Records are buffered until
+    rows_per_part are pending; its position is the number of parts committed.
+
+    Requires pyarrow.
+    """
+
+    def __init__(self, path: str, position: Optional[int] = None, rows_per_part: int = DEFAULT_ROWS_PER_PART):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+        self._pa, self._pq = pa, pq
+        self.path = path
+        self.parts = position or 0
+        self.rows_per_part = rows_per_part
+        self._pending: List[Dict[str, Any]] = []
+        self.schema = pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("text", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("like_count", pa.int64()), ("retweet_count", pa.int64()),
+            ("reply_count", pa.int64()), ("quote_count", pa.int64()),
+            ("media_keys", pa.list_(pa.string())), ("image_urls", pa.list_(pa.string())),
+        ])
+        os.makedirs(path, exist_ok=True)
+        # Drop parts written after the last commit (or everything, for a fresh export)
+        for name in os.listdir(path):
+            match = _PART_RE.match(name)
+            if match and int(match.group(1)) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def write(self, records: List[Dict[str, Any]]):
+        self._pending.extend(records)
+
+    def should_commit(self) -> bool:
+        return len(self._pending) >= self.rows_per_part
+
+    def commit(self) -> int:
+        if self._pending:
+            columns = {name: [r.get(name) for r in self._pending] for name in COLUMNS}
+            for name in ("id", "user_id"):
+                columns[name] = [int(v) if v is not None else None for v in columns[name]]
+            columns["created_at"] = [datetime.datetime.fromisoformat(t) if t else None for t in columns["created_at"]]
+            table = self._pa.table(columns, schema=self.schema)
+            self._pq.write_table(table, os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+            self.parts += 1
+            self._pending = []
+        return self.parts
+
+    def close(self):
+        self._pending = []
+
+def export_timeline(user_id, path: str, format: Optional[str] = None, client=None,
+                    page_size: int = MAX_PAGE_SIZE, max_pages: Optional[int] = None,
+                    rows_per_part: int = DEFAULT_ROWS_PER_PART) -> int:
+    """
+    Exports a user's full timeline to a file, resuming an interrupted export.
+
+    Tweets are written page by page, so memory use stays flat. After data is
+    flushed to disk, a cursor (path + ".cursor") records the next page token
+    and the committed file position. Running the export again after a crash
+    truncates anything written after the last commit and continues from that
+    page. Running it again after it finished makes no requests.
+
+    Args:
+        user_id: The user's ID.
+        path (str): Output file (JSONL) or directory (Parquet part files).
+        format (str, optional): "jsonl" or "parquet". Inferred from the path by default.
+        client (tweepy.Client, optional): Defaults to the shared client.
+        page_size (int): Tweets per request, at most MAX_PAGE_SIZE.
+        max_pages (int, optional): Stop after this many pages (the export
+            can be continued by calling again).
+        rows_per_part (int): Tweets per Parquet part file.
+
+    Returns:
+        int: Number of tweets exported so far.
+    """
+    format = format or ("parquet" if path.endswith(".parquet") else "jsonl")
+    if format not in ("jsonl", "parquet"):
+        raise ValueError(f"Unknown export format {format!r}; expected 'jsonl' or 'parquet'.")
+    cursor_path = path.rstrip("/\\") + ".cursor"
+    cursor = None
+    if os.path.exists(cursor_path):
+        with open(cursor_path) as f:
+            cursor = json.load(f)
+        if str(cursor.get("user_id")) != str(user_id) or cursor.get("format") != format:
+            cursor = None  # A different export used this path; start over
+    if cursor and cursor["done"]:
+        logger.info("Timeline of %s already exported to %s (%d tweets).", user_id, path, cursor['tweets'])
+        return cursor["tweets"]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    position = cursor["position"] if cursor else None
+    tweets = cursor["tweets"] if cursor else 0
+    token = cursor["next_token"] if cursor else None
+    if cursor:
+        logger.info("Resuming export of %s at %d tweets.", user_id, tweets)
+    if format == "parquet":
+        writer = ParquetWriter(path, position, rows_per_part)
+    else:
+        writer = JsonlWriter(path, position)
+
+    pending = 0
+    try:
+        for page, next_token in iter_timeline_pages(user_id, client=client, page_size=page_size,
+                                                    pagination_token=token, max_pages=max_pages):
+            writer.write([dict(tweet, user_id=user_id) for tweet in page])
+            pending += len(page)
+            if next_token is None or writer.should_commit():
+                position = writer.commit()
+                tweets += pending
+                pending = 0
+                _write_json(cursor_path, {"user_id": user_id, "format": format, "next_token": next_token,
+                                          "position": position, "tweets": tweets, "done": next_token is None})
+            token = next_token
+        if pending:
+            # Stopped by max_pages before the writer wanted to commit
+            position = writer.commit()
+            tweets += pending
+            _write_json(cursor_path, {"user_id": user_id, "format": format, "next_token": token,
+                                      "position": position, "tweets": tweets, "done": False})
+    finally:
+        writer.close()
+    logger.info("Exported %d tweets of %s to %s.", tweets, user_id, path)
+    return tweets
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export a user's timeline to JSONL or Parquet.")
+    parser.add_argument("username", help="X/Twitter handle (without '@')")
+    parser.add_argument("path", help="Output .jsonl file or .parquet directory")
+    parser.add_argument("--max-pages", type=int)
+    args = parser.parse_args()
+    logs.setup_logging()
+    user = twitter_client.profile_cache.get_or_load(args.username.lower(),
+                                                    lambda: twitter_client._fetch_profile(args.username))
+    if user is None:
+        parser.exit(1, f"User {args.username} not found.\n")
+    export_timeline(user["id"], args.path, max_pages=args.max_pages)
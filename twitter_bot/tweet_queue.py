@@ -0,0 +1,357 @@
+import logging
+import random
+import threading
+import time
+from typing import Optional, Dict, Callable, Any, List, NamedTuple
+
+try:
+    from . import composer
+    from . import config
+    from . import metrics
+    from . import storage
+    from .lazy import LazyModule
+    from .rate_limiter import RateLimitExceeded
+except ImportError:
+    import composer
+    import config
+    import metrics
+    import storage
+    from lazy import LazyModule
+    from rate_limiter import RateLimitExceeded
+
+tweepy = LazyModule("tweepy")
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    article_link TEXT,
+    article_title TEXT,
+    source TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    tweet_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at);
+"""
+
+# Row states: pending -> inflight -> sent, or back to pending for a retry, or failed for good.
+PENDING, INFLIGHT, SENT, FAILED = "pending", "inflight", "sent", "failed"
+
+class QueuedTweet(NamedTuple):
+    """A tweet claimed from the queue for posting."""
+    id: int
+    idempotency_key: str
+    text: str
+    article_link: Optional[str]
+    article_title: Optional[str]
+    source: Optional[str]
+    attempts: int
+
+class SentTweet(NamedTuple):
+    """A tweet the queue has delivered."""
+    tweet_id: str
+    article_link: Optional[str]
+    source: Optional[str]
+    sent_at: float
+
+class TweetQueue:
+    """
+    Durable outbound tweet queue stored in SQLite (WAL mode).
+
+    Composed tweets are enqueued with an idempotency key (normally the
+    article's dedup key); enqueuing the same key twice is a no-op. A worker
+    claims a tweet by leasing it. If the worker crashes before marking it sent
+    or failed, the lease expires and the tweet is handed out again, so
+    delivery is at-least-once.
+    """
+
+    def __init__(self, path: Optional[str] = None, lease_seconds: Optional[float] = None):
+        self.path = path or config.TWEET_QUEUE_PATH
+        self.lease_seconds = config.TWEET_QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self._lock = threading.Lock()
+        self._conn = storage.connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, text: str, idempotency_key: str, article=None) -> bool:
+        """
+        Adds a tweet to the queue.
+
+        Args:
+            text (str): The tweet text.
+            idempotency_key (str): Key identifying the tweet's content.
+            article (Article, optional): The article the tweet is about.
+
+        Returns:
+            bool: True if queued, False if the key was already in the queue.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, text, article_link, article_title, source, "
+                "next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (idempotency_key, text,
+                 article.link if article else None, article.title if article else None,
+                 article.source if article else None, now, now)
+            )
+        return cursor.rowcount == 1
+
+    def contains(self, idempotency_key: str) -> bool:
+        """Returns True if a tweet with this key was ever queued (in any state)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        return row is not None
+
+    def claim(self, now: Optional[float] = None) -> Optional[QueuedTweet]:
+        """
+        Leases the oldest tweet that is due, or one whose lease has expired.
+
+        Returns:
+            Optional[QueuedTweet]: The claimed tweet, or None if nothing is due.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, idempotency_key, text, article_link, article_title, source, attempts FROM outbox "
+                    "WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (PENDING, now, INFLIGHT, now)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE outbox SET status = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                        (INFLIGHT, now + self.lease_seconds, row[0])
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if row is None:
+            return None
+        tweet = QueuedTweet(*row)
+        return tweet._replace(attempts=tweet.attempts + 1)
+
+    def mark_sent(self, queue_id: int, tweet_id: Optional[str] = None):
+        """Records that a claimed tweet was posted."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, tweet_id = ?, sent_at = ?, lease_until = NULL, last_error = NULL "
+                "WHERE id = ?",
+                (SENT, tweet_id, time.time(), queue_id)
+            )
+
+    def mark_retry(self, queue_id: int, error: str, retry_at: float):
+        """Returns a claimed tweet to the queue to be retried at retry_at."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                (PENDING, retry_at, error, queue_id)
+            )
+
+    def defer(self, queue_id: int, error: str, retry_at: float):
+        """Returns a claimed tweet to the queue until retry_at, without counting the attempt."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, lease_until = NULL, last_error = ?, "
+                "attempts = MAX(attempts - 1, 0) WHERE id = ?",
+                (PENDING, retry_at, error, queue_id)
+            )
+
+    def mark_failed(self, queue_id: int, error: str):
+        """Gives up on a claimed tweet."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                (FAILED, error, queue_id)
+            )
+
+    def sent_since(self, since: float) -> List[SentTweet]:
+        """Returns the tweets posted at or after since (epoch seconds) whose tweet ID is known."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tweet_id, article_link, source, sent_at FROM outbox "
+                "WHERE status = ? AND sent_at >= ? AND tweet_id IS NOT NULL ORDER BY sent_at",
+                (SENT, since)
+            ).fetchall()
+        return [SentTweet(*row) for row in rows]
+
+    def depth(self) -> int:
+        """Returns the number of tweets waiting to be posted (pending or in flight)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN (?, ?)", (PENDING, INFLIGHT)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of tweets in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        stats = {PENDING: 0, INFLIGHT: 0, SENT: 0, FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def check_lease(lease_seconds: Optional[float] = None):
+    """
+    Checks that a claim outlives the longest send, so no other worker re-delivers a tweet still being posted.
+
+    A send can wait up to X_API_MAX_WAIT_SECONDS for the create_tweet window
+    and then X_API_TIMEOUT_SECONDS for the request.
+
+    Raises:
+        ValueError: If the lease (default TWEET_QUEUE_LEASE_SECONDS) is too short.
+    """
+    lease_seconds = config.TWEET_QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    longest_send = config.X_API_MAX_WAIT_SECONDS + config.X_API_TIMEOUT_SECONDS
+    if lease_seconds <= longest_send:
+        raise ValueError(f"TWEET_QUEUE_LEASE_SECONDS ({lease_seconds:.0f}) must be longer than "
+                         f"X_API_MAX_WAIT_SECONDS + X_API_TIMEOUT_SECONDS ({longest_send:.0f}), or tweets "
+                         "still being sent can be claimed and posted again by another worker.")
+
+def _is_rate_limited(error: Exception) -> bool:
+    """True if the send was turned away by a closed rate-limit window, not because of the tweet."""
+    return isinstance(error, (RateLimitExceeded, tweepy.TooManyRequests))
+
+def _is_duplicate(error: Exception) -> bool:
+    """True if X rejected the tweet because identical content was already posted."""
+    return isinstance(error, tweepy.Forbidden) and "duplicate" in str(error).lower()
+
+class PostingWorker:
+    """
+    Drains a TweetQueue, posting each tweet with retries.
+
+    Failed posts are retried with jittered exponential backoff up to
+    max_attempts, then marked failed; only text X would reject
+    (composer.InvalidTweetText) fails at once. A closed rate-limit window
+    defers the tweet until it reopens without counting an attempt. A 403 "duplicate content" response is
+    treated as delivered: it means an earlier attempt got through before the
+    worker could record it. Posted articles are recorded in the PostedIndex.
+    Metrics carry the given labels, e.g. {"account": name} for one account's worker.
+    """
+
+    def __init__(self, queue: TweetQueue, send: Callable[[str], Any], posted_index=None,
+                 max_attempts: Optional[int] = None, retry_base: Optional[float] = None,
+                 poll_interval: float = 30.0, labels: Optional[Dict[str, str]] = None):
+        self.queue = queue
+        self.send = send
+        self.posted_index = posted_index
+        self.max_attempts = config.TWEET_QUEUE_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.retry_base = config.TWEET_QUEUE_RETRY_SECONDS if retry_base is None else retry_base
+        self.poll_interval = poll_interval
+        self.labels = labels or {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = self.retry_base * (2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def process_one(self) -> bool:
+        """
+        Claims and posts one tweet.
+
+        Returns:
+            bool: False if nothing was due, True otherwise.
+        """
+        tweet = self.queue.claim()
+        if tweet is None:
+            return False
+        try:
+            response = self.send(tweet.text)
+        except composer.InvalidTweetText as e:
+            # The text itself is invalid; retrying won't help
+            logger.error("Dropping tweet %s: %s", tweet.id, e)
+            metrics.inc("queue_posts_total", outcome="failed", **self.labels)
+            self.queue.mark_failed(tweet.id, str(e))
+            return True
+        except Exception as e:
+            if _is_rate_limited(e):
+                # The tweet is fine; the window is closed. Waiting for it doesn't use up an attempt.
+                reset_at = getattr(e, "reset_at", None) or getattr(e, "reset_time", None) or 0
+                retry_at = max(reset_at, time.time() + self.retry_base)
+                logger.warning("Tweet %s deferred until the create_tweet window reopens in %.0fs: %s",
+                               tweet.id, retry_at - time.time(), e)
+                metrics.inc("queue_posts_total", outcome="rate_limited", **self.labels)
+                self.queue.defer(tweet.id, str(e), retry_at)
+                return True
+            if _is_duplicate(e):
+                logger.info("Tweet %s was already posted by an earlier attempt.", tweet.id)
+                response = None
+            elif tweet.attempts >= self.max_attempts:
+                logger.error("Giving up on tweet %s after %d attempts: %s", tweet.id, tweet.attempts, e)
+                metrics.inc("queue_posts_total", outcome="failed", **self.labels)
+                self.queue.mark_failed(tweet.id, str(e))
+                return True
+            else:
+                delay = self._retry_delay(tweet.attempts)
+                logger.warning("Tweet %s failed (attempt %d/%d), retrying in %.0fs: %s",
+                               tweet.id, tweet.attempts, self.max_attempts, delay, e)
+                metrics.inc("queue_posts_total", outcome="retry", **self.labels)
+                self.queue.mark_retry(tweet.id, str(e), time.time() + delay)
+                return True
+
+        tweet_id = response.data["id"] if response is not None and response.data else None
+        self.queue.mark_sent(tweet.id, tweet_id)
+        metrics.inc("queue_posts_total", outcome="sent", **self.labels)
+        if self.posted_index is not None and tweet.article_link and tweet.article_title:
+            self.posted_index.add(tweet.article_link, tweet.article_title)
+        return True
+
+    def drain(self, max_items: Optional[int] = None) -> int:
+        """
+        Posts due tweets until the queue has none left (or max_items were handled).
+
+        Returns:
+            int: The number of tweets handled (posted, retried or failed).
+        """
+        handled = 0
+        while (max_items is None or handled < max_items) and not self._stop.is_set():
+            if not self.process_one():
+                break
+            handled += 1
+        if handled:
+            metrics.set_gauge("tweet_queue_depth", self.queue.depth(), **self.labels)
+        return handled
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.exception("Posting worker error: %s", e)
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Starts draining the queue on a background thread every poll_interval seconds."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tweet-posting-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Signals the background thread to stop and waits for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -1,10 +1,61 @@
-import tweepy
-from typing import Optional, Dict, Any, List # Added type hints
-from . import config # Use relative import if config.py is in the same directory
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Iterable # Added type hints
+try:
+    from . import config # Use relative import if config.py is in the same directory
+    from .lazy import LazyModule
+    from .rate_limiter import RateLimiter, RateLimitExceeded
+    from .user_cache import TTLCache
+    from . import composer
+    from .media_cache import MediaCache
+except ImportError:
+    import config
+    from lazy import LazyModule
+    from rate_limiter import RateLimiter, RateLimitExceeded
+    from user_cache import TTLCache
+    import composer
+    from media_cache import MediaCache
 
-def get_twitter_client():
-    """Initializes and returns a Tweepy API client."""
-    if not all([config.X_API_KEY, config.X_API_SECRET_KEY, config.X_ACCESS_TOKEN, config.X_ACCESS_TOKEN_SECRET]):
+logger = logging.getLogger(__name__)
+
+# Imported on first use, so commands that never call the API don't load them
+tweepy = LazyModule("tweepy")
+requests = LazyModule("requests")
+
+# Process-wide client shared by all calls, so its HTTP session keeps connections alive.
+_client = None
+_client_lock = threading.Lock()
+
+# Tracks x-rate-limit-* headers of every response and paces calls to stay under them.
+rate_limiter = RateLimiter()
+
+# Caches for user lookups: profiles by lowercased username, recent tweets by user ID.
+profile_cache = TTLCache(
+    "profile", ttl=config.USER_PROFILE_TTL_SECONDS, stale_ttl=config.USER_CACHE_STALE_SECONDS,
+    max_size=config.USER_CACHE_MAX_SIZE, path=config.USER_CACHE_PATH
+)
+tweets_cache = TTLCache(
+    "tweets", ttl=config.USER_TWEETS_TTL_SECONDS, stale_ttl=config.USER_CACHE_STALE_SECONDS,
+    max_size=config.USER_CACHE_MAX_SIZE, path=config.USER_CACHE_PATH
+)
+
+# Image cache filled by prefetch_media lookups, created on first use.
+_media_cache = None
+_media_cache_lock = threading.Lock()
+
+def build_client(api_key: Optional[str], api_secret_key: Optional[str], access_token: Optional[str],
+                 access_token_secret: Optional[str], limiter: Optional[RateLimiter] = None):
+    """
+    Initializes and returns a new Tweepy API client for one set of user credentials.
+
+    The client gets its own keep-alive connection pool, and every response
+    it receives updates limiter (by default the shared rate_limiter).
+
+    Raises:
+        ValueError: If any of the credentials is missing.
+    """
+    if not all([api_key, api_secret_key, access_token, access_token_secret]):
         raise ValueError("Twitter API credentials are not fully configured. "
                          "Please check your .env file or environment variables.")
 
@@ -17,13 +68,82 @@ def get_twitter_client():
 
     # Using Tweepy's Client for V2 API (preferred for most text-based operations)
     client = tweepy.Client(
-        consumer_key=config.X_API_KEY,
-        consumer_secret=config.X_API_SECRET_KEY,
-        access_token=config.X_ACCESS_TOKEN,
-        access_token_secret=config.X_ACCESS_TOKEN_SECRET
+        consumer_key=api_key,
+        consumer_secret=api_secret_key,
+        access_token=access_token,
+        access_token_secret=access_token_secret
     )
+    # Size the keep-alive pool for concurrent callers sharing this client
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=config.X_CONNECTION_POOL_SIZE)
+    client.session.mount("https://", adapter)
+    client.session.hooks["response"].append((limiter or rate_limiter).on_response)
     return client # , api_v1 (if using both v1 and v2)
 
+def _build_twitter_client():
+    """Initializes and returns a new Tweepy API client from the current config."""
+    return build_client(config.X_API_KEY, config.X_API_SECRET_KEY, config.X_ACCESS_TOKEN, config.X_ACCESS_TOKEN_SECRET)
+
+def get_twitter_client():
+    """
+    Returns the shared Tweepy API client, creating it on first use.
+
+    The client (and its pooled HTTP session) is reused across calls and
+    threads so TCP/TLS connections to the API are kept alive.
+    """
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_twitter_client()
+            client = _client
+    return client
+
+def refresh_twitter_client(reload_config: bool = True):
+    """
+    Replaces the shared client, e.g. after API credentials were rotated.
+
+    Args:
+        reload_config (bool): Re-read credentials from the .env file and
+                              environment before building the new client.
+
+    Returns:
+        The new Tweepy API client.
+    """
+    global _client
+    if reload_config:
+        config.reload_credentials()
+    client = _build_twitter_client()
+    with _client_lock:
+        # Calls already holding the old client finish with it; it is dropped afterwards.
+        _client = client
+    return client
+
+def send_tweet(text: str, client=None, limiter: Optional[RateLimiter] = None):
+    """
+    Posts a tweet to Twitter, raising on failure.
+
+    Args:
+        text (str): The text content of the tweet. Max 280 characters, counted
+                    the way X does (see composer.weighted_length).
+        client (tweepy.Client, optional): Client to post with. Defaults to the
+                                          shared client (see get_twitter_client).
+        limiter (RateLimiter, optional): Rate limiter pacing the call. Defaults
+                                         to the shared rate_limiter.
+    Returns:
+        The response from the Twitter API.
+    Raises:
+        InvalidTweetText: If the text is empty or too long.
+        ValueError: If no client was given and credentials are not configured.
+        RateLimitExceeded: If the create_tweet window won't reopen in time.
+        tweepy.TweepyException: If the API call fails.
+    """
+    composer.validate(text)
+    client = client or get_twitter_client()
+    response = (limiter or rate_limiter).call("create_tweet", client.create_tweet, text=text)
+    logger.info("Tweet posted successfully! Tweet ID: %s", response.data['id'])
+    return response
+
 def post_tweet(text: str):
     """
     Posts a tweet to Twitter.
@@ -32,33 +152,135 @@ def post_tweet(text: str):
     Returns:
         The response from the Twitter API, or None if an error occurs.
     """
-    if not text:
-        print("Error: Tweet text cannot be empty.")
+    try:
+        return send_tweet(text)
+    except ValueError as e:
+        logger.error("Error: %s", e)
         return None
-    if len(text) > 280:
-        print(f"Error: Tweet text is too long ({len(text)} characters). Maximum is 280.")
-        # Consider truncating or raising an error
-        # text = text[:280]
+    except RateLimitExceeded as e:
+        logger.warning("Tweet not posted: %s", e)
         return None
-
-    try:
-        client = get_twitter_client()
-        response = client.create_tweet(text=text)
-        print(f"Tweet posted successfully! Tweet ID: {response.data['id']}")
-        return response
     except tweepy.TweepyException as e:
-        print(f"Error posting tweet: {e}")
+        logger.error("Error posting tweet: %s", e)
         return None
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred: %s", e)
         return None
 
-def get_twitter_user_info(username: str) -> Optional[Dict[str, Any]]:
+# Fields requested for user profiles and their recent tweets
+USER_FIELDS = ['public_metrics', 'id', 'name', 'username', 'created_at', 'description', 'location', 'profile_image_url', 'url', 'verified']
+TWEET_FIELDS = ['created_at', 'public_metrics', 'text', 'attachments']
+MAX_USERS_PER_LOOKUP = 100 # Maximum usernames accepted by one get_users call
+DEFAULT_TIMELINE_WORKERS = 8 # Concurrent get_users_tweets calls in batch lookups
+
+def _user_to_info(user) -> Dict[str, Any]:
+    """Converts a Tweepy User into the profile part of the user info dictionary."""
+    metrics = user.public_metrics or {}
+    return {
+        "id": user.id,
+        "name": user.name,
+        "username": user.username,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "description": user.description,
+        "location": user.location,
+        "profile_image_url": user.profile_image_url,
+        "url": user.url,
+        "verified": user.verified,
+        "followers_count": metrics.get('followers_count', 0),
+        "following_count": metrics.get('following_count', 0),
+        "tweet_count": metrics.get('tweet_count', 0),
+        "listed_count": metrics.get('listed_count', 0)
+    }
+
+def _fetch_profile(username: str) -> Optional[Dict[str, Any]]:
+    """Fetches a user's profile, or returns None if the user doesn't exist."""
+    client = get_twitter_client()
+    response = rate_limiter.call(
+        "get_user", client.get_user,
+        username=username,
+        user_fields=USER_FIELDS
+    )
+    return _user_to_info(response.data) if response.data else None
+
+def _fetch_recent_tweets(client, user_id) -> List[Dict[str, Any]]:
+    """
+    Fetches a user's recent tweets, resolving attached photos to image URLs.
+
+    Raises:
+        tweepy.TweepyException: If the API call fails.
+    """
+    tweets_response = rate_limiter.call(
+        "get_users_tweets", client.get_users_tweets,
+        id=user_id,
+        max_results=5,
+        tweet_fields=TWEET_FIELDS,
+        expansions=['attachments.media_keys']
+    )
+    return _tweets_to_info(tweets_response)
+
+def _tweets_to_info(tweets_response) -> List[Dict[str, Any]]:
+    """Converts a get_users_tweets response into the recent_tweets part of the user info dictionary."""
+    # Map media keys from 'includes' to image URLs
+    media_map = {}
+    if tweets_response.includes and 'media' in tweets_response.includes:
+        for media_item in tweets_response.includes['media']:
+            if media_item.type == 'photo' and media_item.media_key:
+                media_map[media_item.media_key] = media_item.url if media_item.url else media_item.preview_image_url
+
+    recent_tweets_data = []
+    for tweet in tweets_response.data or []:
+        metrics = tweet.public_metrics or {}
+        media_keys = tweet.attachments['media_keys'] if tweet.attachments and 'media_keys' in tweet.attachments else []
+        recent_tweets_data.append({
+            "id": tweet.id,
+            "text": tweet.text,
+            "created_at": tweet.created_at.isoformat(),
+            "like_count": metrics.get('like_count', 0),
+            "retweet_count": metrics.get('retweet_count', 0),
+            "reply_count": metrics.get('reply_count', 0),
+            "quote_count": metrics.get('quote_count', 0),
+            "media_keys": media_keys,
+            "image_urls": [media_map[key] for key in media_keys if key in media_map]
+        })
+    return recent_tweets_data
+
+def get_media_cache() -> MediaCache:
+    """Returns the shared image cache used by prefetch_media lookups, creating it on first use."""
+    global _media_cache
+    with _media_cache_lock:
+        if _media_cache is None:
+            _media_cache = MediaCache()
+        return _media_cache
+
+def prefetch_user_media(user_infos: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Optional[str]]:
+    """
+    Downloads the images of the users' recent tweets into the shared image cache.
+
+    Images already cached are not downloaded again. Read them back with
+    get_media_cache().open(url).
+
+    Args:
+        user_infos (Iterable[Optional[Dict[str, Any]]]): User info dictionaries
+            as returned by get_twitter_user_info; None values are skipped.
+
+    Returns:
+        Dict[str, Optional[str]]: Maps each image URL to its content digest,
+        or to None if it could not be downloaded.
+    """
+    urls = [url for info in user_infos if info
+            for tweet in info.get("recent_tweets", []) for url in tweet.get("image_urls", [])]
+    if not urls:
+        return {}
+    return get_media_cache().prefetch(urls)
+
+def get_twitter_user_info(username: str, prefetch_media: bool = False) -> Optional[Dict[str, Any]]:
     """
     Fetches public information for a given X/Twitter username.
 
     Args:
         username (str): The X/Twitter handle (without '@').
+        prefetch_media (bool): Also download the recent tweets' images into
+            the image cache (see prefetch_user_media).
 
     Returns:
         Optional[Dict[str, Any]]: A dictionary containing user and tweet information
@@ -96,100 +318,127 @@ def get_twitter_user_info(username: str) -> Optional[Dict[str, Any]]:
             ]
         }
     """
-    print(f"Attempting to fetch info for {username}")
+    logger.debug("Attempting to fetch info for %s", username)
     try:
-        client = get_twitter_client()
-        response = client.get_user(
-            username=username,
-            user_fields=['public_metrics', 'id', 'name', 'username', 'created_at', 'description', 'location', 'profile_image_url', 'url', 'verified']
-        )
-
-        if response.data:
-            user = response.data
-            user_info = {
-                "id": user.id,
-                "name": user.name,
-                "username": user.username,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "description": user.description,
-                "location": user.location,
-                "profile_image_url": user.profile_image_url,
-                "url": user.url,
-                "verified": user.verified,
-                "followers_count": user.public_metrics['followers_count'] if user.public_metrics else 0,
-                "following_count": user.public_metrics['following_count'] if user.public_metrics else 0,
-                "tweet_count": user.public_metrics['tweet_count'] if user.public_metrics else 0,
-                "listed_count": user.public_metrics['listed_count'] if user.public_metrics else 0
-            }
-            # For now, just print and return this basic info
-            # print(f"User info for {username}: {user_info}") # Original print
-            # return user_info # Original return
-
+        profile = profile_cache.get_or_load(username.lower(), lambda: _fetch_profile(username))
+        if profile:
+            user_id = profile["id"]
             # Now fetch recent tweets
-            user_id = user_info["id"]
-            tweets_response = client.get_users_tweets(
-                id=user_id,
-                max_results=5,
-                tweet_fields=['created_at', 'public_metrics', 'text', 'attachments'],
-                expansions=['attachments.media_keys']
+            recent_tweets = tweets_cache.get_or_load(
+                user_id, lambda: _fetch_recent_tweets(get_twitter_client(), user_id)
             )
-
-            recent_tweets_data = []
-            if tweets_response.data:
-                for tweet in tweets_response.data:
-                    tweet_details = {
-                        "id": tweet.id,
-                        "text": tweet.text,
-                        "created_at": tweet.created_at.isoformat(),
-                        "like_count": tweet.public_metrics.get('like_count', 0),
-                        "retweet_count": tweet.public_metrics.get('retweet_count', 0),
-                        "reply_count": tweet.public_metrics.get('reply_count', 0),
-                        "quote_count": tweet.public_metrics.get('quote_count', 0),
-                        "media_keys": tweet.attachments['media_keys'] if tweet.attachments and 'media_keys' in tweet.attachments else []
-                    }
-                    recent_tweets_data.append(tweet_details)
-
-            user_info["recent_tweets"] = recent_tweets_data
-
-            # Store media objects if available in 'includes'
-            if tweets_response.includes and 'media' in tweets_response.includes:
-                user_info["tweet_media_includes"] = tweets_response.includes['media']
-            else:
-                user_info["tweet_media_includes"] = []
-
-            # Process media includes to get image URLs
-            media_map = {}
-            if user_info["tweet_media_includes"]:
-                for media_item in user_info["tweet_media_includes"]:
-                    if media_item.type == 'photo' and media_item.media_key:
-                        media_map[media_item.media_key] = media_item.url if media_item.url else media_item.preview_image_url
-
-            for tweet_details in user_info["recent_tweets"]:
-                image_urls = []
-                if "media_keys" in tweet_details and tweet_details["media_keys"]:
-                    for key in tweet_details["media_keys"]:
-                        if key in media_map:
-                            image_urls.append(media_map[key])
-                tweet_details["image_urls"] = image_urls
-                # Optionally remove media_keys if they are no longer needed directly in the tweet object
-                # del tweet_details["media_keys"]
-
-            # Remove temporary media includes field
-            if "tweet_media_includes" in user_info:
-                del user_info["tweet_media_includes"]
-
-            print(f"User info for {username} (with tweets and image URLs): {user_info}")
+            user_info = dict(profile, recent_tweets=[dict(tweet) for tweet in recent_tweets])
+            logger.debug("User info for %s (with tweets and image URLs): %s", username, user_info)
+            if prefetch_media:
+                prefetch_user_media([user_info])
             return user_info
         else:
-            print(f"User {username} not found.")
+            logger.info("User %s not found.", username)
             return None
     except tweepy.TweepyException as e:
-        print(f"Tweepy API error fetching data for user {username}: {e}") # Modified error message slightly
+        logger.error("Tweepy API error fetching data for user %s: %s", username, e)
         return None
     except Exception as e:
-        print(f"Unexpected error fetching data for user {username}: {e}") # Modified error message slightly
+        logger.exception("Unexpected error fetching data for user %s: %s", username, e)
         return None
 
+def get_twitter_users_info(usernames: List[str], max_workers: int = DEFAULT_TIMELINE_WORKERS,
+                           prefetch_media: bool = False) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Fetches public information for many X/Twitter usernames at once.
+
+    Profiles are resolved with one get_users call per 100 usernames, then the
+    recent tweets of each found user are fetched concurrently on a bounded
+    thread pool. Profiling N users takes about N/100 + N requests instead of
+    2N serial ones.
+
+    Args:
+        usernames (List[str]): X/Twitter handles (without '@').
+        max_workers (int): Maximum number of timeline requests in flight.
+        prefetch_media (bool): Also download the recent tweets' images into
+            the image cache, concurrently across all users.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: Maps each requested username to
+        the same dictionary get_twitter_user_info returns, or to None if the
+        user was not found or their data could not be retrieved.
+    """
+    results: Dict[str, Optional[Dict[str, Any]]] = {username: None for username in usernames}
+    # Handles are case-insensitive; look each one up only once
+    requested: Dict[str, List[str]] = {}
+    for username in usernames:
+        requested.setdefault(username.lower(), []).append(username)
+    if not requested:
+        return results
+
+    logger.debug("Attempting to fetch info for %d users", len(requested))
+    try:
+        client = get_twitter_client()
+    except Exception as e:
+        logger.exception("Unexpected error fetching data for users: %s", e)
+        return results
+
+    profiles = []
+    handles = []
+    for handle in requested:
+        cached = profile_cache.get(handle)
+        if cached:
+            profiles.append(cached)
+        else:
+            handles.append(handle)
+    for i in range(0, len(handles), MAX_USERS_PER_LOOKUP):
+        chunk = handles[i:i + MAX_USERS_PER_LOOKUP]
+        try:
+            response = rate_limiter.call("get_users", client.get_users, usernames=chunk, user_fields=USER_FIELDS)
+        except RateLimitExceeded as e:
+            logger.warning("Skipped looking up %d users: %s", len(chunk), e)
+            continue
+        except tweepy.TweepyException as e:
+            logger.error("Tweepy API error looking up %d users: %s", len(chunk), e)
+            continue
+        for user in response.data or []:
+            profile = _user_to_info(user)
+            profile_cache.set(profile["username"].lower(), profile)
+            profiles.append(profile)
+
+    def load_tweets(user_id):
+        return tweets_cache.get_or_load(user_id, lambda: _fetch_recent_tweets(client, user_id))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(load_tweets, profile["id"]): profile for profile in profiles}
+        for future in as_completed(futures):
+            profile = futures[future]
+            try:
+                user_info = dict(profile, recent_tweets=[dict(tweet) for tweet in future.result()])
+            except Exception as e:
+                logger.error("Error fetching tweets for user %s: %s", profile['username'], e)
+                continue
+            for username in requested.get(profile["username"].lower(), []):
+                results[username] = user_info
+
+    missing = [username for username, info in results.items() if info is None]
+    if missing:
+        logger.info("No data retrieved for %d users: %s", len(missing), missing)
+    if prefetch_media:
+        prefetch_user_media(results.values())
+    return results
+
+def invalidate_user(username: str):
+    """Drops a user's cached profile and recent tweets so the next lookup hits the API."""
+    profile = profile_cache.peek(username.lower())
+    profile_cache.invalidate(username.lower())
+    if profile:
+        tweets_cache.invalidate(profile["id"])
+
+def clear_user_cache():
+    """Drops every cached profile and timeline."""
+    profile_cache.clear()
+    tweets_cache.clear()
+
+def user_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns hit-rate and eviction counters of the profile and tweets caches."""
+    return {"profile": profile_cache.stats(), "tweets": tweets_cache.stats()}
+
 if __name__ == '__main__':
     # This section is for testing purposes.
     # It will only run if the script is executed directly.
@@ -0,0 +1,196 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from . import storage
+except ImportError:
+    import storage
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+"""
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a TTL.
+
+    At most max_size entries are kept in memory; the least recently used one
+    is evicted first. An entry younger than ttl is fresh. For a further
+    stale_ttl seconds it is stale: it is still returned, and when a loader is
+    given it is refreshed in the background (stale-while-revalidate). Older
+    entries are dropped.
+
+    With a path, entries are also written to SQLite (values must be JSON
+    serializable) so the cache survives restarts. The on-disk copy mirrors
+    the in-memory one, including evictions.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 1024, stale_ttl: float = 0,
+                 path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, stored_at)
+        self._refreshing = set()
+        self._refresh_pool = None
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._conn = None
+        if path:
+            self._conn = storage.connect(path)
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+
+    def _load_from_disk(self, key: str):
+        row = self._conn.execute(
+            "SELECT value, stored_at FROM cache_entries WHERE cache = ? AND key = ?", (self.name, key)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _delete_from_disk(self, keys):
+        if self._conn is not None and keys:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM cache_entries WHERE cache = ? AND key = ?", [(self.name, k) for k in keys]
+                )
+
+    def _lookup(self, key: str):
+        """Returns (value, age) for a live entry, or None. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            entry = self._load_from_disk(key)
+            if entry is not None:
+                self._entries[key] = entry
+                self._evict_overflow()
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = self._clock() - stored_at
+        if age >= self.ttl + self.stale_ttl:
+            del self._entries[key]
+            self._delete_from_disk([key])
+            self._counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value, age
+
+    def _evict_overflow(self):
+        evicted = []
+        while len(self._entries) > self.max_size:
+            key, _ = self._entries.popitem(last=False)
+            evicted.append(key)
+        self._counters["evictions"] += len(evicted)
+        self._delete_from_disk(evicted)
+
+    def get(self, key: str, loader: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+        """
+        Returns the cached value for key, or None on a miss.
+
+        A stale value is returned as well; if loader is given it is called in
+        the background to refresh the entry.
+        """
+        with self._lock:
+            found = self._lookup(key)
+            if found is None:
+                self._counters["misses"] += 1
+                return None
+            value, age = found
+            if age < self.ttl:
+                self._counters["hits"] += 1
+                return value
+            self._counters["stale_hits"] += 1
+            if loader is not None and key not in self._refreshing:
+                self._refreshing.add(key)
+                if self._refresh_pool is None:
+                    self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{self.name}-refresh")
+                self._refresh_pool.submit(self._refresh, key, loader)
+            return value
+
+    def _refresh(self, key: str, loader: Callable[[], Any]):
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        except Exception as e:
+            logger.warning("Background refresh of %s cache entry %s failed: %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Optional[Any]:
+        """
+        Returns the cached value for key, calling loader on a miss.
+
+        A None result from loader is returned but not cached. Exceptions from
+        loader propagate to the caller.
+        """
+        value = self.get(key, loader)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Stores value under key as a fresh entry."""
+        stored_at = self._clock()
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO cache_entries (cache, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), stored_at)
+                    )
+            self._evict_overflow()
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Returns the live value for key without touching counters or recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                entry = self._load_from_disk(key)
+        if entry is None or self._clock() - entry[1] >= self.ttl + self.stale_ttl:
+            return None
+        return entry[0]
+
+    def invalidate(self, key: str):
+        """Removes key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._delete_from_disk([key])
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            for counter in self._counters:
+                self._counters[counter] = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache_entries WHERE cache = ?", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/eviction counters, the current size and the hit rate."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats